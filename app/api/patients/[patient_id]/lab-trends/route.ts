@@ -0,0 +1,32 @@
+import { type NextRequest, NextResponse } from "next/server"
+import { backendRequestHeaders, relayedHeaders } from "@/lib/conditional-get"
+
+const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000"
+
+export async function GET(request: NextRequest, { params }: { params: Promise<{ patient_id: string }> }) {
+  try {
+    const { patient_id } = await params
+    // Forward to Python backend, keeping the tests, from, to and points parameters
+    const { search } = new URL(request.url)
+    const backendResponse = await fetch(`${BACKEND_URL}/patients/${patient_id}/lab-trends${search}`, {
+      method: "GET",
+      headers: backendRequestHeaders(request),
+      cache: "no-store",
+    })
+
+    // The browser's copy is current: the backend answered from its table versions without reading rows
+    if (backendResponse.status === 304) {
+      return new NextResponse(null, { status: 304, headers: relayedHeaders(backendResponse) })
+    }
+
+    if (!backendResponse.ok) {
+      throw new Error(`Backend error: ${backendResponse.status}`)
+    }
+
+    const data = await backendResponse.json()
+    return NextResponse.json(data, { headers: relayedHeaders(backendResponse) })
+  } catch (error) {
+    console.error("Lab trends error:", error)
+    return NextResponse.json({ error: "Failed to fetch lab trends" }, { status: 500 })
+  }
+}
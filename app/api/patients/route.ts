@@ -1,23 +1,29 @@
-import { NextResponse } from "next/server"
+import { type NextRequest, NextResponse } from "next/server"
+import { backendRequestHeaders, relayedHeaders } from "@/lib/conditional-get"
 
 const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000"
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
-    // Forward to Python backend
-    const backendResponse = await fetch(`${BACKEND_URL}/patients`, {
+    // Forward to Python backend, keeping pagination and filter parameters
+    const { search } = new URL(request.url)
+    const backendResponse = await fetch(`${BACKEND_URL}/patients${search}`, {
       method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-      },
+      headers: backendRequestHeaders(request),
+      cache: "no-store",
     })
 
+    // The browser's copy is current: the backend answered from its table versions without reading rows
+    if (backendResponse.status === 304) {
+      return new NextResponse(null, { status: 304, headers: relayedHeaders(backendResponse) })
+    }
+
     if (!backendResponse.ok) {
       throw new Error(`Backend error: ${backendResponse.status}`)
     }
 
     const data = await backendResponse.json()
-    return NextResponse.json(data)
+    return NextResponse.json(data, { headers: relayedHeaders(backendResponse) })
   } catch (error) {
     console.error("Patients GET error:", error)
     return NextResponse.json({ error: "Failed to fetch patients" }, { status: 500 })
@@ -0,0 +1,31 @@
+import { type NextRequest, NextResponse } from "next/server"
+import { backendRequestHeaders, relayedHeaders } from "@/lib/conditional-get"
+
+const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000"
+
+export async function GET(request: NextRequest) {
+  try {
+    // Forward to Python backend, keeping the query and limit parameters
+    const { search } = new URL(request.url)
+    const backendResponse = await fetch(`${BACKEND_URL}/patients/search${search}`, {
+      method: "GET",
+      headers: backendRequestHeaders(request),
+      cache: "no-store",
+    })
+
+    // The browser's copy is current: the backend answered from its table versions without reading rows
+    if (backendResponse.status === 304) {
+      return new NextResponse(null, { status: 304, headers: relayedHeaders(backendResponse) })
+    }
+
+    if (!backendResponse.ok) {
+      throw new Error(`Backend error: ${backendResponse.status}`)
+    }
+
+    const data = await backendResponse.json()
+    return NextResponse.json(data, { headers: relayedHeaders(backendResponse) })
+  } catch (error) {
+    console.error("Patient search error:", error)
+    return NextResponse.json({ error: "Failed to search patients" }, { status: 500 })
+  }
+}
@@ -30,6 +30,13 @@ config.set_main_option('sqlalchemy.url', DATABASE_URL)
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+def include_name(name, type_, parent_names) -> bool:
+    """Leave the patient search FTS5 table and its shadow tables out of autogenerate"""
+    if type_ == "table":
+        return not name.startswith("patients_fts")
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -46,6 +53,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -69,7 +77,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,36 @@
+"""Add per-table write counters for conditional GETs
+
+Revision ID: a7b9c1d3e426
+Revises: f6a8b0d2c315
+Create Date: 2026-10-17 23:02:41.190573
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b9c1d3e426'
+down_revision: Union[str, None] = 'f6a8b0d2c315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table_versions = op.create_table('table_versions',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [
+        {'table_name': 'patients', 'version': 0},
+        {'table_name': 'lab_tests', 'version': 0},
+        {'table_name': 'medical_reports', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
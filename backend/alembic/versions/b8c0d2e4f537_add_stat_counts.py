@@ -0,0 +1,53 @@
+"""Add incrementally maintained dashboard counts
+
+Revision ID: b8c0d2e4f537
+Revises: a7b9c1d3e426
+Create Date: 2026-10-18 01:12:09.442817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c0d2e4f537'
+down_revision: Union[str, None] = 'a7b9c1d3e426'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (dimension, table, grouped column); see dashboard_stats.DIMENSIONS
+DIMENSIONS = [
+    ('patients.department', 'patients', 'department'),
+    ('patients.doctor_name', 'patients', 'doctor_name'),
+    ('patients.month', 'patients', 'created_at'),
+    ('analyses.diagnosis', 'medical_reports', 'diagnosis'),
+    ('analyses.month', 'medical_reports', 'created_at'),
+]
+
+
+def _month(column: str) -> str:
+    if op.get_bind().dialect.name == 'postgresql':
+        return f"to_char({column} AT TIME ZONE 'UTC', 'YYYY-MM')"
+    return f"strftime('%Y-%m', {column})"
+
+
+def upgrade() -> None:
+    op.create_table('stat_counts',
+        sa.Column('dimension', sa.String(length=64), nullable=False),
+        sa.Column('group_key', sa.String(length=500), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'group_key')
+    )
+    # Backfill; python dashboard_stats.py recounts the same way
+    for dimension, table, column in DIMENSIONS:
+        key = _month(column) if column == 'created_at' else column
+        op.execute(
+            f"INSERT INTO stat_counts (dimension, group_key, count) "
+            f"SELECT '{dimension}', coalesce({key}, ''), count(*) FROM {table} GROUP BY 2"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('stat_counts')
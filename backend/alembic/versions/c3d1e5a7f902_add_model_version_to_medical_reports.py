@@ -0,0 +1,28 @@
+"""Add model_version to MedicalReport
+
+Revision ID: c3d1e5a7f902
+Revises: b02775cf714f
+Create Date: 2026-10-17 17:05:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d1e5a7f902'
+down_revision: Union[str, None] = 'b02775cf714f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('medical_reports', sa.Column('model_version', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_medical_reports_model_version'), 'medical_reports', ['model_version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_medical_reports_model_version'), table_name='medical_reports')
+    op.drop_column('medical_reports', 'model_version')
@@ -0,0 +1,96 @@
+"""Store patients.birth_date as a DATE, indexed
+
+Revision ID: c9d1e3f5a648
+Revises: b8c0d2e4f537
+Create Date: 2026-10-18 02:41:53.208316
+
+A text birth date that is not a YYYY-MM-DD date is moved to
+birth_date_raw rather than lost; PUT /patients/{id} with a corrected
+birth_date clears it. The downgrade puts those values back.
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d1e3f5a648'
+down_revision: Union[str, None] = 'b8c0d2e4f537'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Patients read and rewritten per statement while copying birth dates
+CHUNK_SIZE = 5000
+
+
+def _parse(value):
+    try:
+        return date.fromisoformat(value.strip()) if len(value.strip()) == 10 else None
+    except ValueError:
+        return None
+
+
+def _copy(source: sa.Column, target: sa.Column, convert, rejects: sa.Column = None) -> int:
+    """
+    Set target to convert(source) for every patient, a chunk of ids at a time
+
+    A value convert rejects (returns None for) is copied to rejects as it is,
+    when given. Returns the number of rejected values.
+    """
+    bind = op.get_bind()
+    columns = [source, target] + ([rejects] if rejects is not None else [])
+    patients = sa.table('patients', sa.column('id', sa.Integer), *columns)
+    last_id, rejected = 0, 0
+    while True:
+        rows = bind.execute(
+            sa.select(patients.c.id, patients.c[source.name])
+            .where(patients.c.id > last_id, patients.c[source.name].is_not(None))
+            .order_by(patients.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            return rejected
+        last_id = rows[-1][0]
+        values, kept = [], []
+        for patient_pk, value in rows:
+            converted = convert(value)
+            if converted is None:
+                rejected += 1
+                kept.append({'pk': patient_pk, 'value': value})
+            else:
+                values.append({'pk': patient_pk, 'value': converted})
+        for column, parameters in ((target, values), (rejects, kept)):
+            if column is not None and parameters:
+                bind.execute(
+                    patients.update().where(patients.c.id == sa.bindparam('pk')).values({column.name: sa.bindparam('value')}),
+                    parameters,
+                )
+
+
+def upgrade() -> None:
+    op.add_column('patients', sa.Column('birth_date_typed', sa.Date(), nullable=True))
+    op.add_column('patients', sa.Column('birth_date_raw', sa.String(length=10), nullable=True))
+    rejected = _copy(sa.column('birth_date', sa.String), sa.column('birth_date_typed', sa.Date), _parse,
+                     sa.column('birth_date_raw', sa.String))
+    if rejected:
+        print(f"{rejected} birth dates were not YYYY-MM-DD dates and were moved to birth_date_raw")
+    op.drop_column('patients', 'birth_date')
+    op.alter_column('patients', 'birth_date_typed', new_column_name='birth_date')
+    op.create_index('ix_patients_birth_date', 'patients', ['birth_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_patients_birth_date', table_name='patients')
+    op.add_column('patients', sa.Column('birth_date_text', sa.String(length=10), nullable=True))
+    _copy(sa.column('birth_date', sa.Date), sa.column('birth_date_text', sa.String), date.isoformat)
+    # Values the upgrade could not parse go back as they were
+    patients = sa.table('patients', sa.column('birth_date_text', sa.String), sa.column('birth_date_raw', sa.String))
+    op.get_bind().execute(
+        patients.update().where(patients.c.birth_date_raw.is_not(None)).values(birth_date_text=patients.c.birth_date_raw)
+    )
+    op.drop_column('patients', 'birth_date_raw')
+    op.drop_column('patients', 'birth_date')
+    op.alter_column('patients', 'birth_date_text', new_column_name='birth_date')
@@ -0,0 +1,36 @@
+"""Add keyset pagination indexes
+
+Revision ID: d4e2f6b8a013
+Revises: c3d1e5a7f902
+Create Date: 2026-10-17 18:12:40.263517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e2f6b8a013'
+down_revision: Union[str, None] = 'c3d1e5a7f902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_patients_created_at_id', 'patients', ['created_at', 'id'], unique=False)
+    op.create_index('ix_patients_department_created_at_id', 'patients', ['department', 'created_at', 'id'], unique=False)
+    op.create_index('ix_patients_doctor_name_created_at_id', 'patients', ['doctor_name', 'created_at', 'id'], unique=False)
+    op.create_index('ix_lab_tests_patient_id_date_id', 'lab_tests', ['patient_id', 'date', 'id'], unique=False)
+    op.create_index('ix_medical_reports_created_at_id', 'medical_reports', ['created_at', 'id'], unique=False)
+    op.create_index('ix_medical_reports_diagnosis_created_at_id', 'medical_reports', ['diagnosis', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_medical_reports_diagnosis_created_at_id', table_name='medical_reports')
+    op.drop_index('ix_medical_reports_created_at_id', table_name='medical_reports')
+    op.drop_index('ix_lab_tests_patient_id_date_id', table_name='lab_tests')
+    op.drop_index('ix_patients_doctor_name_created_at_id', table_name='patients')
+    op.drop_index('ix_patients_department_created_at_id', table_name='patients')
+    op.drop_index('ix_patients_created_at_id', table_name='patients')
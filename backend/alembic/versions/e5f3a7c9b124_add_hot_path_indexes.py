@@ -0,0 +1,32 @@
+"""Add indexes for the remaining hot query paths
+
+Revision ID: e5f3a7c9b124
+Revises: d4e2f6b8a013
+Create Date: 2026-10-17 19:03:27.581942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f3a7c9b124'
+down_revision: Union[str, None] = 'd4e2f6b8a013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A patient's reports, newest first (GET /patient-analyses?patient_id=, patient deletes)
+    op.create_index('ix_medical_reports_patient_id_created_at_id', 'medical_reports', ['patient_id', 'created_at', 'id'], unique=False)
+    # max(patient_id) per model version answers from the index alone; it also serves plain model_version lookups
+    op.create_index('ix_medical_reports_model_version_patient_id', 'medical_reports', ['model_version', 'patient_id'], unique=False)
+    op.drop_index('ix_medical_reports_model_version', table_name='medical_reports')
+
+
+def downgrade() -> None:
+    op.create_index('ix_medical_reports_model_version', 'medical_reports', ['model_version'], unique=False)
+    op.drop_index('ix_medical_reports_model_version_patient_id', table_name='medical_reports')
+    op.drop_index('ix_medical_reports_patient_id_created_at_id', table_name='medical_reports')
@@ -0,0 +1,53 @@
+"""Add the patient full-text search index
+
+Revision ID: f6a8b0d2c315
+Revises: e5f3a7c9b124
+Create Date: 2026-10-17 21:14:05.318420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a8b0d2c315'
+down_revision: Union[str, None] = 'e5f3a7c9b124'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "name, patient_id, email, phone, department, doctor_name"
+NEW = "new.name, new.patient_id, new.email, new.phone, new.department, new.doctor_name"
+OLD = "old.name, old.patient_id, old.email, old.phone, old.department, old.doctor_name"
+DOCUMENT = ("coalesce(name, '') || ' ' || coalesce(patient_id, '') || ' ' || coalesce(email, '') || ' ' || "
+            "coalesce(phone, '') || ' ' || coalesce(department, '') || ' ' || coalesce(doctor_name, '')")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(f"CREATE VIRTUAL TABLE patients_fts USING fts5({COLUMNS}, content='patients', content_rowid='id', "
+                   f"tokenize='unicode61 remove_diacritics 2', prefix='1 2 3 4 5 6')")
+        op.execute(f"CREATE TRIGGER patients_fts_insert AFTER INSERT ON patients BEGIN "
+                   f"INSERT INTO patients_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END")
+        op.execute(f"CREATE TRIGGER patients_fts_delete AFTER DELETE ON patients BEGIN "
+                   f"INSERT INTO patients_fts(patients_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); END")
+        op.execute(f"CREATE TRIGGER patients_fts_update AFTER UPDATE OF {COLUMNS} ON patients BEGIN "
+                   f"INSERT INTO patients_fts(patients_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); "
+                   f"INSERT INTO patients_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END")
+        # Index the patients already there
+        op.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(f"CREATE INDEX ix_patients_search_trgm ON patients USING gin (({DOCUMENT}) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('patients_fts_update', 'patients_fts_delete', 'patients_fts_insert'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS patients_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_patients_search_trgm")
@@ -0,0 +1,218 @@
+"""
+Asyncio micro-batching in front of the liver disease model cascade.
+
+Concurrent /analyze calls submit single panels; a background task gathers the
+panels that arrive within a short window (or until the batch is full) and
+scores them with one vectorized predict_liver_disease_batch call, then hands
+each caller its own result. Up to max_in_flight batches are scored at once,
+one per inference worker, while the next batch is being gathered.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+from percentiles import percentile
+
+# Batch-size histogram buckets (upper bounds, inclusive)
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    Gather single-panel predictions into batches
+
+    A batch is dispatched when it holds max_batch_size panels or when
+    max_wait_ms has passed since its first panel arrived. The window is
+    adaptive: when requests arrive further apart than the window on average,
+    waiting would only add latency, so a lone panel is dispatched at once.
+    While max_in_flight batches are being scored, new panels wait in the
+    queue and leave together as the next batch when one finishes.
+    """
+
+    def __init__(self, predict_batch: Callable, max_batch_size: int = 64, max_wait_ms: float = 2.0, delay_samples: int = 10000,
+                 max_in_flight: int = 1):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_in_flight = max(1, max_in_flight)
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._in_flight = set()
+        self._last_arrival = None
+        self._arrival_gap = None  # EWMA of the time between submissions
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.peak_in_flight = 0
+        self.batch_size_counts = {bucket: 0 for bucket in _BATCH_SIZE_BUCKETS}
+        self.batch_size_counts["more"] = 0
+        self.queue_delays = deque(maxlen=delay_samples)
+
+    async def submit(self, panel: Dict) -> Tuple[str, int, str]:
+        """Queue one panel and wait for its (diagnosis, confidence, advice)"""
+        self._ensure_worker()
+        now = time.perf_counter()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            self._arrival_gap = gap if self._arrival_gap is None else 0.8 * self._arrival_gap + 0.2 * gap
+        self._last_arrival = now
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((panel, future, now))
+        return await future
+
+    async def stop(self):
+        """Cancel the background task and the batches being scored; queued callers are cancelled too"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                future.cancel()
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = loop.create_task(self._run())
+
+    async def _collect(self) -> List:
+        """Wait for the first panel, then fill the batch until it is full or the window closes"""
+        batch = [await self._queue.get()]
+        low_load = self._arrival_gap is None or self._arrival_gap > self.max_wait
+        if low_load and self._queue.empty():
+            return batch
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Gather only once a slot is free, so panels that arrive meanwhile join the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            dispatched = time.perf_counter()
+            self._record(batch, dispatched)
+
+            task = loop.create_task(self._score(batch))
+            self._in_flight.add(task)
+            self.peak_in_flight = max(self.peak_in_flight, len(self._in_flight))
+            task.add_done_callback(functools.partial(self._scored, batch, self._slots))
+
+    def _scored(self, batch, slots, task):
+        self._in_flight.discard(task)
+        slots.release()
+        # A batch cancelled by stop() cancels its callers instead of leaving them waiting
+        for _, future, _ in batch:
+            if not future.done():
+                future.cancel()
+
+    async def _score(self, batch):
+        # Callers that gave up (client disconnect) are dropped from the batch
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        try:
+            results = self.predict_batch([panel for panel, _, _ in batch])
+            if inspect.isawaitable(results):
+                results = await results
+            results = list(results)
+        except Exception as e:
+            self.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        if len(results) < len(batch):
+            # An exception, not a cancellation, so /analyze answers these callers with a 500
+            self.errors += 1
+            error = RuntimeError(f"batch returned {len(results)} results for {len(batch)} panels")
+            for _, future, _ in batch[len(results):]:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _record(self, batch, dispatched):
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+        for bucket in _BATCH_SIZE_BUCKETS:
+            if size <= bucket:
+                self.batch_size_counts[bucket] += 1
+                break
+        else:
+            self.batch_size_counts["more"] += 1
+        self.queue_delays.extend(dispatched - submitted for _, _, submitted in batch)
+
+    def stats(self) -> Dict:
+        """Batch-size distribution and queueing delay percentiles (milliseconds)"""
+        delays = sorted(self.queue_delays)
+
+        def delay_ms(p):
+            return round(percentile(delays, p) * 1000, 3) if delays else None
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": len(self._in_flight),
+            "peak_in_flight": self.peak_in_flight,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+            "batch_size_histogram": {f"<={k}" if k != "more" else f">{_BATCH_SIZE_BUCKETS[-1]}": v for k, v in self.batch_size_counts.items()},
+            "queue_delay_ms": {
+                "p50": delay_ms(50),
+                "p95": delay_ms(95),
+                "p99": delay_ms(99),
+                "max": round(delays[-1] * 1000, 3) if delays else None,
+            },
+        }
+
+
+def batcher_from_env(predict_batch: Callable, max_in_flight: int = 1) -> MicroBatcher:
+    """MicroBatcher configured by ANALYZE_BATCH_WINDOW_MS and ANALYZE_BATCH_MAX_SIZE, scoring max_in_flight batches at once"""
+    return MicroBatcher(
+        predict_batch,
+        max_batch_size=int(os.getenv("ANALYZE_BATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.getenv("ANALYZE_BATCH_WINDOW_MS", "2")),
+        max_in_flight=max_in_flight,
+    )
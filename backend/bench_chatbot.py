@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark of chatbot intent routing as the number of intents grows.
+
+Classifies a corpus of typical chatbot questions with the compiled intent
+router and with the if/elif chain of substring scans it replaced, after
+adding N synthetic intents (five keywords each, one of them a phrase) to
+the chatbot's own. The router's cost per message should stay flat as N
+grows; the chain's grows with every keyword it has to scan for.
+
+Usage:
+    python bench_chatbot.py [--intents 0,10,100,1000] [--iterations 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from chat_intents import router as chat_router
+from intent_router import IntentRouter, Message
+
+# Messages as users type them into the chat panel
+CORPUS = [
+    "Hello",
+    "hi, who is on call today?",
+    "Hey there",
+    "How many patients do we have?",
+    "how many patients are in cardiology",
+    "List patients",
+    "show me all patients please",
+    "Who was admitted most recently?",
+    "patient count",
+    "How many analyses have been done?",
+    "What was the latest analysis?",
+    "show the most recent diagnosis",
+    "Can I see the results for the last report?",
+    "count reports",
+    "what is the diagnosis for the newest patient",
+    "What can you do?",
+    "help",
+    "which features does the system have",
+    "what are your capabilities",
+    "Tell me about liver disease",
+    "Is a high ALT bad for liver health?",
+    "what does elevated GGT mean medically",
+    "Explain hepatitis",
+    "what is cirrhosis",
+    "thanks",
+    "good morning",
+    "schedule an appointment for tomorrow",
+    "what is the normal range for bilirubin",
+    "can you export this week's data",
+    "why is the dashboard slow",
+    "ALT 56 AST 40 bilirubin 1.2 what does it mean",
+    "who is the doctor for patient P-1001",
+    "greetings, I need the medical history of a patient",
+    "do we track blood pressure",
+    "how accurate is the model",
+    "is fatty liver reversible",
+    "what departments are there",
+    "ok",
+    "how many patients were diagnosed with hepatitis this month and what were their results",
+    "I would like to know more about how the system decides on a diagnosis and which lab values it uses",
+]
+
+# The chatbot's intents and keywords, in the order the old if/elif chain tried them
+_CHATBOT_INTENTS = list(chat_router.keywords().items())
+
+
+def _synthetic_keywords(intent: int) -> List[str]:
+    return [f"zq{intent}w{k}" for k in range(4)] + [f"zq{intent} phrase"]
+
+
+def build_router(extra_intents: int) -> IntentRouter:
+    """The chatbot's intents followed by extra_intents synthetic ones"""
+    router = IntentRouter()
+    for name, keywords in _CHATBOT_INTENTS:
+        router.intent(name, keywords)(lambda message: None)
+    for i in range(extra_intents):
+        router.intent(f"synthetic{i}", _synthetic_keywords(i))(lambda message: None)
+    router.compile()
+    return router
+
+
+def build_chain(extra_intents: int) -> Callable[[str], str]:
+    """Substring-scan classifier over the same intents, one any() per intent as in the old /chatbot"""
+    chain = _CHATBOT_INTENTS + [(f"synthetic{i}", _synthetic_keywords(i)) for i in range(extra_intents)]
+
+    def classify(text: str):
+        lowered = text.lower().strip()
+        for name, keywords in chain:
+            if any(keyword in lowered for keyword in keywords):
+                return name
+        return None
+
+    return classify
+
+
+def _per_message_us(classify: Callable, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in CORPUS:
+            classify(text)
+    return (time.perf_counter() - start) / (iterations * len(CORPUS)) * 1e6
+
+
+def run_suite(intent_counts: List[int], iterations: int = 200) -> List[Dict]:
+    results = []
+    for extra in intent_counts:
+        router, chain = build_router(extra), build_chain(extra)
+        results.append({
+            "intents": len(_CHATBOT_INTENTS) + extra,
+            "router_us": round(_per_message_us(lambda text: router.classify(Message(text)), iterations), 2),
+            "chain_us": round(_per_message_us(chain, iterations), 2),
+        })
+    return results
+
+
+def main(args):
+    results = run_suite(args.intents, args.iterations)
+    print(f"{len(CORPUS)} messages, {args.iterations} passes; microseconds per message")
+    print(f"{'intents':>8} {'router':>10} {'chain':>10}")
+    for r in results:
+        print(f"{r['intents']:>8} {r['router_us']:>10.2f} {r['chain_us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-message cost of chatbot intent routing by number of intents")
+    parser.add_argument("--intents", default="0,10,100,1000", type=lambda value: [int(n) for n in value.split(",")],
+                        help="synthetic intents added to the chatbot's own")
+    parser.add_argument("--iterations", type=int, default=200, help="passes over the corpus per case")
+    main(parser.parse_args())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the database-backed endpoints.
+
+Fires a fixed number of GET requests at increasing numbers of in-flight
+requests and reports throughput and latency per level. With the async
+database layer, throughput should grow with concurrency until the database
+saturates, instead of staying flat as it does when every query blocks the
+event loop. Each level also times GET / while the load runs; that probe
+stays fast only if the loop keeps serving other requests.
+
+By default the app runs in-process (ASGI transport) on a temporary SQLite
+database seeded with --patients patients; pass --url to load a running
+server instead.
+
+Usage:
+    python bench_concurrency.py [--path /patient-analyses?limit=100] [--levels 1,2,4,8,16,32] [--requests 400]
+    python bench_concurrency.py --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from percentiles import percentile
+
+
+def seed_database(url: str, patients: int, reports_per_patient: int = 5):
+    """Create the app's schema at url and add patients and their reports"""
+    from sqlalchemy import create_engine, insert
+
+    from database import Base
+    from models import MedicalReport, Patient
+
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Patient), [
+            {"name": f"Patient {i}", "patient_id": f"P-BENCH-{i}", "department": "Hepatology", "doctor_name": f"Dr {i % 20}"}
+            for i in range(patients)
+        ])
+        connection.execute(insert(MedicalReport), [
+            {"patient_id": i % patients + 1, "diagnosis": "Healthy", "confidence": 90.0, "advice": "Advice"}
+            for i in range(patients * reports_per_patient)
+        ])
+    engine.dispose()
+
+
+async def run_level(client, path: str, concurrency: int, total: int) -> Dict:
+    """Send total requests for path with at most concurrency in flight; probe GET / meanwhile"""
+    latencies, probes = [], []
+    queue = iter(range(total))
+
+    async def worker():
+        for _ in queue:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    async def probe(done: asyncio.Event):
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/")
+            probes.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    done = asyncio.Event()
+    prober = asyncio.create_task(probe(done))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    return {
+        "concurrency": concurrency,
+        "requests_per_s": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "probe_p95_ms": round(percentile(probes, 95) * 1000, 2) if probes else None,
+    }
+
+
+async def run_suite(client, path: str, levels: List[int], total: int) -> List[Dict]:
+    # One warm-up request opens connections and fills caches
+    (await client.get(path)).raise_for_status()
+    return [await run_level(client, path, level, total) for level in levels]
+
+
+async def main(args):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        # database.py reads DATABASE_URL on import, so set it first
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_concurrency.db")
+        os.environ.setdefault("INFERENCE_WORKERS", "0")
+        seed_database(os.environ["DATABASE_URL"], args.patients)
+        # The app logs every list request; keep the import and the run off the terminal
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    async with client:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = await run_suite(client, args.path, args.levels, args.requests)
+
+    base = results[0]["requests_per_s"]
+    print(f"GET {args.path}, {args.requests} requests per level")
+    print(f"{'in flight':>9} {'req/s':>10} {'speedup':>8} {'p50 ms':>10} {'p95 ms':>10} {'GET / p95 ms':>13}")
+    for r in results:
+        probe = f"{r['probe_p95_ms']:.2f}" if r["probe_p95_ms"] is not None else "-"
+        print(f"{r['concurrency']:>9} {r['requests_per_s']:>10.1f} {r['requests_per_s'] / base:>7.2f}x "
+              f"{r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} {probe:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of the database endpoints by number of in-flight requests")
+    parser.add_argument("--url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--path", default="/patient-analyses?limit=100")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", type=lambda value: [int(level) for level in value.split(",")])
+    parser.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    parser.add_argument("--patients", type=int, default=5000, help="patients in the in-process database")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Repeatable benchmark suite for predict_liver_disease and its parts.
+
+Times the full cascade, each model stage (model_global, model_hep,
+model_cirr), feature assembly and the rule-based fallback over a sweep of
+batch sizes. For every case it reports p50/p95/p99 latency per call and per
+row, and the peak memory allocated by one call (tracemalloc). Results are
+saved as JSON, so a run can be diffed against a saved baseline and fail
+when a case got slower than the threshold allows.
+
+Usage:
+    python bench_inference.py [--iterations N] [--batch-sizes 1,8,64,512] [--output results.json]
+    python bench_inference.py --compare baseline.json [--threshold 0.2]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+import sklearn
+
+import model
+from bench_model import _random_panels
+from percentiles import percentile
+
+
+def _peak_allocation(fn: Callable) -> int:
+    """Peak bytes allocated while fn runs once"""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn: Callable, rows: int, iterations: int, warmup: int = 3) -> Dict:
+    """Latency percentiles (microseconds) and peak allocation of repeated fn() calls"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    result = {"rows": rows, "calls": iterations}
+    for p in (50, 95, 99):
+        result[f"p{p}_us"] = round(percentile(samples, p) * 1e6, 2)
+    result["per_row_p50_us"] = round(result["p50_us"] / rows, 3)
+    result["alloc_peak_kib"] = round(_peak_allocation(fn) / 1024, 1)
+    return result
+
+
+def _numeric_matrix(layout, live) -> "np.ndarray":
+    """Layout matrix with numeric Gender, so the global model can be scored on its own"""
+    matrix = layout.matrix(live)
+    if matrix.dtype == object:
+        matrix[:, layout.index["Gender"]] = 1
+    return matrix.astype(np.float64)
+
+
+def build_cases(batch_sizes: List[int]) -> Dict[str, tuple]:
+    """Case name -> (rows per call, callable) for every benchmarked part and batch size"""
+    model.warm_up()
+    panels = [dict(alt=alt, ast=ast, bilirubin=bilirubin, ggt=ggt) for alt, ast, bilirubin, ggt in _random_panels(max(batch_sizes))]
+    stages = {"model_global": model.GLOBAL_LAYOUT, "model_hep": model.HEP_LAYOUT, "model_cirr": model.CIRR_LAYOUT}
+
+    cases = {}
+    for size in batch_sizes:
+        batch = panels[:size]
+        columns = model._panel_columns(batch)
+        live = model._live_features(*columns)
+
+        if size == 1:
+            panel = batch[0]
+            scalar_live = model._live_features(panel["alt"], panel["ast"], panel["bilirubin"], panel["ggt"])
+            cases[f"feature_assembly[b={size}]"] = (size, lambda live=scalar_live: [layout.row(live) for layout in stages.values()])
+            cases[f"cascade[b={size}]"] = (size, lambda panel=panel: model.predict_liver_disease(**panel))
+            cases[f"rule_based[b={size}]"] = (size, lambda panel=panel: model._enhanced_rule_based_prediction(**panel))
+        else:
+            cases[f"feature_assembly[b={size}]"] = (size, lambda live=live: [layout.matrix(live) for layout in stages.values()])
+            cases[f"cascade[b={size}]"] = (size, lambda batch=batch: model.predict_liver_disease_batch(batch))
+            cases[f"rule_based[b={size}]"] = (size, lambda columns=columns: model.rule_based_prediction_batch(*columns))
+
+        for name, layout in stages.items():
+            estimator = getattr(model, name)
+            if estimator is None:
+                continue
+            X = _numeric_matrix(layout, live)
+            cases[f"stage.{name}[b={size}]"] = (size, lambda estimator=estimator, X=X: estimator.predict(X))
+    return cases
+
+
+def run_suite(iterations: int, batch_sizes: List[int]) -> Dict:
+    cases = build_cases(batch_sizes)
+    results = {}
+    # The cascade and the fallback log to stdout; time them without the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, (rows, fn) in cases.items():
+            # Large batches are slow per call; keep the run time per case bounded
+            results[name] = measure(fn, rows, max(5, iterations // max(1, rows // 8)))
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "backend": model.MODEL_BACKEND,
+            "model_fingerprint": model.model_fingerprint(),
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float, metric: str = "p50_us") -> List[str]:
+    """Names of the cases whose metric grew by more than threshold (a fraction) over the baseline"""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get(metric):
+            continue
+        change = result[metric] / before[metric] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<32} {before[metric]:>12.2f} -> {result[metric]:>12.2f} {metric}  {change:+7.1%}  {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _print_results(suite: Dict):
+    print(f"{'case':<32} {'p50 us':>12} {'p95 us':>12} {'p99 us':>12} {'us/row':>10} {'peak KiB':>10}")
+    for name, r in suite["results"].items():
+        print(f"{name:<32} {r['p50_us']:>12.2f} {r['p95_us']:>12.2f} {r['p99_us']:>12.2f} {r['per_row_p50_us']:>10.3f} {r['alloc_peak_kib']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite for predict_liver_disease")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per single-row case")
+    parser.add_argument("--batch-sizes", default="1,8,64,512")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to diff against; exits 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (0.2 = 20%%)")
+    parser.add_argument("--metric", default="p50_us", help="result field compared against the baseline")
+    args = parser.parse_args()
+
+    suite = run_suite(args.iterations, [int(size) for size in args.batch_sizes.split(",")])
+    _print_results(suite)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(suite, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), suite, args.threshold, args.metric)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the feature assembly and inference of predict_liver_disease.
+
+Compares the original pandas-based assembly (one dict, three DataFrames and
+zero-filled specialist frames per call) with the precomputed feature layouts
+in model.py, and checks that both produce identical predictions. Then times
+every inference backend per row, one row at a time and in batches.
+
+Usage:
+    python bench_model.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import model
+from inference_backends import BACKENDS, make_backend
+from model import CIRR_COLS, GLOBAL_COLS, HEP_COLS
+
+
+def legacy_feature_frames(alt, ast, bilirubin, ggt):
+    """Feature assembly as predict_liver_disease did it before the layouts existed"""
+    input_data = {
+        'Age': 45, 'Gender': 1, 'ID': 1,
+        'ALT': alt, 'AST': ast, 'TB': bilirubin, 'GGT': ggt,
+        'DB': bilirubin * 0.3, 'AlkPhos': 100, 'TP': 7.0, 'ALB': 4.0, 'AGR': 1.2,
+        'N_Days': 1000, 'Status': 1, 'Drug': 1, 'Ascites': 0, 'Hepatomegaly': 0,
+        'Spiders': 0, 'Edema': 0, 'Cholesterol': 180, 'Copper': 100,
+        'Tryglicerides': 120, 'Platelets': 250000, 'Prothrombin': 10.5,
+        'CHE': 8.0, 'Creatinine': 0.8,
+    }
+
+    df_global = pd.DataFrame([input_data])
+    df_global_pred = df_global[GLOBAL_COLS].copy()
+    df_global_pred['Gender'] = df_global_pred['Gender'].map({0: 'female', 1: 'male'})
+
+    df_hep = pd.DataFrame([input_data])
+    df_hep_pred = pd.DataFrame(0, index=[0], columns=HEP_COLS)
+    for col in set(HEP_COLS).intersection(df_hep.columns):
+        df_hep_pred[col] = df_hep[col]
+
+    df_cirr = pd.DataFrame([input_data])
+    df_cirr_pred = pd.DataFrame(0, index=[0], columns=CIRR_COLS)
+    for col in set(CIRR_COLS).intersection(df_cirr.columns):
+        df_cirr_pred[col] = df_cirr[col]
+
+    return df_global_pred, df_hep_pred, df_cirr_pred
+
+
+def layout_feature_rows(alt, ast, bilirubin, ggt):
+    """Feature assembly through the precomputed layouts"""
+    live = model._live_features(alt, ast, bilirubin, ggt)
+    return model.GLOBAL_LAYOUT.row(live), model.HEP_LAYOUT.row(live), model.CIRR_LAYOUT.row(live)
+
+
+def _random_panels(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return list(zip(
+        rng.uniform(5, 400, count).round(1).tolist(),
+        rng.uniform(5, 400, count).round(1).tolist(),
+        rng.uniform(0.1, 8.0, count).round(2).tolist(),
+        rng.uniform(5, 300, count).round(1).tolist(),
+    ))
+
+
+def _time_per_call(fn, panels):
+    start = time.perf_counter()
+    for panel in panels:
+        fn(*panel)
+    return (time.perf_counter() - start) / len(panels)
+
+
+def bench_feature_assembly(iterations):
+    panels = _random_panels(iterations)
+    legacy = _time_per_call(legacy_feature_frames, panels)
+    layout = _time_per_call(layout_feature_rows, panels)
+    print(f"Feature assembly   legacy {legacy * 1e6:9.1f} us   layout {layout * 1e6:9.1f} us   speedup {legacy / layout:6.1f}x")
+
+
+def bench_specialist_predict(iterations):
+    """Assembly plus predict of the specialist models, checking predictions match"""
+    model.warm_up()
+    if model.model_hep is None or model.model_cirr is None:
+        print("Specialist predict: models not loaded, skipped")
+        return
+
+    panels = _random_panels(iterations, seed=1)
+
+    def legacy(*panel):
+        _, df_hep, df_cirr = legacy_feature_frames(*panel)
+        return model.model_hep.predict(df_hep)[0], model.model_cirr.predict(df_cirr)[0]
+
+    def layout(*panel):
+        _, hep_row, cirr_row = layout_feature_rows(*panel)
+        return model.model_hep.predict(hep_row)[0], model.model_cirr.predict(cirr_row)[0]
+
+    mismatches = sum(legacy(*panel) != layout(*panel) for panel in panels)
+    legacy_time = _time_per_call(legacy, panels)
+    layout_time = _time_per_call(layout, panels)
+    print(f"Specialist predict legacy {legacy_time * 1e6:9.1f} us   layout {layout_time * 1e6:9.1f} us   speedup {legacy_time / layout_time:6.1f}x")
+    print(f"Prediction mismatches: {mismatches}/{len(panels)}")
+
+
+def bench_backends(iterations, batch_size=256):
+    """Per-row predict latency of each inference backend for each cascade model"""
+    layouts = {"model_global": model.GLOBAL_LAYOUT, "model_hep": model.HEP_LAYOUT, "model_cirr": model.CIRR_LAYOUT}
+    panels = _random_panels(max(iterations, batch_size), seed=2)
+    for name, filename in model.MODEL_FILES.items():
+        estimator = joblib.load(os.path.join(model.MODEL_DIR, filename))
+        layout = layouts[name]
+        X = layout.matrix(model._live_features(*(np.array(column) for column in zip(*panels))))
+        if X.dtype == object:
+            # Numeric Gender, so the global model can be scored at all
+            X[:, layout.index["Gender"]] = 1
+        X = X.astype(np.float64)
+
+        timings, predictions = [], []
+        for backend in BACKENDS:
+            predictor = make_backend(estimator, backend)
+            rows = X[:iterations]
+            start = time.perf_counter()
+            for i in range(len(rows)):
+                predictor.predict(rows[i:i + 1])
+            single = (time.perf_counter() - start) / len(rows)
+            start = time.perf_counter()
+            predictions.append(predictor.predict(X[:batch_size]))
+            batched = (time.perf_counter() - start) / batch_size
+            timings.append(f"{backend} {single * 1e6:8.1f} us/row single {batched * 1e6:7.2f} us/row batch")
+        identical = all(np.array_equal(predictions[0], p) for p in predictions[1:])
+        print(f"{name:<13} " + "   ".join(timings) + f"   identical={identical}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark predict_liver_disease feature assembly and inference backends")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    bench_feature_assembly(args.iterations)
+    bench_specialist_predict(max(1, args.iterations // 10))
+    bench_backends(max(1, args.iterations // 10))
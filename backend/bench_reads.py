@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the hot read endpoints.
+
+Serves GET /patients, /lab-tests and /patient-data from a temporary SQLite
+database holding --rows patients and --rows lab results of one patient,
+and reports rows/s for each, twice: through the app as it is (Core
+selects of the response columns, row_json serializers, one orjson
+encoding) and through a copy of the previous implementation (per-field
+dict building with isoformat() calls, ORM objects for /patient-data, and
+FastAPI's default response encoding). Both run in-process over the ASGI
+transport, so they pay the same HTTP overhead.
+
+Usage:
+    python bench_reads.py [--rows 100000] [--iterations 5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from percentiles import percentile
+
+# (name, path, key of the response's row list)
+ENDPOINTS = [
+    ("patients", "/patients", "patients"),
+    ("lab-tests", "/lab-tests?patientId=P-READ-0", "labTests"),
+    ("patient-data", "/patient-data", "labTests"),
+]
+
+
+def seed_database(url: str, rows: int):
+    """Create the app's schema at url, add rows patients and rows lab results of the first"""
+    from sqlalchemy import create_engine, insert
+
+    from database import Base
+    from models import LabTest, Patient
+
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Patient), [
+            {"name": f"Patient {i}", "patient_id": f"P-READ-{i}", "birth_date": date(1980, 1, 1), "email": f"p{i}@example.com",
+             "phone": "+964 750 1234567", "department": "Hepatology", "doctor_name": f"Dr {i % 20}"}
+            for i in range(rows)
+        ])
+        connection.execute(insert(LabTest), [
+            {"patient_id": 1, "test_name": "ALT", "value": 20.0 + i % 50, "unit": "U/L", "normal_range": "7-56",
+             "status": "normal", "date": start + timedelta(minutes=i)}
+            for i in range(rows)
+        ])
+    engine.dispose()
+
+
+def build_legacy_app():
+    """The three endpoints as they were before the fast path, on the same database"""
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import desc, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from database import get_async_db
+    from models import LabTest, Patient
+
+    app = FastAPI()
+
+    def lab_test_row(test) -> dict:
+        return {
+            "testName": test.test_name,
+            "value": test.value,
+            "unit": test.unit,
+            "normalRange": test.normal_range,
+            "status": test.status,
+            "date": test.date.isoformat() if test.date else None,
+        }
+
+    def patient_row(patient) -> dict:
+        return {
+            "id": patient.id,
+            "name": patient.name,
+            "patient_id": patient.patient_id,
+            "birth_date": patient.birth_date,
+            "email": patient.email,
+            "phone": patient.phone,
+            "profile_picture": patient.profile_picture,
+            "department": patient.department,
+            "doctor_name": patient.doctor_name,
+            "created_at": patient.created_at.isoformat() if patient.created_at else None,
+            "updated_at": patient.updated_at.isoformat() if patient.updated_at else None,
+        }
+
+    @app.get("/patients")
+    async def get_patients(db: AsyncSession = Depends(get_async_db)):
+        query = select(*Patient.__table__.columns).order_by(desc(Patient.created_at), desc(Patient.id))
+        patients = (await db.execute(query)).all()
+        return {"success": True, "patients": [patient_row(patient) for patient in patients], "next_cursor": None}
+
+    @app.get("/lab-tests")
+    async def get_lab_tests(patientId: str, db: AsyncSession = Depends(get_async_db)):
+        patient_pk = await db.scalar(select(Patient.id).where(Patient.patient_id == patientId))
+        query = select(*LabTest.__table__.columns).where(LabTest.patient_id == patient_pk).order_by(desc(LabTest.date), desc(LabTest.id))
+        lab_tests = (await db.execute(query)).all()
+        return {"success": True, "labTests": [lab_test_row(test) for test in lab_tests], "next_cursor": None}
+
+    @app.get("/patient-data")
+    async def get_patient_data(db: AsyncSession = Depends(get_async_db)):
+        patient = await db.scalar(select(Patient).limit(1))
+        lab_tests = (await db.scalars(select(LabTest).where(LabTest.patient_id == patient.id).order_by(desc(LabTest.date)).limit(10))).all()
+        return {
+            "success": True,
+            "patient": {"id": patient.patient_id, "name": patient.name, "birth_date": patient.birth_date},
+            "labTests": [lab_test_row(test) for test in lab_tests],
+            "recentVisits": [{"date": "2024-01-15", "type": "Routine Checkup", "doctor": "Dr. Sarah Ahmed"}],
+        }
+
+    return app
+
+
+async def _rows_per_s(client, path: str, key: str, iterations: int) -> float:
+    (await client.get(path)).raise_for_status()  # warm-up
+    timings, rows = [], 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = await client.get(path)
+        timings.append(time.perf_counter() - start)
+        rows = len(response.json()[key])
+    return rows / percentile(timings, 50)
+
+
+async def run_suite(current_app, legacy_app, iterations: int = 5) -> List[Dict]:
+    import httpx
+
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=current_app), base_url="http://bench", timeout=600) as current, \
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=legacy_app), base_url="http://bench", timeout=600) as legacy:
+        for name, path, key in ENDPOINTS:
+            before = await _rows_per_s(legacy, path, key, iterations)
+            after = await _rows_per_s(current, path, key, iterations)
+            results.append({"endpoint": name, "before_rows_per_s": round(before), "after_rows_per_s": round(after),
+                            "speedup": round(after / before, 2)})
+    return results
+
+
+def main(args):
+    # database.py reads DATABASE_URL on import, so set it first
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_reads.db")
+    os.environ.setdefault("INFERENCE_WORKERS", "0")
+    os.environ.setdefault("MODEL_WARMUP", "0")
+    seed_database(os.environ["DATABASE_URL"], args.rows)
+    # The app logs its requests; keep the import and the run off the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from main import app
+        results = asyncio.run(run_suite(app, build_legacy_app(), args.iterations))
+
+    print(f"{args.rows} patients, {args.rows} lab results; median of {args.iterations} requests")
+    print(f"{'endpoint':>13} {'before rows/s':>14} {'after rows/s':>13} {'speedup':>8}")
+    for r in results:
+        print(f"{r['endpoint']:>13} {r['before_rows_per_s']:>14} {r['after_rows_per_s']:>13} {r['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rows/s of the hot read endpoints, before and after the Core fast path")
+    parser.add_argument("--rows", type=int, default=100000, help="patients, and lab results of one patient")
+    parser.add_argument("--iterations", type=int, default=5, help="timed requests per endpoint and implementation")
+    main(parser.parse_args())
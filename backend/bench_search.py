@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for GET /patients/search.
+
+Seeds a temporary SQLite database with --patients synthetic patients
+(names, IDs, contact details, departments and doctors drawn from small
+pools, so common prefixes match many rows), then runs a corpus of
+searches through search_patients and reports p50/p95/p99 latency per
+query kind.
+
+Usage:
+    python bench_search.py [--patients 1000000] [--iterations 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from percentiles import percentile
+
+FIRST_NAMES = ["Ahmed", "Sara", "John", "Johanna", "Omar", "Layla", "Karim", "Noor", "Ali", "Maria", "Yusuf", "Hana",
+               "David", "Fatima", "Hassan", "Zainab", "Mustafa", "Reem", "Adam", "Lina", "Ibrahim", "Mona", "Tariq", "Dina"]
+LAST_NAMES = ["Smith", "Hassan", "Ali", "Karim", "Saleh", "Mahmoud", "Jaber", "Nasser", "Farouk", "Haddad", "Khalil",
+              "Mansour", "Rashid", "Aziz", "Salem", "Yousef", "Hamdan", "Qasim", "Ibrahim", "Abbas"]
+DEPARTMENTS = ["Hepatology", "Gastroenterology", "Cardiology", "Nephrology", "Internal Medicine", "Oncology"]
+DOCTORS = [f"{first} {last}" for first, last in zip(FIRST_NAMES[::2], LAST_NAMES)]
+
+
+def seed_database(url: str, patients: int, seed: int = 0):
+    """Create the app's schema at url (with the search index) and add patients"""
+    from sqlalchemy import create_engine, insert
+
+    from database import Base
+    from models import Patient
+
+    rng = random.Random(seed)
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for start in range(0, patients, 50000):
+            rows = []
+            for i in range(start, min(start + 50000, patients)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                rows.append({
+                    "name": f"{first} {last}",
+                    "patient_id": f"P-{i:07d}",
+                    "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                    "phone": f"+964 {rng.randrange(700, 800)} {rng.randrange(1000000, 9999999)}",
+                    "department": rng.choice(DEPARTMENTS),
+                    "doctor_name": rng.choice(DOCTORS),
+                })
+            connection.execute(insert(Patient), rows)
+    engine.dispose()
+
+
+def query_corpus(patients: int, seed: int = 1) -> Dict[str, List[str]]:
+    """Searches by kind, as typed into the patient search box"""
+    rng = random.Random(seed)
+    return {
+        "full name": [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(20)],
+        "name prefix": [rng.choice(FIRST_NAMES)[:n] for n in (2, 3, 4) for _ in range(7)],
+        "patient id": [f"P-{rng.randrange(patients):07d}" for _ in range(20)],
+        "email": [f"{rng.choice(FIRST_NAMES).lower()}.{rng.choice(LAST_NAMES).lower()}{rng.randrange(patients)}" for _ in range(20)],
+        "department + name": [f"{rng.choice(DEPARTMENTS)[:5]} {rng.choice(LAST_NAMES)}" for _ in range(20)],
+        "no match": ["xyzzy", "qqq unknown", "P-9999999x"],
+    }
+
+
+async def run_suite(url: str, corpus: Dict[str, List[str]], iterations: int) -> List[Dict]:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from database import async_database_url
+    from patient_search import search_patients
+
+    engine = create_async_engine(async_database_url(url))
+    results = []
+    async with AsyncSession(engine) as db:
+        for kind, queries in corpus.items():
+            for query in queries:
+                await search_patients(db, query)  # warm-up
+            samples = []
+            for _ in range(iterations):
+                for query in queries:
+                    start = time.perf_counter()
+                    await search_patients(db, query)
+                    samples.append(time.perf_counter() - start)
+            results.append({
+                "kind": kind,
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            })
+    await engine.dispose()
+    return results
+
+
+def main(args):
+    # database.py reads DATABASE_URL on import, so set it first
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_search.db")
+    os.environ["DATABASE_URL"] = url
+    start = time.perf_counter()
+    seed_database(url, args.patients)
+    print(f"Seeded {args.patients} patients in {time.perf_counter() - start:.1f} s")
+
+    results = asyncio.run(run_suite(url, query_corpus(args.patients), args.iterations))
+    print(f"{'query':>18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['kind']:>18} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of patient search by query kind")
+    parser.add_argument("--patients", type=int, default=1000000)
+    parser.add_argument("--iterations", type=int, default=20, help="passes over each kind's queries")
+    main(parser.parse_args())
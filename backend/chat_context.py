@@ -0,0 +1,206 @@
+"""
+Shared database context for the chatbot.
+
+/chatbot answers from a snapshot of the true patient and analysis counts
+and the most recent patients and analyses, so a reply normally needs no
+database round trip. The write endpoints apply their changes to the
+snapshot as they commit them. A change the snapshot cannot apply exactly
+(e.g. deleting one of the recent rows, whose replacement it does not know)
+marks it stale, and the next read reloads it. The TTL bounds how long
+writes made elsewhere (other workers, scripts) take to show up.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import MedicalReport, Patient
+
+
+def patient_entry(patient) -> Dict:
+    return {
+        "id": patient.id,
+        "name": patient.name,
+        "patient_id": patient.patient_id,
+        "department": patient.department,
+        "doctor_name": patient.doctor_name,
+    }
+
+
+class ChatContext:
+    """
+    Counts and recent rows of patients and medical_reports, kept up to date by the write endpoints
+
+    Args:
+        recent: Number of most recent patients and analyses kept
+        ttl_seconds: Age after which the snapshot is reloaded anyway
+    """
+
+    def __init__(self, recent: int = 10, ttl_seconds: float = 60.0):
+        self.recent = recent
+        self.ttl = ttl_seconds
+        self._snapshot = None
+        self._loaded_at = None
+        self._stale = True
+        # Bumped by every change, so a reload that raced with one is not trusted
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.reloads = 0
+        self.updates = 0
+        self.invalidations = 0
+
+    def _fresh(self) -> bool:
+        return not self._stale and time.monotonic() - self._loaded_at < self.ttl
+
+    async def get(self, db: AsyncSession) -> Dict:
+        """
+        The snapshot: total_patients, total_analyses, patients and analyses (newest first)
+
+        Reloads it with db first when it is stale or older than the TTL.
+        """
+        if self._fresh():
+            self.hits += 1
+            return self._snapshot
+        async with self._lock:
+            # Another request may have reloaded it while this one waited
+            if self._fresh():
+                self.hits += 1
+            else:
+                await self._reload(db)
+        return self._snapshot
+
+    async def _reload(self, db: AsyncSession):
+        version = self._version
+        total_patients = await db.scalar(select(func.count()).select_from(Patient))
+        total_analyses = await db.scalar(select(func.count()).select_from(MedicalReport))
+        patients = (await db.execute(
+            select(Patient.id, Patient.name, Patient.patient_id, Patient.department, Patient.doctor_name)
+            .order_by(desc(Patient.created_at), desc(Patient.id)).limit(self.recent)
+        )).all()
+        analyses = (await db.execute(
+            select(MedicalReport.id, MedicalReport.patient_id, Patient.name.label("patient_name"),
+                   MedicalReport.diagnosis, MedicalReport.confidence)
+            .outerjoin(Patient, Patient.id == MedicalReport.patient_id)
+            .order_by(desc(MedicalReport.created_at), desc(MedicalReport.id)).limit(self.recent)
+        )).all()
+        self._snapshot = {
+            "total_patients": total_patients,
+            "total_analyses": total_analyses,
+            "patients": [patient_entry(row) for row in patients],
+            "analyses": [dict(row._mapping) for row in analyses],
+        }
+        self._loaded_at = time.monotonic()
+        self._stale = self._version != version
+        self.reloads += 1
+
+    def _change(self) -> bool:
+        """Count a change; False when there is no snapshot to apply it to"""
+        self._version += 1
+        self.updates += 1
+        return self._snapshot is not None
+
+    def invalidate(self):
+        self._version += 1
+        if not self._stale:
+            self.invalidations += 1
+        self._stale = True
+
+    def patient_added(self, patient):
+        if not self._change():
+            return
+        self._snapshot["total_patients"] += 1
+        self._snapshot["patients"] = [patient_entry(patient)] + self._snapshot["patients"][:self.recent - 1]
+
+    def patient_updated(self, patient):
+        if not self._change():
+            return
+        entry = patient_entry(patient)
+        self._snapshot["patients"] = [entry if p["id"] == patient.id else p for p in self._snapshot["patients"]]
+        for analysis in self._snapshot["analyses"]:
+            if analysis["patient_id"] == patient.id:
+                analysis["patient_name"] = patient.name
+
+    def patient_deleted(self, patient_pk: int, analyses: int):
+        """A patient and its analyses were deleted"""
+        if not self._change():
+            return
+        self._snapshot["total_patients"] -= 1
+        self._snapshot["total_analyses"] -= analyses
+        if any(p["id"] == patient_pk for p in self._snapshot["patients"]) or \
+                any(a["patient_id"] == patient_pk for a in self._snapshot["analyses"]):
+            self.invalidate()
+
+    def analyses_added(self, reports: Iterable):
+        """New medical reports (MedicalReport objects with their ids), oldest first"""
+        if not self._change():
+            return
+        names = {p["id"]: p["name"] for p in self._snapshot["patients"]}
+        entries = []
+        for report in reports:
+            self._snapshot["total_analyses"] += 1
+            if report.id is None or report.patient_id not in names:
+                # The patient's name is not at hand
+                self.invalidate()
+            entries.insert(0, {
+                "id": report.id,
+                "patient_id": report.patient_id,
+                "patient_name": names.get(report.patient_id),
+                "diagnosis": report.diagnosis,
+                "confidence": report.confidence,
+            })
+        self._snapshot["analyses"] = (entries + self._snapshot["analyses"])[:self.recent]
+
+    def analyses_bulk_added(self, count: int):
+        """Reports inserted without their ids at hand"""
+        if not self._change():
+            return
+        self._snapshot["total_analyses"] += count
+        self.invalidate()
+
+    def analysis_updated(self, report):
+        if not self._change():
+            return
+        for analysis in self._snapshot["analyses"]:
+            if analysis["id"] == report.id:
+                if analysis["patient_id"] != report.patient_id:
+                    # Moved to another patient, whose name is not at hand
+                    self.invalidate()
+                analysis.update(patient_id=report.patient_id, diagnosis=report.diagnosis, confidence=report.confidence)
+
+    def analysis_deleted(self, analysis_id: int):
+        if not self._change():
+            return
+        self._snapshot["total_analyses"] -= 1
+        if any(a["id"] == analysis_id for a in self._snapshot["analyses"]):
+            self.invalidate()
+
+    def clear(self):
+        self._snapshot = None
+        self._stale = True
+
+    def stats(self) -> Dict:
+        return {
+            "recent": self.recent,
+            "ttl_seconds": self.ttl,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._snapshot is not None else None,
+            "stale": self._stale,
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "updates": self.updates,
+            "invalidations": self.invalidations,
+        }
+
+
+def context_from_env() -> ChatContext:
+    """ChatContext configured by CHAT_CONTEXT_RECENT and CHAT_CONTEXT_TTL_S"""
+    return ChatContext(
+        recent=int(os.getenv("CHAT_CONTEXT_RECENT", "10")),
+        ttl_seconds=float(os.getenv("CHAT_CONTEXT_TTL_S", "60")),
+    )
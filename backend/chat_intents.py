@@ -0,0 +1,89 @@
+"""
+Chatbot intents and their replies.
+
+Each handler registers the keywords of its intent with the router and
+answers from the chat context snapshot (see chat_context.py). Intents are
+tried in the order they are registered here.
+"""
+
+from typing import Dict
+
+from intent_router import IntentRouter, Message
+
+router = IntentRouter()
+
+
+@router.intent("analyses", ["analysis", "analyses", "diagnosis", "report", "reports", "results"])
+def analyses_reply(message: Message, context: Dict) -> str:
+    if message.mentions("how many", "count"):
+        return f"We have performed {context['total_analyses']} medical analysis(es) in our system."
+    if message.mentions("recent", "latest"):
+        if not context['analyses']:
+            return "No medical analyses have been performed yet."
+        analysis = context['analyses'][0]
+        patient_name = analysis['patient_name'] or "Unknown Patient"
+        return f"The most recent analysis was for {patient_name} with a diagnosis of {analysis['diagnosis']} (confidence: {analysis['confidence']}%)."
+    return f"We have completed {context['total_analyses']} medical analysis(es). Our system uses AI-powered liver disease analysis to provide accurate diagnoses and treatment recommendations."
+
+
+@router.intent("patients", ["patient", "patients", "who"])
+def patients_reply(message: Message, context: Dict) -> str:
+    if message.mentions("how many", "count"):
+        response = f"We currently have {context['total_patients']} patient(s) in our system."
+        if context['patients']:
+            patient_names = [p['name'] for p in context['patients'][:3]]
+            response += f" Recent patients include: {', '.join(patient_names)}"
+            if len(context['patients']) > 3:
+                response += f" and {len(context['patients']) - 3} others."
+        return response
+    if message.mentions("list", "show"):
+        if not context['patients']:
+            return "No patients are currently registered in the system."
+        response = "Here are our current patients:\n"
+        for patient in context['patients'][:5]:
+            response += f"• {patient['name']} (ID: {patient['patient_id']})"
+            if patient['department']:
+                response += f" - {patient['department']}"
+            if patient['doctor_name']:
+                response += f" - Dr. {patient['doctor_name']}"
+            response += "\n"
+        return response
+    return f"We have {context['total_patients']} patient(s) in our medical database. I can provide information about specific patients or show you a list of all patients."
+
+
+@router.intent("capabilities", ["system", "capabilities", "features", "what can you do", "help"])
+def capabilities_reply(message: Message, context: Dict) -> str:
+    response = "I am your AI Medical Assistant with access to the healthcare system's database. Here's what I can help you with:\n\n"
+    response += "• **Patient Information**: View patient records, demographics, and medical history\n"
+    response += "• **Medical Analyses**: Access AI-powered liver disease analysis results and confidence scores\n"
+    response += "• **Lab Results**: Review laboratory test results and interpretations\n"
+    response += "• **Appointment Management**: Schedule and manage patient appointments\n"
+    response += "• **Medical Reports**: Generate comprehensive medical reports\n"
+    response += "• **General Medical Information**: Answer questions about medical conditions and health advice\n\n"
+    response += f"I have real-time access to {context['total_patients']} patients and {context['total_analyses']} medical analyses in our system."
+    return response
+
+
+@router.intent("greeting", ["hello", "hi", "hey", "greetings"])
+def greeting_reply(message: Message, context: Dict) -> str:
+    return f"Hello! I'm your AI Medical Assistant. I have access to {context['total_patients']} patients and {context['total_analyses']} medical analyses in our healthcare system. How can I help you today?"
+
+
+@router.intent("medical", ["liver", "disease", "diseases", "medical", "health"])
+def medical_reply(message: Message, context: Dict) -> str:
+    return """Regarding liver health and medical conditions:
+
+• Our system specializes in AI-powered liver disease analysis
+• We analyze liver function tests (ALT, AST, bilirubin, GGT) using machine learning models
+• Recent analyses show we're helping patients with accurate diagnoses and treatment recommendations
+• For specific medical advice, please consult with a healthcare professional
+
+I can provide information about our system's capabilities and current patient data."""
+
+
+@router.fallback
+def fallback_reply(message: Message, context: Dict) -> str:
+    return f"I understand you're asking about: '{message.text}'. As your AI Medical Assistant, I have access to {context['total_patients']} patients and {context['total_analyses']} medical analyses in our healthcare system. I can help you with patient information, medical analyses, system capabilities, or general medical questions. Could you please be more specific about what you'd like to know?"
+
+
+router.compile()
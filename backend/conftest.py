@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+
+# Never let the test run touch the bundled medical_ai.db or a real server database
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "medical_ai_test.db"))
+# Endpoint tests run inference in a thread; test_inference_pool.py covers the process pool
+os.environ.setdefault("INFERENCE_WORKERS", "0")
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import Base, async_database_url, get_async_db
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Fresh SQLite database with the full schema for one test"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_db_engine(db_engine):
+    """Async engine on the per-test database, as the endpoints use it"""
+    # Unpooled: connections are opened in the TestClient's event loop and must not outlive it
+    return create_async_engine(async_database_url(db_engine.url.render_as_string(hide_password=False)), poolclass=NullPool)
+
+
+@pytest.fixture
+def db_session(db_engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def query_log(db_engine, async_db_engine):
+    """(statement, parameters) of the SQL run on the per-test database (sync or async engine) while the test executes"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engines = (db_engine, async_db_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def client(async_db_engine):
+    """TestClient for the FastAPI app wired to the per-test database"""
+    from fastapi.testclient import TestClient
+    from main import app, chat_context, prediction_cache
+
+    TestingSession = async_sessionmaker(async_db_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    prediction_cache.clear()
+    chat_context.clear()
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
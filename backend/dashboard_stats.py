@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Dashboard counts of patients and analyses (GET /stats).
+
+stat_counts holds one row per group of each dimension in DIMENSIONS:
+patients by department, by doctor and by month created, analyses by
+diagnosis and by month created. GET /stats reads that table, so its cost
+depends on the number of groups and not on the number of rows.
+
+The write endpoints keep the counts exact: a write collects its changes
+with tally(), -1 for each row as it was and +1 for each row as it is, and
+adds them with apply() in its own transaction, one upsert per changed
+group. Writes that bypass apply() (manual SQL, a script that does not
+call it) are not counted until the table is rebuilt from the source
+tables, which running this module does:
+
+Usage:
+    python dashboard_stats.py
+"""
+
+import os
+import sys
+from datetime import timezone
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, insert, literal, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import MedicalReport, Patient, StatCount
+
+# Load environment variables
+load_dotenv()
+
+# Table -> (model, {dimension: grouped attribute}); created_at is grouped by UTC month, as YYYY-MM
+DIMENSIONS = {
+    "patients": (Patient, {"department": "department", "doctor_name": "doctor_name", "month": "created_at"}),
+    "analyses": (MedicalReport, {"diagnosis": "diagnosis", "month": "created_at"}),
+}
+
+# (dimension, group key) -> change in its count
+Changes = Dict[Tuple[str, str], int]
+
+
+def month_key(moment) -> str:
+    if moment is None:
+        return ""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m")
+
+
+def _group_key(attribute: str, value) -> str:
+    if attribute == "created_at":
+        return month_key(value)
+    return value if value is not None else ""
+
+
+def tally(changes: Changes, table: str, row, sign: int = 1) -> Changes:
+    """Add sign times row (a model instance or a result row of table) to the changes of each of table's dimensions"""
+    _, dimensions = DIMENSIONS[table]
+    for name, attribute in dimensions.items():
+        key = (f"{table}.{name}", _group_key(attribute, getattr(row, attribute)))
+        changes[key] = changes.get(key, 0) + sign
+    return changes
+
+
+def apply_statement(dialect: str):
+    """Upsert adding each parameter set's count to its group; execute it with apply_parameters() in the write's transaction"""
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = dialect_insert(StatCount)
+    return statement.on_conflict_do_update(
+        index_elements=[StatCount.dimension, StatCount.group_key],
+        set_={"count": StatCount.count + statement.excluded["count"]},
+    )
+
+
+def apply_parameters(changes: Changes):
+    return [
+        {"dimension": dimension, "group_key": group_key, "count": change}
+        for (dimension, group_key), change in sorted(changes.items())
+        if change
+    ]
+
+
+async def apply(db: AsyncSession, changes: Changes):
+    parameters = apply_parameters(changes)
+    if parameters:
+        await db.execute(apply_statement(db.bind.dialect.name), parameters)
+
+
+async def read(db: AsyncSession) -> Dict:
+    """Totals and non-empty groups of every dimension; months oldest first, other groups largest first"""
+    result = {
+        table: {"total": 0, **{f"by_{name}": [] for name in dimensions}}
+        for table, (_, dimensions) in DIMENSIONS.items()
+    }
+    rows = await db.execute(
+        select(StatCount.dimension, StatCount.group_key, StatCount.count).where(StatCount.count > 0)
+    )
+    for dimension, group_key, group_count in rows:
+        table, name = dimension.split(".", 1)
+        groups = result.get(table, {}).get(f"by_{name}")
+        if groups is not None:
+            groups.append({"key": group_key or None, "count": group_count})
+
+    for table, stats in result.items():
+        # Every row falls in exactly one month group
+        stats["total"] = sum(group["count"] for group in stats["by_month"])
+        for name in DIMENSIONS[table][1]:
+            if name == "month":
+                stats["by_month"].sort(key=lambda group: group["key"] or "")
+            else:
+                stats[f"by_{name}"].sort(key=lambda group: (-group["count"], group["key"] or ""))
+    return result
+
+
+def _month_sql(column, dialect: str):
+    if dialect == "postgresql":
+        return func.to_char(func.timezone("UTC", column), "YYYY-MM")
+    # SQLite stores the datetimes as naive UTC text
+    return func.strftime("%Y-%m", column)
+
+
+def rebuild(engine: Engine) -> Dict[str, int]:
+    """Recount stat_counts from patients and medical_reports in one transaction; returns the groups per dimension"""
+    groups = {}
+    with engine.begin() as connection:
+        dialect = connection.dialect.name
+        if dialect == "postgresql":
+            # Writers block on their upsert until the recount commits, so none is counted twice or lost
+            connection.execute(text("LOCK TABLE stat_counts IN EXCLUSIVE MODE"))
+        connection.execute(delete(StatCount))
+        for table, (model, dimensions) in DIMENSIONS.items():
+            for name, attribute in dimensions.items():
+                column = getattr(model, attribute)
+                key = func.coalesce(_month_sql(column, dialect) if attribute == "created_at" else column, "")
+                dimension = f"{table}.{name}"
+                # Grouped by position: Postgres does not match the key's bound parameters to a GROUP BY copy
+                counted = select(literal(dimension), key, func.count()).group_by(literal_column("2"))
+                result = connection.execute(insert(StatCount).from_select(["dimension", "group_key", "count"], counted))
+                groups[dimension] = result.rowcount
+    return groups
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    for dimension, group_count in rebuild(engine).items():
+        print(f"{dimension}: {group_count} groups")
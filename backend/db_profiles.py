@@ -0,0 +1,145 @@
+"""
+Deployment profiles for the database engines.
+
+DB_PROFILE picks how database.py configures its engines: "sqlite" (WAL
+journal, synchronous=NORMAL, memory-mapped reads, a larger page cache and a
+busy timeout on every connection, plus a sized pool), "postgres" (sized
+QueuePool, server-side statement timeout, prepared statement cache) or
+"none" (SQLAlchemy defaults). The default, "auto", follows the backend of
+DATABASE_URL. Every setting can be overridden by its environment variable.
+
+At startup self_check reads the settings back from a live connection and
+logs them, so a profile that did not take effect (e.g. WAL on a filesystem
+that cannot do it) shows up in the log and in GET /metrics.
+"""
+
+import os
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+DB_PROFILES = ("auto", "sqlite", "postgres", "none")
+
+# Backend each profile is written for
+_PROFILE_BACKENDS = {"sqlite": "sqlite", "postgres": "postgresql"}
+
+# PRAGMAs the sqlite profile sets, in the order they are applied
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout")
+
+
+def profile_name(url: str, requested: str = None) -> str:
+    """Profile for DATABASE_URL url: DB_PROFILE (or requested), with "auto" resolved by the url's backend"""
+    requested = (requested or os.getenv("DB_PROFILE", "auto")).lower()
+    if requested not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {requested!r}; expected one of {', '.join(DB_PROFILES)}")
+    backend = make_url(url).get_backend_name()
+    if requested == "auto":
+        return next((name for name, profile_backend in _PROFILE_BACKENDS.items() if profile_backend == backend), "none")
+    if requested != "none" and _PROFILE_BACKENDS[requested] != backend:
+        raise ValueError(f"DB_PROFILE={requested} does not fit a {backend} DATABASE_URL")
+    return requested
+
+
+def sqlite_settings_from_env() -> Dict:
+    """PRAGMA values of the sqlite profile"""
+    return {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "wal"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "normal"),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Per connection; negative values are KiB rather than pages
+        "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(32 * 1024))),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    }
+
+
+def pool_settings_from_env(profile: str) -> Dict:
+    """QueuePool sizing; SQLite serializes writers anyway, so its pool is smaller"""
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5" if profile == "sqlite" else "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5" if profile == "sqlite" else "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT_S", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_S", "1800")),
+    }
+
+
+def postgres_settings_from_env() -> Dict:
+    return {
+        "statement_timeout_ms": int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "30000")),
+        "prepared_statement_cache_size": int(os.getenv("PG_PREPARED_STATEMENT_CACHE_SIZE", "256")),
+    }
+
+
+def _is_memory_database(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(profile: str, url: str) -> Dict:
+    """Keyword arguments for create_engine / create_async_engine of url under profile"""
+    options = {"pool_pre_ping": True}
+    parsed = make_url(url)
+    if profile == "none" or _is_memory_database(parsed):
+        return options
+
+    options.update(pool_settings_from_env(profile))
+    if profile == "postgres":
+        settings = postgres_settings_from_env()
+        driver = parsed.get_driver_name()
+        if driver == "asyncpg":
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(settings["statement_timeout_ms"])},
+                "prepared_statement_cache_size": settings["prepared_statement_cache_size"],
+            }
+        else:
+            connect_args = {"options": f"-c statement_timeout={settings['statement_timeout_ms']}"}
+            if driver == "psycopg":
+                # psycopg 3 prepares a statement server-side once it has run this many times
+                connect_args["prepare_threshold"] = 2
+            options["connect_args"] = connect_args
+        # SQLAlchemy's compiled statement cache, shared by all connections of the engine
+        options["query_cache_size"] = max(500, settings["prepared_statement_cache_size"])
+    return options
+
+
+def configure_engine(engine: Engine, profile: str):
+    """Apply the per-connection part of profile to every new connection of engine (use AsyncEngine.sync_engine)"""
+    if profile != "sqlite" or _is_memory_database(engine.url):
+        return
+    pragmas = sqlite_settings_from_env()
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={pragmas[name]}")
+        cursor.close()
+
+
+def self_check(connection: Connection, profile: str) -> Dict:
+    """Effective settings read back from a live connection; logged and returned"""
+    settings = {"profile": profile, "backend": connection.dialect.name}
+    pool = connection.engine.pool
+    if hasattr(pool, "size"):
+        settings["pool_size"] = pool.size()
+        settings["max_overflow"] = getattr(pool, "_max_overflow", None)
+
+    if connection.dialect.name == "sqlite":
+        for name in SQLITE_PRAGMAS:
+            settings[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    elif connection.dialect.name == "postgresql":
+        settings["server_version"] = connection.exec_driver_sql("SHOW server_version").scalar()
+        settings["statement_timeout"] = connection.exec_driver_sql("SHOW statement_timeout").scalar()
+        settings["max_connections"] = int(connection.exec_driver_sql("SHOW max_connections").scalar())
+
+    print("Database profile " + ", ".join(f"{key}={value}" for key, value in settings.items()))
+    if profile == "sqlite" and not _is_memory_database(connection.engine.url):
+        wanted = sqlite_settings_from_env()["journal_mode"].lower()
+        if str(settings["journal_mode"]).lower() != wanted:
+            print(f"Warning: SQLite journal_mode is {settings['journal_mode']}, profile asked for {wanted}")
+    return settings
+
+
+async def self_check_async(engine: AsyncEngine, profile: str) -> Dict:
+    async with engine.connect() as connection:
+        return await connection.run_sync(self_check, profile)
@@ -0,0 +1,83 @@
+"""
+Streaming table exports as NDJSON or CSV.
+
+Rows are read in id order through a server-side cursor, converted to dicts
+a chunk at a time by the row serializer of the table's list endpoint, and
+handed to the response as they are encoded, so memory use depends on the
+chunk size and not on the size of the table. Every row
+carries its id; a download that broke off resumes with after_id set to the
+last id received.
+"""
+
+import csv
+import io
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, Dict, List, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from row_json import dumps
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def encode_ndjson(rows: List[Dict]) -> str:
+    return "".join(dumps(row).decode() + "\n" for row in rows)
+
+
+def _csv_value(value):
+    # The same ISO 8601 text as the JSON formats, not str()'s space-separated datetimes
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _csv_lines(lines) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(lines)
+    return buffer.getvalue()
+
+
+def csv_header(keys: Sequence[str]) -> str:
+    return _csv_lines([keys])
+
+
+def encode_csv(rows: List[Dict]) -> str:
+    # Serializer dicts keep their keys in header order
+    return _csv_lines([_csv_value(value) for value in row.values()] for row in rows)
+
+
+# Format -> (rows encoder, header encoder or None for formats without one)
+ENCODERS = {
+    "ndjson": (encode_ndjson, None),
+    "csv": (encode_csv, csv_header),
+}
+
+
+async def iter_export(engine: AsyncEngine, statement, id_column, keys: Sequence[str], serialize: Callable, fmt: str,
+                      after_id: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """
+    Encoded chunks of the rows of statement whose id is greater than after_id
+
+    Args:
+        engine: Database to read from; the export holds its own connection
+            for as long as the response streams
+        statement: select() of the exported columns, without ordering
+        id_column: Column the export is ordered and resumed on
+        keys: Keys of the dicts serialize returns, in order; the CSV header,
+            which is written even when no row is exported
+        serialize: Turns a list of result rows into dicts (the list endpoints' row format)
+        fmt: Key of ENCODERS
+    """
+    encode, encode_header = ENCODERS[fmt]
+    if encode_header is not None:
+        yield encode_header(keys)
+    statement = statement.where(id_column > after_id).order_by(id_column)
+    async with engine.connect() as connection:
+        result = await connection.stream(statement.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield encode(serialize(partition))
@@ -0,0 +1,118 @@
+"""
+Inference backends for the fitted cascade models.
+
+"sklearn" uses the unpickled estimators as they are. "compiled" exports each
+RandomForestClassifier to flat numpy arrays (all trees' nodes concatenated)
+and evaluates every tree for every row with a few vectorized gathers per tree
+level, skipping sklearn's per-call validation and joblib dispatch.
+Predictions are identical: inputs go through the same float32 conversion,
+leaf probabilities are summed in tree order and averaged exactly
+as RandomForestClassifier.predict_proba does.
+"""
+
+import re
+from typing import List
+
+import numpy as np
+import sklearn
+
+BACKENDS = ("sklearn", "compiled")
+
+# Since sklearn 1.4 classifier trees store class fractions in tree_.value and
+# predict_proba returns them as they are; older versions stored counts and
+# normalized them per row
+_NORMALIZE_LEAF_VALUES = tuple(int(part) for part in re.match(r"(\d+)\.(\d+)", sklearn.__version__).groups()) < (1, 4)
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into numpy arrays
+
+    Leaf nodes point to themselves, so walking max_depth levels from the
+    roots leaves every (tree, row) pair on its leaf.
+    """
+
+    def __init__(self, estimator):
+        if getattr(estimator, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        trees = [tree.tree_ for tree in estimator.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+
+        left, right, feature, threshold, proba = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            # Per-node class probabilities as DecisionTreeClassifier.predict_proba returns them
+            values = tree.value[:, 0, :estimator.n_classes_].copy()
+            if _NORMALIZE_LEAF_VALUES:
+                normalizer = values.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                values /= normalizer
+            proba.append(values)
+
+        self.classes_ = estimator.classes_
+        self.n_features_in_ = estimator.n_features_in_
+        self.feature_names_in_ = getattr(estimator, "feature_names_in_", None)
+        self.n_estimators = len(trees)
+        self.max_depth = max(tree.max_depth for tree in trees)
+        self.roots = offsets.astype(np.intp)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.proba = np.concatenate(proba)
+
+    def _validate(self, X) -> np.ndarray:
+        columns = getattr(X, "columns", None)
+        if columns is not None and self.feature_names_in_ is not None and list(columns) != list(self.feature_names_in_):
+            raise ValueError("The feature names should match those that were passed during fit.")
+        # Trees compare float32 features against float64 thresholds, like sklearn's Tree
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model is expecting {self.n_features_in_} features as input.")
+        return X
+
+    def leaves(self, X) -> np.ndarray:
+        """Leaf node index of every (tree, row) pair, shape (n_estimators, n_rows)"""
+        X = self._validate(X)
+        rows = np.arange(X.shape[0])
+        nodes = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            goes_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(goes_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaf_proba = self.proba[self.leaves(X)]
+        total = np.zeros(leaf_proba.shape[1:], dtype=np.float64)
+        for tree_proba in leaf_proba:
+            total += tree_proba
+        total /= self.n_estimators
+        return total
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def make_backend(estimator, backend: str):
+    """Wrap a loaded estimator for the requested backend"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend == "compiled":
+        return CompiledForest(estimator)
+    return estimator
+
+
+def make_backends(estimators: List, backend: str) -> List:
+    """Wrap every estimator, falling back to sklearn for all of them if one cannot be compiled"""
+    try:
+        return [make_backend(estimator, backend) for estimator in estimators]
+    except (AttributeError, ValueError) as e:
+        if backend == "sklearn":
+            raise
+        print(f"Inference backend {backend!r} unavailable ({e}); using sklearn")
+        return list(estimators)
@@ -0,0 +1,140 @@
+"""
+Process pool that runs model inference off the FastAPI event loop.
+
+Each worker process loads the three joblib models once, when it starts, and
+then serves predict calls. Every result comes back with the fingerprint of
+the models that computed it, so the API process keys cached predictions on
+the models the workers actually hold, including after a restart. The number of jobs waiting for or running in the
+pool is bounded; a dead worker is replaced and its job retried once.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict
+
+
+class InferenceUnavailable(Exception):
+    """Raised when the pool cannot accept or complete an inference job"""
+
+
+def _init_worker():
+    """Load the models once in each fresh worker process"""
+    import model
+    model.warm_up()
+    mode = "ML models" if model.model_global is not None else "rule-based prediction"
+    print(f"Inference worker {os.getpid()} ready ({mode})")
+
+
+def _with_fingerprint(call):
+    """Run call where the models live; returns (fingerprint of the loaded models, result)"""
+    import model
+    result = call()
+    return model.MODEL_FINGERPRINT, result
+
+
+class InferencePool:
+    """
+    Bounded process pool for predict_liver_disease calls
+
+    Args:
+        workers: Number of worker processes; 0 runs inference in a thread of the
+                 API process instead (still off the event loop)
+        queue_depth: Maximum number of jobs queued or running at once; further
+                     jobs are rejected with InferenceUnavailable
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = None
+        # Fingerprint of the models the workers last reported; None until a job completes after a (re)start
+        self.fingerprint = None
+
+        # Metrics
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    def start(self):
+        if self.workers > 0 and self._executor is None:
+            self._executor = self._new_executor()
+            print(f"Inference pool started with {self.workers} worker process(es)")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: workers never inherit the API process's threads or open connections
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        # Jobs that were queued on the broken pool all fail together; only the first replaces it
+        if self._executor is not broken:
+            return
+        print("Inference worker died; restarting the inference pool")
+        self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_executor()
+        # The new workers load the model files as they are now
+        self.fingerprint = None
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the pool and return its result"""
+        if self.pending >= self.queue_depth:
+            self.rejected += 1
+            raise InferenceUnavailable(f"Inference queue is full ({self.queue_depth} jobs)")
+
+        self.pending += 1
+        try:
+            call = functools.partial(_with_fingerprint, functools.partial(fn, *args, **kwargs))
+            if self.workers <= 0:
+                fingerprint, result = await asyncio.to_thread(call)
+            else:
+                self.start()
+                fingerprint, result = await self._run_in_pool(call)
+            if fingerprint is not None:
+                self.fingerprint = fingerprint
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    async def _run_in_pool(self, call):
+        loop = asyncio.get_running_loop()
+        for _ in range(2):
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(executor, call)
+            except BrokenProcessPool:
+                self._restart(executor)
+        raise InferenceUnavailable("Inference worker died while processing the request")
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "model_fingerprint": self.fingerprint,
+        }
+
+
+def pool_from_env() -> InferencePool:
+    """InferencePool configured by INFERENCE_WORKERS and INFERENCE_QUEUE_DEPTH"""
+    return InferencePool(
+        workers=int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        queue_depth=int(os.getenv("INFERENCE_QUEUE_DEPTH", "32")),
+    )
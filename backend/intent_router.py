@@ -0,0 +1,147 @@
+"""
+Keyword intent routing for the chatbot.
+
+Handlers register the words and phrases of their intent. On first use the
+router compiles all of them into one table from words (and from the first
+word of each phrase) to the intent that owns them, so classifying a message
+is one pass over its tokens with a few dictionary lookups per token. That cost
+depends on the length of the message, not on how many intents or keywords
+are registered. When a message matches several intents, the one registered
+first wins, as the order of an if/elif chain would decide.
+
+Keywords match whole words and, for single words of at least four letters,
+their inflected forms: "health" matches "healthy" and "report" matches
+"reports", but "hi" matches neither "this" nor "history". Phrases match
+their exact words.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+# Endings a token may add to a keyword and still match it; shorter keywords
+# ("hi", "who") only match themselves, so "his" is not a greeting
+_SUFFIXES = ("s", "es", "'s", "y", "ly", "ed", "er", "ers", "ing")
+_MIN_STEM = 4
+# Endings by their last letter, so most tokens are ruled out with one lookup
+_ENDINGS: Dict[str, List[str]] = {}
+for _suffix in _SUFFIXES:
+    _ENDINGS.setdefault(_suffix[-1], []).append(_suffix)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def stems(token: str) -> List[str]:
+    """Keywords the token is an inflected form of, by stripping each known ending"""
+    if len(token) <= _MIN_STEM or token[-1] not in _ENDINGS:
+        return []
+    return [token[:-len(suffix)] for suffix in _ENDINGS[token[-1]]
+            if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM]
+
+
+class Message:
+    """A chat message and its tokens, as handlers receive it"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self._padded = " " + " ".join(self.tokens) + " "
+        self._words: Optional[set] = None
+
+    def mentions(self, *terms: str) -> bool:
+        """True when any of the words (or their inflected forms) or phrases occurs in the message"""
+        if self._words is None:
+            self._words = set(self.tokens).union(*(stems(token) for token in self.tokens))
+        for term in terms:
+            words = tokenize(term)
+            if len(words) == 1 and words[0] in self._words or " " + " ".join(words) + " " in self._padded:
+                return True
+        return False
+
+
+class IntentRouter:
+    """Dispatch messages to the handler of the first registered intent whose keywords they contain"""
+
+    def __init__(self):
+        self._intents: List[Tuple[str, Callable]] = []
+        self._keywords: List[Tuple[Tuple[str, ...], int]] = []
+        self._fallback: Optional[Callable] = None
+        # Compiled: intent of each word, and the phrases starting with a word
+        self._words: Optional[Dict[str, int]] = None
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+
+    def intent(self, name: str, keywords: Iterable[str]):
+        """Decorator registering a handler for messages containing any of keywords (words or phrases)"""
+        def register(handler: Callable) -> Callable:
+            priority = len(self._intents)
+            self._intents.append((name, handler))
+            for keyword in keywords:
+                ngram = tuple(tokenize(keyword))
+                if not ngram:
+                    raise ValueError(f"Intent {name!r} has a keyword without words: {keyword!r}")
+                self._keywords.append((ngram, priority))
+            self._words = None
+            return handler
+        return register
+
+    def fallback(self, handler: Callable) -> Callable:
+        """Decorator registering the handler for messages no intent matches"""
+        self._fallback = handler
+        return handler
+
+    @property
+    def intents(self) -> List[str]:
+        return [name for name, _ in self._intents]
+
+    def keywords(self) -> Dict[str, List[str]]:
+        """Keywords of every intent, in registration order"""
+        registered = {name: [] for name, _ in self._intents}
+        for ngram, priority in self._keywords:
+            registered[self._intents[priority][0]].append(" ".join(ngram))
+        return registered
+
+    def compile(self):
+        words, phrases = {}, {}
+        for ngram, priority in self._keywords:
+            if len(ngram) == 1:
+                # A keyword shared by two intents belongs to the earlier one
+                words[ngram[0]] = min(priority, words.get(ngram[0], priority))
+            else:
+                phrases.setdefault(ngram[0], []).append((ngram[1:], priority))
+        self._words, self._phrases = words, phrases
+
+    def classify(self, message: Message) -> Optional[str]:
+        """Name of the intent the message is routed to, or None for the fallback"""
+        priority = self._match(message.tokens)
+        return None if priority is None else self._intents[priority][0]
+
+    def _match(self, tokens: List[str]) -> Optional[int]:
+        if self._words is None:
+            self.compile()
+        words, phrases = self._words, self._phrases
+        best = None
+        for i, token in enumerate(tokens):
+            priority = words.get(token)
+            if priority is not None and (best is None or priority < best):
+                best = priority
+            for stem in stems(token):
+                priority = words.get(stem)
+                if priority is not None and (best is None or priority < best):
+                    best = priority
+            if token in phrases:
+                for rest, priority in phrases[token]:
+                    if (best is None or priority < best) and tuple(tokens[i + 1:i + 1 + len(rest)]) == rest:
+                        best = priority
+        return best
+
+    def dispatch(self, text: str, *args):
+        """Result of the handler the message is routed to, called with the Message and args"""
+        message = Message(text)
+        priority = self._match(message.tokens)
+        handler = self._fallback if priority is None else self._intents[priority][1]
+        if handler is None:
+            raise LookupError(f"No intent matches {text!r} and no fallback is registered")
+        return handler(message, *args)
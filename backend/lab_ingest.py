@@ -0,0 +1,228 @@
+"""
+Bulk ingestion of lab results from CSV or NDJSON uploads.
+
+The request body is parsed as it arrives: complete records are split off
+each received block, turned into LabTest rows and collected into chunks.
+A CSV record ends at a newline outside quotes, so a quoted field may span
+lines. Each chunk resolves its patients.patient_id strings to primary keys
+with a single query and is written with one insert(LabTest) executemany,
+which SQLAlchemy sends as multi-row INSERTs (insertmanyvalues). A record
+that cannot be parsed or names an unknown patient is reported with its row
+number and skipped; the rest of the upload still goes in.
+
+Fields (CSV header or NDJSON keys): patient_id (the patients.patient_id
+string), test_name, value, unit, normal_range, status (one of
+LAB_TEST_STATUSES), date (ISO 8601).
+The camelCase names GET /lab-tests returns (testName, normalRange) are
+accepted too.
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import LAB_TEST_STATUSES, LabTest, Patient
+from table_versions import bump as bump_versions
+
+INGEST_CHUNK_ROWS = 10000
+# Errors listed in the response; the count covers all of them
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("csv", "ndjson")
+
+FIELD_ALIASES = {"testName": "test_name", "normalRange": "normal_range", "patientId": "patient_id"}
+# Fields of a record, in the order of the parsed row tuples
+FIELDS = ("patient_id", "test_name", "value", "unit", "normal_range", "status", "date")
+_VALUE, _STATUS, _DATE = FIELDS.index("value"), FIELDS.index("status"), FIELDS.index("date")
+
+
+def _split_records(text: str, quoted: bool) -> Tuple[List[str], str]:
+    """
+    Complete records of text and the incomplete rest
+
+    A record ends at a newline; with quoted (CSV), only at one outside a
+    quoted field, i.e. after an even number of quote characters, "" (an
+    escaped quote) counting twice.
+    """
+    lines = text.split("\n")
+    pending = lines.pop()
+    if not quoted:
+        return lines, pending
+    records, record = [], []
+    quotes = 0
+    for line in lines:
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            records.append("\n".join(record))
+            record, quotes = [], 0
+    if record:
+        pending = "\n".join(record + [pending])
+    return records, pending
+
+
+async def iter_record_batches(blocks: AsyncIterator[bytes], quoted: bool = False) -> AsyncIterator[List[str]]:
+    """Complete, non-empty records of a UTF-8 byte stream, one list per received block"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for block in blocks:
+        records, pending = _split_records(pending + decoder.decode(block), quoted)
+        batch = [record for record in records if record.strip()]
+        if batch:
+            yield batch
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield [pending]
+
+
+def parse_values(values: Sequence[str]) -> List:
+    """
+    Row (in FIELDS order) of one record's raw text values, also in FIELDS order
+
+    patient_id is still the patients.patient_id string. Raises ValueError
+    naming the first problem.
+    """
+    row = [value.strip() for value in values]
+    if "" in row:
+        raise ValueError(f"missing {', '.join(field for field, value in zip(FIELDS, row) if not value)}")
+    try:
+        row[_VALUE] = float(row[_VALUE])
+    except ValueError:
+        raise ValueError(f"value {values[_VALUE]!r} is not a number")
+    row[_STATUS] = row[_STATUS].lower()
+    if row[_STATUS] not in LAB_TEST_STATUSES:
+        raise ValueError(f"status {values[_STATUS]!r} is not one of {', '.join(LAB_TEST_STATUSES)}")
+    try:
+        row[_DATE] = datetime.fromisoformat(row[_DATE])
+    except ValueError:
+        raise ValueError(f"date {values[_DATE]!r} is not an ISO 8601 date")
+    return row
+
+
+def csv_positions(header: List[str]) -> List[int]:
+    """Column index of every field in a CSV header; raises ValueError for missing columns"""
+    index = {FIELD_ALIASES.get(name.strip(), name.strip()): i for i, name in enumerate(header)}
+    missing = [field for field in FIELDS if field not in index]
+    if missing:
+        raise ValueError(f"CSV header lacks {', '.join(missing)}")
+    return [index[field] for field in FIELDS]
+
+
+def _json_values(line: str) -> List[str]:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    record = {FIELD_ALIASES.get(key, key): value for key, value in record.items()}
+    return ["" if record.get(field) is None else str(record[field]) for field in FIELDS]
+
+
+async def iter_parsed(blocks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[List[Tuple[int, object]]]:
+    """
+    (row number, parsed row tuple or ValueError) per record, one list per received block
+
+    Rows count from 1, not counting a CSV header. A CSV header that lacks a
+    field raises ValueError before any row is parsed.
+    """
+    positions = None
+    row_number = 0
+    async for records in iter_record_batches(blocks, quoted=fmt == "csv"):
+        if fmt == "csv":
+            rows = csv.reader(records)
+            if positions is None:
+                positions = csv_positions(next(rows))
+                width = max(positions) + 1
+        parsed = []
+        for record in (rows if fmt == "csv" else records):
+            row_number += 1
+            try:
+                if fmt == "csv":
+                    if len(record) < width:
+                        raise ValueError(f"expected {width} fields, got {len(record)}")
+                    values = [record[position] for position in positions]
+                else:
+                    values = _json_values(record)
+                parsed.append((row_number, tuple(parse_values(values))))
+            except (ValueError, csv.Error) as e:
+                parsed.append((row_number, e))
+        yield parsed
+
+
+class _Errors:
+    """Failed row count, plus the first MAX_REPORTED_ERRORS of them in detail"""
+
+    def __init__(self):
+        self.count = 0
+        self.listed = []
+
+    def add(self, row_number: int, message: str):
+        self.count += 1
+        if len(self.listed) < MAX_REPORTED_ERRORS:
+            self.listed.append({"row": row_number, "error": message})
+
+
+async def _write_chunk(db: AsyncSession, chunk: List[Tuple[int, Tuple]], errors: _Errors) -> int:
+    """Resolve the chunk's patients in one query and insert its rows; returns rows inserted"""
+    patient_ids = {row[0] for _, row in chunk}
+    found = dict((await db.execute(select(Patient.patient_id, Patient.id).where(Patient.patient_id.in_(patient_ids)))).all())
+    rows = []
+    for row_number, row in chunk:
+        pk = found.get(row[0])
+        if pk is None:
+            errors.add(row_number, f"unknown patient_id {row[0]!r}")
+            continue
+        rows.append(dict(zip(FIELDS, (pk,) + row[1:])))
+    if rows:
+        await db.execute(insert(LabTest), rows)
+        await bump_versions(db, "lab_tests")
+        await db.commit()
+    return len(rows)
+
+
+async def ingest(db: AsyncSession, blocks: AsyncIterator[bytes], fmt: str, chunk_rows: int = None) -> Dict:
+    """
+    Insert the lab results of an upload
+
+    Every chunk of chunk_rows valid rows is committed on its own, so an
+    upload that breaks off keeps the rows of its completed chunks.
+
+    Returns:
+        Counters (rows, inserted, failed) and the first MAX_REPORTED_ERRORS errors
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    chunk_rows = chunk_rows or INGEST_CHUNK_ROWS
+    errors, chunk = _Errors(), []
+    stats = {"rows": 0, "inserted": 0}
+    # Write of the previous chunk; it runs while the next chunk is parsed
+    writing = None
+    try:
+        async for parsed in iter_parsed(blocks, fmt):
+            stats["rows"] += len(parsed)
+            for row_number, row in parsed:
+                if isinstance(row, ValueError):
+                    errors.add(row_number, str(row))
+                else:
+                    chunk.append((row_number, row))
+            if len(chunk) >= chunk_rows:
+                if writing is not None:
+                    stats["inserted"] += await writing
+                writing = asyncio.ensure_future(_write_chunk(db, chunk, errors))
+                chunk = []
+        if writing is not None:
+            stats["inserted"] += await writing
+        if chunk:
+            stats["inserted"] += await _write_chunk(db, chunk, errors)
+    finally:
+        # A failed parse (e.g. the client went away) still lets the chunk being written finish
+        if writing is not None and not writing.done():
+            await asyncio.gather(writing, return_exceptions=True)
+
+    stats["failed"] = errors.count
+    stats["errors"] = sorted(errors.listed, key=lambda error: error["row"])
+    return stats
@@ -0,0 +1,154 @@
+"""
+Lab result trends for charting (GET /patients/{patient_id}/lab-trends).
+
+A patient's results of each requested test over a date range come back as
+at most `points` chart points, however many years of results there are,
+plus aggregates over all the results in the range: count, last, min, max,
+mean and the least-squares slope in value units per year.
+
+Downsampling is Largest-Triangle-Three-Buckets: the first and last results
+are kept, the rest are split into points - 2 buckets of consecutive
+results, and each bucket keeps the result that forms the largest triangle
+with the point kept before it and the mean of the next bucket. Unlike
+averaging buckets, it keeps the real values at the spikes and dips a
+clinician looks for. The work per bucket is vectorized when numpy is
+available.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import LabTest
+from pagination import at_or_after, at_or_before
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_TREND_TESTS = ("ALT", "AST", "Bilirubin", "GGT")
+MAX_TREND_TESTS = 10
+DEFAULT_TREND_POINTS = 200
+MAX_TREND_POINTS = 1000
+
+_EPOCH = datetime(1970, 1, 1)
+_DAYS_PER_YEAR = 365.25
+
+
+def parse_tests(tests: Optional[str]) -> List[str]:
+    """Test names of a comma-separated ?tests= value, DEFAULT_TREND_TESTS when absent"""
+    if tests is None:
+        return list(DEFAULT_TREND_TESTS)
+    names = list(dict.fromkeys(name.strip() for name in tests.split(",") if name.strip()))
+    if not names:
+        raise ValueError("tests lists no test names")
+    if len(names) > MAX_TREND_TESTS:
+        raise ValueError(f"At most {MAX_TREND_TESTS} tests per request")
+    return names
+
+
+def _days(moment: datetime) -> float:
+    """Days since 1970-01-01 UTC; naive datetimes are UTC, as the database stores them"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH).total_seconds() / 86400
+
+
+def lttb(x: Sequence[float], y: Sequence[float], points: int) -> List[int]:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps of the series (x ascending)"""
+    n = len(x)
+    if points >= n or points < 3:
+        return list(range(n))
+    if NUMPY_AVAILABLE:
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    buckets = points - 2
+    kept, a = [0], 0
+    for i in range(buckets):
+        # Bucket i holds results [start, end) of 1 .. n-2; the last bucket's neighbour is the final result
+        start, end = 1 + i * (n - 2) // buckets, 1 + (i + 1) * (n - 2) // buckets
+        next_end = 1 + (i + 2) * (n - 2) // buckets if i + 1 < buckets else n
+        ax, ay = x[a], y[a]
+        if NUMPY_AVAILABLE:
+            cx, cy = x[end:next_end].mean(), y[end:next_end].mean()
+            areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+            a = start + int(areas.argmax())
+        else:
+            cx, cy = sum(x[end:next_end]) / (next_end - end), sum(y[end:next_end]) / (next_end - end)
+            a = max(range(start, end), key=lambda j: abs((ax - cx) * (y[j] - ay) - (ax - x[j]) * (cy - ay)))
+        kept.append(a)
+    kept.append(n - 1)
+    return kept
+
+
+def _slope_per_year(x: Sequence[float], y: Sequence[float]) -> Optional[float]:
+    """Least-squares slope of y over x (days), per year; None without two distinct dates"""
+    if NUMPY_AVAILABLE:
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        dx = x - x.mean()
+        spread = float((dx * dx).sum())
+        covariance = float((dx * (y - y.mean())).sum())
+    else:
+        mean_x, mean_y = sum(x) / len(x), sum(y) / len(y)
+        spread = sum((xi - mean_x) ** 2 for xi in x)
+        covariance = sum((xi - mean_x) * (yi - mean_y) for xi, yi in zip(x, y))
+    if spread == 0:
+        return None
+    return covariance / spread * _DAYS_PER_YEAR
+
+
+def summarize(dates: List[datetime], values: List[float], unit: str, points: int) -> Dict:
+    """Chart points and aggregates of one test's results, oldest first; unit is that of the latest"""
+    x = [_days(moment) for moment in dates]
+    if NUMPY_AVAILABLE:
+        array = np.asarray(values, dtype=np.float64)
+        low, high, mean = float(array.min()), float(array.max()), float(array.mean())
+    else:
+        low, high, mean = min(values), max(values), sum(values) / len(values)
+    return {
+        "unit": unit,
+        "count": len(values),
+        "last": {"date": dates[-1], "value": values[-1]},
+        "min": low,
+        "max": high,
+        "mean": mean,
+        "slope_per_year": _slope_per_year(x, values),
+        "points": [{"date": dates[i], "value": values[i]} for i in lttb(x, values, points)],
+    }
+
+
+async def lab_trends(
+    db: AsyncSession,
+    patient_pk: int,
+    tests: List[str],
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    points: int = DEFAULT_TREND_POINTS,
+) -> Dict[str, Optional[Dict]]:
+    """summarize() of each of tests for the patient within the dates; None for a test without results"""
+    dialect = db.bind.dialect.name
+    # One pass over the patient's (patient_id, date, id) index, oldest first
+    query = (
+        select(LabTest.test_name, LabTest.date, LabTest.value, LabTest.unit)
+        .where(LabTest.patient_id == patient_pk, LabTest.test_name.in_(tests))
+        .order_by(LabTest.date, LabTest.id)
+    )
+    if date_from:
+        query = query.where(at_or_after(LabTest.date, date_from, dialect))
+    if date_to:
+        query = query.where(at_or_before(LabTest.date, date_to, dialect))
+
+    series = {name: ([], []) for name in tests}
+    units = {}
+    for name, moment, value, unit in (await db.execute(query)).all():
+        dates, values = series[name]
+        dates.append(moment)
+        values.append(value)
+        units[name] = unit
+    return {
+        name: summarize(dates, values, units[name], points) if dates else None
+        for name, (dates, values) in series.items()
+    }
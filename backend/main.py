@@ -1,21 +1,38 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 from typing import Optional, List
 import json
 import requests
-from datetime import datetime
+from datetime import date, datetime
 
 # Load environment variables
 load_dotenv()
 
-from model import predict_liver_disease
-from database import get_db, engine, Base
+from model import model_fingerprint, model_stats, predict_liver_disease, predict_liver_disease_batch, warm_up
+from batching import batcher_from_env
+from prediction_cache import cache_from_env, canonical_panel
+from chat_context import context_from_env
+from chat_intents import router as chat_router
+from inference_pool import InferenceUnavailable, pool_from_env
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, at_or_after, at_or_before, keyset_page
+from export import DEFAULT_CHUNK_SIZE, ENCODERS, MAX_CHUNK_SIZE, MEDIA_TYPES, iter_export
+from patient_search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_patients
+from lab_trends import DEFAULT_TREND_POINTS, MAX_TREND_POINTS, lab_trends, parse_tests
+from lab_ingest import FORMATS as INGEST_FORMATS, ingest as ingest_lab_results
+from table_versions import bump as bump_versions, conditional_get_from_env
+from dashboard_stats import apply as apply_stats, read as read_stats, tally
+from patient_age import age_on, birth_date_range, parse_birth_date
+from row_json import JSON_MEDIA_TYPE, RowSerializer, dumps
+from database import DB_PROFILE, get_async_db, async_engine, engine, Base
+from db_profiles import self_check_async
 from models import Patient, LabTest, MedicalReport, User
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import desc, insert, select
 
 print(f"DATABASE_URL: {os.getenv('DATABASE_URL')}")
 
@@ -72,15 +89,106 @@ class PatientResponse(BaseModel):
 # Initialize Hugging Face API
 HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
 
+# Upper bound on the number of panels accepted by one /analyze/batch request
+ANALYZE_BATCH_MAX_PANELS = int(os.getenv("ANALYZE_BATCH_MAX_PANELS", "10000"))
+
+# Model inference runs in worker processes so it never blocks the event loop
+inference_pool = pool_from_env()
+
+# Concurrent single-panel /analyze calls are scored together by the micro-batcher, one batch per worker at a time
+ANALYZE_MICROBATCH = os.getenv("ANALYZE_MICROBATCH", "1") == "1"
+analyze_batcher = batcher_from_env(lambda panels: inference_pool.run(predict_liver_disease_batch, panels),
+                                   max_in_flight=inference_pool.workers)
+
+def serving_fingerprint() -> str:
+    """Fingerprint of the models the inference workers last reported, or of the model files before any has"""
+    return inference_pool.fingerprint or model_fingerprint()
+
+# Repeated panels are answered from memory; keyed on the models that compute them too
+prediction_cache = cache_from_env(serving_fingerprint)
+
+# Counts and recent rows /chatbot answers from, kept current by the write endpoints
+chat_context = context_from_env()
+
+# ETags of the polled GETs, from the per-table write counters the write endpoints bump
+conditional_get = conditional_get_from_env()
+
+# Load the models before serving instead of on the first /analyze call
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+# Effective database settings, read back by the startup self-check
+database_settings = {}
+
+@app.on_event("startup")
+async def check_database_profile():
+    try:
+        database_settings.update(await self_check_async(async_engine, DB_PROFILE))
+    except Exception as e:
+        # Report and keep starting; the endpoints surface connection errors themselves
+        print(f"Database self-check failed: {e}")
+
+@app.on_event("startup")
+async def start_inference_pool():
+    inference_pool.start()
+    if MODEL_WARMUP:
+        # Runs where inference runs: in a pool worker, or in a thread when INFERENCE_WORKERS=0
+        load_times = await inference_pool.run(warm_up)
+        for name, seconds in load_times.items():
+            print(f"Model warm-up: {name} loaded in {seconds * 1000:.1f} ms")
+
+@app.on_event("shutdown")
+async def stop_inference():
+    await analyze_batcher.stop()
+    inference_pool.stop()
+
+def _parse_lab_panel(lab_data: dict) -> dict:
+    """Convert submitted lab values into predict_liver_disease keyword arguments"""
+    return {
+        "alt": float(lab_data.get('ALT', 0)),
+        "ast": float(lab_data.get('AST', 0)),
+        "bilirubin": float(lab_data.get('Bilirubin', 0)),
+        "ggt": float(lab_data.get('GGT', 0)),
+        # Additional parameters for enhanced analysis
+        "age": float(lab_data.get('Age', 45)),
+        "gender": lab_data.get('Gender', 'male'),
+        "alkphos": float(lab_data.get('AlkPhos', 100)),
+        "tp": float(lab_data.get('TP', 7.0)),
+        "alb": float(lab_data.get('ALB', 4.0)),
+    }
+
+def _parse_batch_body(body: bytes, content_type: str) -> list:
+    """Decode a batch of lab panels sent as a JSON array or as NDJSON"""
+    text = body.decode("utf-8").strip()
+    if "ndjson" in content_type or (text and not text.startswith("[")):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    panels = json.loads(text) if text else []
+    if not isinstance(panels, list):
+        raise ValueError("Expected a JSON array of lab panels")
+    return panels
+
 @app.get("/")
 async def root():
     return {"message": "Medical AI Backend API", "status": "running"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return {
+        "success": True,
+        "batching": analyze_batcher.stats(),
+        "inference_pool": inference_pool.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "chat_context": chat_context.stats(),
+        "conditional_get": conditional_get.stats(),
+        "models": model_stats(),
+        "database": database_settings,
+    }
+
 @app.post("/analyze")
 async def analyze_data(
     file: Optional[UploadFile] = File(None),
     lab_values: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    cache: bool = True,
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         if file:
@@ -109,38 +217,25 @@ async def analyze_data(
         elif lab_values:
             # Handle lab values
             lab_data = json.loads(lab_values)
-            alt = float(lab_data.get('ALT', 0))
-            ast = float(lab_data.get('AST', 0))
-            bilirubin = float(lab_data.get('Bilirubin', 0))
-            ggt = float(lab_data.get('GGT', 0))
-
-            # Extract additional parameters for enhanced analysis
-            age = float(lab_data.get('Age', 45))
-            gender = lab_data.get('Gender', 'male')
-            alkphos = float(lab_data.get('AlkPhos', 100))
-            tp = float(lab_data.get('TP', 7.0))
-            alb = float(lab_data.get('ALB', 4.0))
-
-            # Use enhanced ML model for prediction
-            diagnosis, confidence, advice = predict_liver_disease(alt, ast, bilirubin, ggt, age, gender, alkphos, tp, alb)
+            panel = _parse_lab_panel(lab_data)
+            await _fill_patient_ages(db, [lab_data], [panel])
+            # Scored as it is cached, so a cached result is the one this panel gets
+            panel = canonical_panel(panel)
+
+            # Use enhanced ML model for prediction (cache=false skips the lookup but refreshes the entry)
+            prediction = prediction_cache.get(panel) if cache else None
+            if prediction is None:
+                if ANALYZE_MICROBATCH:
+                    prediction = await analyze_batcher.submit(panel)
+                else:
+                    prediction = await inference_pool.run(predict_liver_disease, **panel)
+                prediction_cache.put(panel, prediction)
+            diagnosis, confidence, advice = prediction
 
             # Save medical report to database (optional - only if patient_id is provided)
             patient_id = lab_data.get('patient_id')
             if patient_id:
-                try:
-                    # Create medical report record
-                    medical_report = MedicalReport(
-                        patient_id=int(patient_id),
-                        diagnosis=diagnosis,
-                        confidence=float(confidence),
-                        advice=advice
-                    )
-                    db.add(medical_report)
-                    db.commit()
-                    db.refresh(medical_report)
-                except Exception as db_error:
-                    print(f"Database error saving medical report: {db_error}")
-                    # Continue without failing the analysis
+                await _save_medical_report(db, patient_id, diagnosis, confidence, advice)
 
             return {
                 "success": True,
@@ -149,107 +244,161 @@ async def analyze_data(
                     "confidence": confidence,
                     "advice": advice,
                     "labValues": {
-                        "ALT": alt,
-                        "AST": ast,
-                        "Bilirubin": bilirubin,
-                        "GGT": ggt,
+                        "ALT": panel["alt"],
+                        "AST": panel["ast"],
+                        "Bilirubin": panel["bilirubin"],
+                        "GGT": panel["ggt"],
                     },
                     "timestamp": datetime.now().isoformat(),
                 }
             }
         else:
             raise HTTPException(status_code=400, detail="No data provided")
+    except HTTPException:
+        raise
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/chatbot")
-async def chatbot(request: ChatbotRequest, db: Session = Depends(get_db)):
+async def _fill_patient_ages(db: AsyncSession, lab_data_list: list, panels: list):
+    """Set the age of each panel that names a patient_id but no Age to that patient's age today, in one query"""
+    waiting = {}
+    for lab_data, panel in zip(lab_data_list, panels):
+        if lab_data.get('patient_id') and 'Age' not in lab_data:
+            try:
+                waiting.setdefault(int(lab_data['patient_id']), []).append(panel)
+            except (TypeError, ValueError):
+                continue
+    if not waiting:
+        return
+    try:
+        rows = await db.execute(
+            select(Patient.id, Patient.birth_date).where(Patient.id.in_(waiting), Patient.birth_date.is_not(None))
+        )
+    except Exception as db_error:
+        await db.rollback()
+        print(f"Database error reading patient ages: {db_error}")
+        # Continue with the default age
+        return
+    today = date.today()
+    for patient_pk, birth_date in rows:
+        for panel in waiting[patient_pk]:
+            panel["age"] = float(age_on(birth_date, today))
+
+async def _save_medical_report(db: AsyncSession, patient_id, diagnosis: str, confidence: int, advice: str):
+    """Persist one analysis result"""
+    try:
+        # Create medical report record
+        medical_report = MedicalReport(
+            patient_id=int(patient_id),
+            diagnosis=diagnosis,
+            confidence=float(confidence),
+            advice=advice
+        )
+        db.add(medical_report)
+        await db.flush()
+        # created_at is set by the database; its month is counted
+        await db.refresh(medical_report, ["created_at"])
+        await apply_stats(db, tally({}, "analyses", medical_report))
+        await bump_versions(db, "medical_reports")
+        await db.commit()
+        chat_context.analyses_added([medical_report])
+    except Exception as db_error:
+        print(f"Database error saving medical report: {db_error}")
+        # Continue without failing the analysis
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: Request, persist: bool = False, cache: bool = True, db: AsyncSession = Depends(get_async_db)):
+    """Score many lab panels (JSON array or NDJSON) in one vectorized cascade run"""
+    try:
+        lab_data_list = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+        panels = [_parse_lab_panel(lab_data) for lab_data in lab_data_list]
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch payload: {e}")
+
+    if not panels:
+        raise HTTPException(status_code=400, detail="No data provided")
+    if len(panels) > ANALYZE_BATCH_MAX_PANELS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {ANALYZE_BATCH_MAX_PANELS} panels")
+
     try:
-        # Fetch database context
-        patients = db.query(Patient).order_by(desc(Patient.created_at)).limit(10).all()
-        analyses = db.query(MedicalReport).order_by(desc(MedicalReport.created_at)).limit(10).all()
-
-        # Build context from database
-        context = {
-            "patients": patients,
-            "analyses": analyses,
-            "total_patients": len(patients),
-            "total_analyses": len(analyses)
+        await _fill_patient_ages(db, lab_data_list, panels)
+        panels = [canonical_panel(panel) for panel in panels]
+        # Only the panels missing from the prediction cache go to the model
+        predictions = [prediction_cache.get(panel) if cache else None for panel in panels]
+        misses = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if misses:
+            computed = await inference_pool.run(predict_liver_disease_batch, [panels[i] for i in misses])
+            for i, prediction in zip(misses, computed):
+                predictions[i] = prediction
+                prediction_cache.put(panels[i], prediction)
+
+        # Save medical reports for panels that carry a patient_id, in one bulk insert
+        persisted = 0
+        if persist:
+            try:
+                reports = [
+                    {
+                        "patient_id": int(lab_data["patient_id"]),
+                        "diagnosis": diagnosis,
+                        "confidence": float(confidence),
+                        "advice": advice,
+                    }
+                    for lab_data, (diagnosis, confidence, advice) in zip(lab_data_list, predictions)
+                    if lab_data.get("patient_id")
+                ]
+                if reports:
+                    await _bulk_insert_reports(db, reports)
+                    persisted = len(reports)
+            except Exception as db_error:
+                await db.rollback()
+                print(f"Database error saving batch medical reports: {db_error}")
+                # Continue without failing the analysis
+
+        return {
+            "success": True,
+            "count": len(predictions),
+            "persisted": persisted,
+            "results": [
+                {
+                    "diagnosis": diagnosis,
+                    "confidence": confidence,
+                    "advice": advice,
+                    "labValues": {
+                        "ALT": panel["alt"],
+                        "AST": panel["ast"],
+                        "Bilirubin": panel["bilirubin"],
+                        "GGT": panel["ggt"],
+                    },
+                }
+                for panel, (diagnosis, confidence, advice) in zip(panels, predictions)
+            ],
+            "timestamp": datetime.now().isoformat(),
         }
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        user_message = request.message.lower().strip()
-
-        # Simple rule-based responses based on database context
-        response = ""
-
-        # Handle analysis-related questions
-        if any(word in user_message for word in ["analysis", "analyses", "diagnosis", "report", "results"]):
-            if "how many" in user_message or "count" in user_message:
-                response = f"We have performed {context['total_analyses']} medical analysis(es) in our system."
-            elif "recent" in user_message or "latest" in user_message:
-                if context['analyses']:
-                    analysis = context['analyses'][0]
-                    patient = db.query(Patient).filter(Patient.id == analysis.patient_id).first()
-                    patient_name = patient.name if patient else "Unknown Patient"
-                    response = f"The most recent analysis was for {patient_name} with a diagnosis of {analysis.diagnosis} (confidence: {analysis.confidence}%)."
-                else:
-                    response = "No medical analyses have been performed yet."
-            else:
-                response = f"We have completed {context['total_analyses']} medical analysis(es). Our system uses AI-powered liver disease analysis to provide accurate diagnoses and treatment recommendations."
-
-        # Handle patient-related questions
-        elif any(word in user_message for word in ["patient", "patients", "who"]) or ("how many" in user_message and "patient" in user_message):
-            if "how many" in user_message or "count" in user_message:
-                response = f"We currently have {context['total_patients']} patient(s) in our system."
-                if context['patients']:
-                    patient_names = [p.name for p in context['patients'][:3]]
-                    response += f" Recent patients include: {', '.join(patient_names)}"
-                    if len(context['patients']) > 3:
-                        response += f" and {len(context['patients']) - 3} others."
-            elif "list" in user_message or "show" in user_message:
-                if context['patients']:
-                    response = "Here are our current patients:\n"
-                    for patient in context['patients'][:5]:
-                        response += f"• {patient.name} (ID: {patient.patient_id})"
-                        if patient.department:
-                            response += f" - {patient.department}"
-                        if patient.doctor_name:
-                            response += f" - Dr. {patient.doctor_name}"
-                        response += "\n"
-                else:
-                    response = "No patients are currently registered in the system."
-            else:
-                response = f"We have {context['total_patients']} patient(s) in our medical database. I can provide information about specific patients or show you a list of all patients."
-
-        # Handle system capability questions
-        elif any(word in user_message for word in ["system", "capabilities", "features", "what can you do", "help"]):
-            response = f"I am your AI Medical Assistant with access to the healthcare system's database. Here's what I can help you with:\n\n"
-            response += "• **Patient Information**: View patient records, demographics, and medical history\n"
-            response += "• **Medical Analyses**: Access AI-powered liver disease analysis results and confidence scores\n"
-            response += "• **Lab Results**: Review laboratory test results and interpretations\n"
-            response += "• **Appointment Management**: Schedule and manage patient appointments\n"
-            response += "• **Medical Reports**: Generate comprehensive medical reports\n"
-            response += "• **General Medical Information**: Answer questions about medical conditions and health advice\n\n"
-            response += f"I have real-time access to {context['total_patients']} patients and {context['total_analyses']} medical analyses in our system."
-
-        # Handle greetings
-        elif any(word in user_message for word in ["hello", "hi", "hey", "greetings"]):
-            response = f"Hello! I'm your AI Medical Assistant. I have access to {context['total_patients']} patients and {context['total_analyses']} medical analyses in our healthcare system. How can I help you today?"
-
-        # Handle general questions
-        elif any(word in user_message for word in ["liver", "disease", "medical", "health"]):
-            response = """Regarding liver health and medical conditions:
-
-• Our system specializes in AI-powered liver disease analysis
-• We analyze liver function tests (ALT, AST, bilirubin, GGT) using machine learning models
-• Recent analyses show we're helping patients with accurate diagnoses and treatment recommendations
-• For specific medical advice, please consult with a healthcare professional
-
-I can provide information about our system's capabilities and current patient data."""
-
-        # Default response
-        else:
-            response = f"I understand you're asking about: '{request.message}'. As your AI Medical Assistant, I have access to {context['total_patients']} patients and {context['total_analyses']} medical analyses in our healthcare system. I can help you with patient information, medical analyses, system capabilities, or general medical questions. Could you please be more specific about what you'd like to know?"
+async def _bulk_insert_reports(db: AsyncSession, reports: list):
+    inserted = await db.execute(insert(MedicalReport).returning(MedicalReport.diagnosis, MedicalReport.created_at), reports)
+    changes = {}
+    for report in inserted:
+        tally(changes, "analyses", report)
+    await apply_stats(db, changes)
+    await bump_versions(db, "medical_reports")
+    await db.commit()
+    chat_context.analyses_bulk_added(len(reports))
+
+@app.post("/chatbot")
+async def chatbot(request: ChatbotRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        # Database context: true counts and the newest rows, normally without touching the database
+        context = await chat_context.get(db)
+
+        # One pass over the message picks the intent; its handler writes the reply
+        response = chat_router.dispatch(request.message, context)
 
         # Always add disclaimer
         response += "\n\n*Please note: I am an AI assistant and not a substitute for professional medical advice. Always consult with qualified healthcare providers for medical decisions.*"
@@ -269,11 +418,11 @@ I can provide information about our system's capabilities and current patient da
         }
 
 @app.get("/patient-data")
-async def get_patient_data(db: Session = Depends(get_db)):
+async def get_patient_data(db: AsyncSession = Depends(get_async_db)):
     try:
         print(f"DATABASE_URL in endpoint: {os.getenv('DATABASE_URL')}")
         # Get the first patient (for demo purposes)
-        patient = db.query(Patient).first()
+        patient = (await db.execute(select(Patient.id, Patient.patient_id, Patient.name, Patient.birth_date).limit(1))).first()
         print(f"Patient found: {patient}")
         print(f"Patient name: {patient.name if patient else 'None'}")
         print(f"Patient ID: {patient.id if patient else 'None'}")
@@ -316,29 +465,18 @@ async def get_patient_data(db: Session = Depends(get_db)):
             }
 
         # Get lab tests for the patient
-        lab_tests = db.query(LabTest).filter(LabTest.patient_id == patient.id).order_by(desc(LabTest.date)).limit(10).all()
-
-        # Convert to response format
-        lab_tests_response = [
-            {
-                "testName": test.test_name,
-                "value": test.value,
-                "unit": test.unit,
-                "normalRange": test.normal_range,
-                "status": test.status,
-                "date": test.date.isoformat() if test.date else None,
-            }
-            for test in lab_tests
-        ]
+        lab_tests = (await db.execute(
+            select(*LAB_TEST_ROWS.columns).where(LabTest.patient_id == patient.id).order_by(desc(LabTest.date)).limit(10)
+        )).all()
 
-        return {
+        return Response(dumps({
             "success": True,
             "patient": {
                 "id": patient.patient_id,
                 "name": patient.name,
                 "birth_date": patient.birth_date,
             },
-            "labTests": lab_tests_response,
+            "labTests": LAB_TEST_ROWS.dicts(lab_tests),
             "recentVisits": [
                 {
                     "date": "2024-01-15",  # This would come from a visits table in a real implementation
@@ -346,82 +484,246 @@ async def get_patient_data(db: Session = Depends(get_db)):
                     "doctor": "Dr. Sarah Ahmed",
                 },
             ],
-        }
+        }), media_type=JSON_MEDIA_TYPE)
     except Exception as e:
         print(f"Database error in get_patient_data: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
+# GET /lab-tests and /patient-data rows, selected in JSON key order; the id is only the pagination key
+LAB_TEST_ROWS = RowSerializer(
+    [
+        ("testName", LabTest.test_name),
+        ("value", LabTest.value),
+        ("unit", LabTest.unit),
+        ("normalRange", LabTest.normal_range),
+        ("status", LabTest.status),
+        ("date", LabTest.date),
+    ],
+    extra=[LabTest.id],
+)
+
+def _json_response(payload: dict, response: Response) -> Response:
+    """payload encoded once, by row_json, with the headers set on response (ETag and the like)"""
+    return Response(dumps(payload), media_type=JSON_MEDIA_TYPE, headers=dict(response.headers))
+
+def _page_size(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """Page size of a list request; None when neither limit nor cursor asks for pages"""
+    if limit is None and cursor is None:
+        return None
+    return limit or DEFAULT_PAGE_SIZE
+
+async def _list_page(db: AsyncSession, statement, column, id_column, key, limit: Optional[int], cursor: Optional[str]):
+    """All rows (no pagination requested) or one keyset page, plus the next cursor"""
+    page_size = _page_size(limit, cursor)
+    if page_size is None:
+        return (await db.execute(statement.order_by(desc(column), desc(id_column)))).all(), None
+    try:
+        return await keyset_page(db, statement, column, id_column, key, page_size, cursor, db.bind.dialect.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _not_modified(db: AsyncSession, resource: str, request: Request, response: Response, query: Optional[str] = None) -> Optional[Response]:
+    """
+    A 304 when the client's copy of resource is current; otherwise None, with the validators set on response
+
+    query is what the response depends on besides the tables, the request's query string by default
+    """
+    if query is None:
+        query = request.url.query
+    headers, not_modified = await conditional_get.check(db, resource, query, request.headers.get("if-none-match"))
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 @app.get("/lab-tests")
-async def get_lab_tests(patientId: str, db: Session = Depends(get_db)):
+async def get_lab_tests(
+    request: Request,
+    response: Response,
+    patientId: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    test_name: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
     try:
+        not_modified = await _not_modified(db, "lab-tests", request, response)
+        if not_modified:
+            return not_modified
+
         # Find patient by patient ID
-        patient = db.query(Patient).filter(Patient.patient_id == patientId).first()
+        patient_pk = await db.scalar(select(Patient.id).where(Patient.patient_id == patientId))
 
-        if not patient:
+        if patient_pk is None:
             return {"success": False, "message": "Patient not found"}
 
-        # Get lab tests for the patient
-        lab_tests = db.query(LabTest).filter(LabTest.patient_id == patient.id).order_by(desc(LabTest.date)).all()
-
-        # Convert to response format
-        lab_tests_response = [
-            {
-                "testName": test.test_name,
-                "value": test.value,
-                "unit": test.unit,
-                "normalRange": test.normal_range,
-                "status": test.status,
-                "date": test.date.isoformat() if test.date else None,
-            }
-            for test in lab_tests
-        ]
+        dialect = db.bind.dialect.name
+        query = select(*LAB_TEST_ROWS.columns).where(LabTest.patient_id == patient_pk)
+        if status:
+            query = query.where(LabTest.status == status)
+        if test_name:
+            query = query.where(LabTest.test_name == test_name)
+        if date_from:
+            query = query.where(at_or_after(LabTest.date, date_from, dialect))
+        if date_to:
+            query = query.where(at_or_before(LabTest.date, date_to, dialect))
 
-        return {
+        lab_tests, next_cursor = await _list_page(db, query, LabTest.date, LabTest.id, lambda test: (test.date, test.id), limit, cursor)
+
+        return _json_response({
             "success": True,
-            "labTests": lab_tests_response,
-        }
+            "labTests": LAB_TEST_ROWS.dicts(lab_tests),
+            "next_cursor": next_cursor,
+        }, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Database error in get_lab_tests: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
-@app.get("/patients")
-async def get_patients(db: Session = Depends(get_db)):
+@app.post("/lab-tests/bulk")
+async def bulk_ingest_lab_tests(request: Request, format: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Insert lab results streamed as CSV or NDJSON; bad rows are reported and skipped"""
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "ndjson")
+    if fmt not in INGEST_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt!r}; expected one of {', '.join(INGEST_FORMATS)}")
     try:
-        patients = db.query(Patient).order_by(desc(Patient.created_at)).all()
+        stats = await ingest_lab_results(db, request.stream(), fmt)
+    except ValueError as e:
+        # e.g. a CSV header without one of the fields
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        print(f"Database error in bulk_ingest_lab_tests: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+    print(f"Bulk lab ingestion: {stats['inserted']} of {stats['rows']} rows inserted, {stats['failed']} failed")
+    return {"success": True, **stats}
 
-        patients_response = [
-            {
-                "id": patient.id,
-                "name": patient.name,
-                "patient_id": patient.patient_id,
-                "birth_date": patient.birth_date,
-                "email": patient.email,
-                "phone": patient.phone,
-                "profile_picture": patient.profile_picture,
-                "department": patient.department,
-                "doctor_name": patient.doctor_name,
-                "created_at": patient.created_at.isoformat() if patient.created_at else None,
-                "updated_at": patient.updated_at.isoformat() if patient.updated_at else None,
-            }
-            for patient in patients
-        ]
+# GET /patients, /patients/search and /export/patients rows: every column, under its own name
+PATIENT_ROWS = RowSerializer([(column.name, column) for column in Patient.__table__.columns])
 
-        return {
+@app.get("/patients")
+async def get_patients(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    doctor_name: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    age_min: Optional[int] = Query(None, ge=0, le=150),
+    age_max: Optional[int] = Query(None, ge=0, le=150),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if age_min is not None and age_max is not None and age_min > age_max:
+        raise HTTPException(status_code=400, detail="age_min is greater than age_max")
+    try:
+        # An age band covers other birth dates tomorrow, so its responses are tagged with the day too
+        today = date.today()
+        query_key = request.url.query
+        if age_min is not None or age_max is not None:
+            query_key += f"&today={today.isoformat()}"
+        not_modified = await _not_modified(db, "patients", request, response, query_key)
+        if not_modified:
+            return not_modified
+
+        dialect = db.bind.dialect.name
+        query = select(*PATIENT_ROWS.columns)
+        if department:
+            query = query.where(Patient.department == department)
+        if doctor_name:
+            query = query.where(Patient.doctor_name == doctor_name)
+        if created_from:
+            query = query.where(at_or_after(Patient.created_at, created_from, dialect))
+        if created_to:
+            query = query.where(at_or_before(Patient.created_at, created_to, dialect))
+        born_after, born_at_or_before = birth_date_range(age_min, age_max, today)
+        if born_after:
+            query = query.where(Patient.birth_date > born_after)
+        if born_at_or_before:
+            query = query.where(Patient.birth_date <= born_at_or_before)
+
+        patients, next_cursor = await _list_page(db, query, Patient.created_at, Patient.id, lambda patient: (patient.created_at, patient.id), limit, cursor)
+
+        return _json_response({
             "success": True,
-            "patients": patients_response,
-        }
+            "patients": PATIENT_ROWS.dicts(patients),
+            "next_cursor": next_cursor,
+        }, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Database error in get_patients: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
+@app.get("/patients/search")
+async def search_patients_endpoint(
+    request: Request,
+    response: Response,
+    q: str = "",
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Patients whose name, ID, contact details, department or doctor match every word of q (as prefixes), best first"""
+    try:
+        not_modified = await _not_modified(db, "patient-search", request, response)
+        if not_modified:
+            return not_modified
+
+        patients = await search_patients(db, q, limit, PATIENT_ROWS.columns)
+        return _json_response({"success": True, "patients": PATIENT_ROWS.dicts(patients)}, response)
+    except Exception as e:
+        print(f"Database error in search_patients: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/patients/{patient_id}/lab-trends")
+async def get_lab_trends(
+    patient_id: str,
+    request: Request,
+    response: Response,
+    tests: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    points: int = Query(DEFAULT_TREND_POINTS, ge=3, le=MAX_TREND_POINTS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Per test (comma-separated), at most `points` downsampled chart points and aggregates of the patient's results"""
+    try:
+        test_names = parse_tests(tests)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        not_modified = await _not_modified(db, "lab-trends", request, response)
+        if not_modified:
+            return not_modified
+
+        patient_pk = await db.scalar(select(Patient.id).where(Patient.patient_id == patient_id))
+        if patient_pk is None:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+        trends = await lab_trends(db, patient_pk, test_names, date_from, date_to, points)
+        return _json_response({"success": True, "patient_id": patient_id, "trends": trends}, response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Database error in get_lab_trends: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
 @app.put("/patients/{patient_id}")
-async def update_patient(patient_id: str, patient_data: dict = None, db: Session = Depends(get_db)):
+async def update_patient(patient_id: str, patient_data: dict = None, db: AsyncSession = Depends(get_async_db)):
     try:
         # Find patient by patient_id (string field)
-        patient = db.query(Patient).filter(Patient.patient_id == patient_id).first()
+        patient = await db.scalar(select(Patient).where(Patient.patient_id == patient_id))
 
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
+        changes = tally({}, "patients", patient, -1)
 
         # Update patient fields
         if "name" in patient_data:
@@ -429,7 +731,12 @@ async def update_patient(patient_id: str, patient_data: dict = None, db: Session
         if "patient_id" in patient_data:
             patient.patient_id = patient_data["patient_id"]
         if "birth_date" in patient_data:
-            patient.birth_date = patient_data["birth_date"]
+            try:
+                patient.birth_date = parse_birth_date(patient_data["birth_date"])
+                # A birth date that did not survive the DATE migration is replaced by the corrected one
+                patient.birth_date_raw = None
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         if "email" in patient_data:
             patient.email = patient_data["email"]
         if "phone" in patient_data:
@@ -441,8 +748,11 @@ async def update_patient(patient_id: str, patient_data: dict = None, db: Session
         if "doctor_name" in patient_data:
             patient.doctor_name = patient_data["doctor_name"]
 
-        db.commit()
-        db.refresh(patient)
+        await apply_stats(db, tally(changes, "patients", patient))
+        await bump_versions(db, "patients")
+        await db.commit()
+        await db.refresh(patient)
+        chat_context.patient_updated(patient)
 
         return {"success": True, "patient": {
             "id": patient.id,
@@ -463,17 +773,27 @@ async def update_patient(patient_id: str, patient_data: dict = None, db: Session
         raise HTTPException(status_code=500, detail="Database error")
 
 @app.delete("/patients/{patient_id}")
-async def delete_patient(patient_id: str, db: Session = Depends(get_db)):
+async def delete_patient(patient_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        # Find patient by patient_id (string field)
-        patient = db.query(Patient).filter(Patient.patient_id == patient_id).first()
+        # Find patient by patient_id (string field), with the rows the delete cascades to
+        patient = await db.scalar(
+            select(Patient)
+            .where(Patient.patient_id == patient_id)
+            .options(selectinload(Patient.lab_tests), selectinload(Patient.medical_reports))
+        )
 
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
 
         # Delete the patient
-        db.delete(patient)
-        db.commit()
+        changes = tally({}, "patients", patient, -1)
+        for report in patient.medical_reports:
+            tally(changes, "analyses", report, -1)
+        await apply_stats(db, changes)
+        await db.delete(patient)
+        await bump_versions(db, "patients", "lab_tests", "medical_reports")
+        await db.commit()
+        chat_context.patient_deleted(patient.id, len(patient.medical_reports))
 
         return {"success": True, "message": "Patient deleted successfully"}
 
@@ -484,25 +804,25 @@ async def delete_patient(patient_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Database error")
 
 @app.post("/patients")
-async def create_or_update_patient(patient_data: dict, db: Session = Depends(get_db)):
+async def create_or_update_patient(patient_data: dict, db: AsyncSession = Depends(get_async_db)):
     try:
         patient_id = patient_data.get("patient_id")
         name = patient_data.get("name")
-        birth_date_str = patient_data.get("birth_date")
 
         if not patient_id or not name:
             raise HTTPException(status_code=400, detail="Patient ID and name are required")
+        try:
+            birth_date = parse_birth_date(patient_data.get("birth_date"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         # Check if patient already exists
-        existing_patient = db.query(Patient).filter(Patient.patient_id == patient_id).first()
+        existing_patient = await db.scalar(select(Patient.id).where(Patient.patient_id == patient_id))
 
         if existing_patient:
             # Return error for duplicate patient ID
             raise HTTPException(status_code=400, detail="ID is Currently used")
 
-        # birth_date is now stored as string
-        birth_date = birth_date_str if birth_date_str else None
-
         # Create new patient
         new_patient = Patient(
             name=name,
@@ -516,8 +836,13 @@ async def create_or_update_patient(patient_data: dict, db: Session = Depends(get
         )
 
         db.add(new_patient)
-        db.commit()
-        db.refresh(new_patient)
+        await db.flush()
+        # Server defaults (created_at, whose month is counted)
+        await db.refresh(new_patient)
+        await apply_stats(db, tally({}, "patients", new_patient))
+        await bump_versions(db, "patients")
+        await db.commit()
+        chat_context.patient_added(new_patient)
 
         return {"success": True, "patient": {
             "id": new_patient.id,
@@ -537,58 +862,163 @@ async def create_or_update_patient(patient_data: dict, db: Session = Depends(get
         print(f"Database error in create_or_update_patient: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
+# Columns of a /patient-analyses row: the report plus its patient (NULL when the patient is missing)
+_ANALYSIS_COLUMNS = (
+    MedicalReport.id,
+    MedicalReport.patient_id,
+    MedicalReport.diagnosis,
+    MedicalReport.confidence,
+    MedicalReport.advice,
+    MedicalReport.created_at,
+    Patient.id.label("patient_pk"),
+    Patient.updated_at,
+    Patient.name.label("patient_name"),
+    Patient.patient_id.label("patient_id_display"),
+    Patient.birth_date,
+    Patient.email,
+    Patient.phone,
+    Patient.profile_picture,
+    Patient.department,
+    Patient.doctor_name,
+)
+
+# Keys of a /patient-analyses row, in the order _analysis_row builds them
+_ANALYSIS_KEYS = (
+    "id", "patient_id", "diagnosis", "confidence", "advice", "created_at", "updated_at", "patient_name",
+    "patient_id_display", "birth_date", "email", "phone", "profile_picture", "department", "doctor_name",
+)
+
+def _analysis_row(row) -> dict:
+    found = row.patient_pk is not None
+    return {
+        "id": row.id,
+        "patient_id": row.patient_id,
+        "diagnosis": row.diagnosis,
+        "confidence": row.confidence,
+        "advice": row.advice,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "patient_name": row.patient_name if found else "Unknown",
+        "patient_id_display": row.patient_id_display if found else "Unknown",
+        "birth_date": row.birth_date,
+        "email": row.email,
+        "phone": row.phone,
+        "profile_picture": row.profile_picture,
+        "department": row.department,
+        "doctor_name": row.doctor_name,
+    }
+
 @app.get("/patient-analyses")
-async def get_patient_analyses(db: Session = Depends(get_db)):
+async def get_patient_analyses(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    diagnosis: Optional[str] = None,
+    department: Optional[str] = None,
+    doctor_name: Optional[str] = None,
+    patient_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
     try:
-        # Get all medical reports
-        analyses = db.query(MedicalReport).order_by(desc(MedicalReport.created_at)).all()
-
-        print(f"Found {len(analyses)} analyses")
-
-        # Convert to response format
-        analyses_response = []
-        for analysis in analyses:
-            # Explicitly fetch the patient
-            patient = db.query(Patient).filter(Patient.id == analysis.patient_id).first()
-
-            print(f"Analysis {analysis.id}: patient_id={analysis.patient_id}, patient_found={patient is not None}")
-            if patient:
-                print(f"  Patient: {patient.name}, dept={patient.department}, doctor={patient.doctor_name}")
-
-            patient_data = {
-                "id": analysis.id,
-                "patient_id": analysis.patient_id,
-                "diagnosis": analysis.diagnosis,
-                "confidence": analysis.confidence,
-                "advice": analysis.advice,
-                "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
-                "updated_at": patient.updated_at.isoformat() if patient and patient.updated_at else None,
-                "patient_name": patient.name if patient else "Unknown",
-                "patient_id_display": patient.patient_id if patient else "Unknown",
-                "birth_date": patient.birth_date if patient else None,
-                "email": patient.email if patient else None,
-                "phone": patient.phone if patient else None,
-                "profile_picture": patient.profile_picture if patient else None,
-                "department": patient.department if patient else None,
-                "doctor_name": patient.doctor_name if patient else None,
-            }
-            analyses_response.append(patient_data)
+        not_modified = await _not_modified(db, "patient-analyses", request, response)
+        if not_modified:
+            return not_modified
+
+        # One outer-joined query for the reports and their patients, fetching only the serialized columns
+        dialect = db.bind.dialect.name
+        query = select(*_ANALYSIS_COLUMNS).outerjoin(Patient, Patient.id == MedicalReport.patient_id)
+        if diagnosis:
+            query = query.where(MedicalReport.diagnosis == diagnosis)
+        if patient_id is not None:
+            query = query.where(MedicalReport.patient_id == patient_id)
+        if department:
+            query = query.where(Patient.department == department)
+        if doctor_name:
+            query = query.where(Patient.doctor_name == doctor_name)
+        if created_from:
+            query = query.where(at_or_after(MedicalReport.created_at, created_from, dialect))
+        if created_to:
+            query = query.where(at_or_before(MedicalReport.created_at, created_to, dialect))
+
+        rows, next_cursor = await _list_page(db, query, MedicalReport.created_at, MedicalReport.id, lambda row: (row.created_at, row.id), limit, cursor)
+
+        print(f"Found {len(rows)} analyses")
 
         return {
             "success": True,
-            "analyses": analyses_response,
+            "analyses": [_analysis_row(row) for row in rows],
+            "next_cursor": next_cursor,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Database error in get_patient_analyses: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
+@app.get("/stats")
+async def get_stats(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Dashboard counts of patients by department, doctor and month, and of analyses by diagnosis and month"""
+    try:
+        not_modified = await _not_modified(db, "stats", request, response)
+        if not_modified:
+            return not_modified
+
+        return _json_response({"success": True, **await read_stats(db)}, response)
+    except Exception as e:
+        print(f"Database error in get_stats: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+# /export/lab_tests rows: the GET /lab-tests row with the keys it is exported and resumed by
+LAB_TEST_EXPORT_ROWS = RowSerializer([("id", LabTest.id), ("patient_id", LabTest.patient_id), *LAB_TEST_ROWS.fields])
+
+# Exported table -> (statement, id column, row keys, conversion of result rows to the list endpoint's dicts)
+_EXPORTS = {
+    "patients": (lambda: select(*PATIENT_ROWS.columns), Patient.id, PATIENT_ROWS.keys, PATIENT_ROWS.dicts),
+    "lab_tests": (
+        lambda: select(*LAB_TEST_EXPORT_ROWS.columns), LabTest.id, LAB_TEST_EXPORT_ROWS.keys, LAB_TEST_EXPORT_ROWS.dicts,
+    ),
+    "medical_reports": (
+        lambda: select(*_ANALYSIS_COLUMNS).outerjoin(Patient, Patient.id == MedicalReport.patient_id),
+        MedicalReport.id,
+        _ANALYSIS_KEYS,
+        lambda rows: [_analysis_row(row) for row in rows],
+    ),
+}
+
+@app.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: str = "ndjson",
+    after_id: int = Query(0, ge=0),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stream a whole table as NDJSON or CSV in id order, starting after after_id"""
+    if table not in _EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown table {table!r}; expected one of {', '.join(_EXPORTS)}")
+    if format not in ENCODERS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {format!r}; expected one of {', '.join(ENCODERS)}")
+
+    statement, id_column, keys, serialize = _EXPORTS[table]
+    # The stream reads through its own connection; the request session closes before the body is sent
+    chunks = iter_export(db.bind, statement(), id_column, keys, serialize, format, after_id, chunk_size)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
 @app.put("/patient-analyses/{analysis_id}")
-async def update_patient_analysis(analysis_id: int, analysis_data: dict, db: Session = Depends(get_db)):
+async def update_patient_analysis(analysis_id: int, analysis_data: dict, db: AsyncSession = Depends(get_async_db)):
     try:
-        analysis = db.query(MedicalReport).filter(MedicalReport.id == analysis_id).first()
+        analysis = await db.get(MedicalReport, analysis_id)
 
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
+        changes = tally({}, "analyses", analysis, -1)
 
         # Update fields
         if "diagnosis" in analysis_data:
@@ -599,13 +1029,16 @@ async def update_patient_analysis(analysis_id: int, analysis_data: dict, db: Ses
             analysis.advice = analysis_data["advice"]
         if "patient_id" in analysis_data:
             # Verify that the patient exists
-            patient = db.query(Patient).filter(Patient.id == analysis_data["patient_id"]).first()
+            patient = await db.get(Patient, analysis_data["patient_id"])
             if not patient:
                 raise HTTPException(status_code=400, detail="Patient not found")
             analysis.patient_id = analysis_data["patient_id"]
 
-        db.commit()
-        db.refresh(analysis)
+        await apply_stats(db, tally(changes, "analyses", analysis))
+        await bump_versions(db, "medical_reports")
+        await db.commit()
+        await db.refresh(analysis)
+        chat_context.analysis_updated(analysis)
 
         return {"success": True, "analysis": {
             "id": analysis.id,
@@ -620,15 +1053,18 @@ async def update_patient_analysis(analysis_id: int, analysis_data: dict, db: Ses
         raise HTTPException(status_code=500, detail="Database error")
 
 @app.delete("/patient-analyses/{analysis_id}")
-async def delete_patient_analysis(analysis_id: int, db: Session = Depends(get_db)):
+async def delete_patient_analysis(analysis_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        analysis = db.query(MedicalReport).filter(MedicalReport.id == analysis_id).first()
+        analysis = await db.get(MedicalReport, analysis_id)
 
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
 
-        db.delete(analysis)
-        db.commit()
+        await apply_stats(db, tally({}, "analyses", analysis, -1))
+        await db.delete(analysis)
+        await bump_versions(db, "medical_reports")
+        await db.commit()
+        chat_context.analysis_deleted(analysis_id)
 
         return {"success": True, "message": "Analysis deleted successfully"}
 
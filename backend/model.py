@@ -1,19 +1,23 @@
+import hashlib
 import os
-from typing import Tuple
+import threading
+import time
+import warnings
+from typing import Dict, List, Tuple
 
 # Try to import ML dependencies
 try:
-    import pandas as pd
     import numpy as np
     import joblib
-    PANDAS_AVAILABLE = True
+    from inference_backends import make_backends
+    ML_AVAILABLE = True
     print("ML dependencies loaded successfully")
 except ImportError:
-    PANDAS_AVAILABLE = False
+    ML_AVAILABLE = False
     print("Warning: ML dependencies not available, using rule-based prediction")
 
-# Model column definitions (only define if pandas is available)
-if PANDAS_AVAILABLE:
+# Model column definitions (only define if the ML dependencies are available)
+if ML_AVAILABLE:
     GLOBAL_COLS = ['Age', 'Gender', 'TB', 'DB', 'AlkPhos', 'ALT', 'AST', 'TP', 'ALB', 'AGR']
     HEP_COLS = ['ID', 'Age', 'Gender', 'ALB', 'AlkPhos', 'ALT', 'AST', 'TB', 'CHE', 'Cholesterol', 'Creatinine', 'GGT', 'TP']
     CIRR_COLS = ['ID', 'N_Days', 'Status', 'Drug', 'Age', 'Gender', 'Ascites', 'Hepatomegaly', 'Spiders', 'Edema', 'TB', 'Cholesterol', 'ALB', 'Copper', 'AlkPhos', 'AST', 'Tryglicerides', 'Platelets', 'Prothrombin']
@@ -22,25 +26,186 @@ else:
     HEP_COLS = None
     CIRR_COLS = None
 
-# Load the trained models
+# Trained models; loaded lazily on first use (or by warm_up), not at import
 MODEL_DIR = os.path.dirname(__file__)
-if PANDAS_AVAILABLE:
+MODEL_FILES = {
+    'model_global': 'model_global_best.pkl',
+    'model_hep': 'model_hep_best.pkl',
+    'model_cirr': 'model_cirr_best.pkl',
+}
+# How the loaded estimators are evaluated: "sklearn", or opt in to "compiled" (flat numpy trees, see inference_backends.py)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "sklearn")
+# MODEL_MMAP=1 memory-maps the numpy arrays stored in the pickles (joblib mmap_mode='r')
+MODEL_MMAP = os.getenv("MODEL_MMAP", "0") == "1"
+model_global = None
+model_hep = None
+model_cirr = None
+# Identifies the loaded .pkl files; changes whenever different models are loaded
+MODEL_FINGERPRINT = None
+# (modification times and sizes, hash) of the model files, for model_fingerprint() before a load
+_files_fingerprint = (None, None)
+# Seconds spent loading each model, by name, for the most recent load
+MODEL_LOAD_TIMES: Dict[str, float] = {}
+_models_loaded = False
+_load_lock = threading.Lock()
+
+def _model_paths() -> List[str]:
+    return [os.path.join(MODEL_DIR, name) for name in MODEL_FILES.values()]
+
+def _fingerprint_files(paths: List[str]) -> str:
+    """Short content hash of the given model files"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def load_models():
+    """(Re)load the 3 ML models from MODEL_DIR and refresh MODEL_FINGERPRINT"""
+    with _load_lock:
+        _load_models_locked()
+
+def ensure_models():
+    """Load the models on first use; thread-safe and a no-op afterwards"""
+    if not _models_loaded:
+        with _load_lock:
+            if not _models_loaded:
+                _load_models_locked()
+
+def _load_models_locked():
+    global model_global, model_hep, model_cirr, MODEL_FINGERPRINT, MODEL_LOAD_TIMES, _models_loaded
+    if not ML_AVAILABLE:
+        print("Using enhanced rule-based prediction")
+        model_global = model_hep = model_cirr = None
+        MODEL_FINGERPRINT = "rule-based"
+        _models_loaded = True
+        return
     try:
-        model_global = joblib.load(os.path.join(MODEL_DIR, 'model_global_best.pkl'))
-        model_hep = joblib.load(os.path.join(MODEL_DIR, 'model_hep_best.pkl'))
-        model_cirr = joblib.load(os.path.join(MODEL_DIR, 'model_cirr_best.pkl'))
-        print("All 3 ML models loaded successfully")
+        loaded, load_times = [], {}
+        for name, path in zip(MODEL_FILES, _model_paths()):
+            start = time.perf_counter()
+            loaded.append(joblib.load(path, mmap_mode='r' if MODEL_MMAP else None))
+            load_times[name] = time.perf_counter() - start
+            print(f"Loaded {name} in {load_times[name] * 1000:.1f} ms")
+        model_global, model_hep, model_cirr = make_backends(loaded, MODEL_BACKEND)
+        MODEL_LOAD_TIMES = load_times
+        MODEL_FINGERPRINT = _fingerprint_files(_model_paths())
+        print(f"All 3 ML models loaded successfully (fingerprint {MODEL_FINGERPRINT})")
     except Exception as e:
         print(f"Model loading failed: {e}")
         print("Falling back to enhanced rule-based prediction")
-        model_global = None
-        model_hep = None
-        model_cirr = None
+        model_global = model_hep = model_cirr = None
+        MODEL_FINGERPRINT = "rule-based"
+    _models_loaded = True
+
+def warm_up() -> Dict[str, float]:
+    """Load the models now instead of on the first prediction; returns per-model load seconds"""
+    ensure_models()
+    return dict(MODEL_LOAD_TIMES)
+
+def model_fingerprint() -> str:
+    """
+    Fingerprint of the models predictions are made with
+
+    Once this process has loaded the models, the fingerprint of what it
+    loaded. Before that it hashes the files that would be loaded, so callers
+    never force a model load just to learn the fingerprint; the hash is
+    recomputed whenever a file's modification time or size changes.
+    """
+    global _files_fingerprint
+    if _models_loaded:
+        return MODEL_FINGERPRINT
+    if not ML_AVAILABLE:
+        return "rule-based"
+    paths = _model_paths()
+    try:
+        signature = tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+        if _files_fingerprint[0] != signature:
+            _files_fingerprint = (signature, _fingerprint_files(paths))
+    except OSError:
+        return "rule-based"
+    return _files_fingerprint[1]
+
+def model_stats() -> Dict:
+    return {
+        "loaded": _models_loaded,
+        "mode": "ML models" if model_global is not None else ("rule-based prediction" if _models_loaded else "not loaded"),
+        "backend": MODEL_BACKEND,
+        "estimator": type(model_global).__name__ if model_global is not None else None,
+        "mmap": MODEL_MMAP,
+        "fingerprint": MODEL_FINGERPRINT,
+        "load_ms": {name: round(seconds * 1000, 1) for name, seconds in MODEL_LOAD_TIMES.items()},
+    }
+
+# Medical defaults for the model features a lab panel does not provide.
+# ALT, AST, TB (bilirubin), GGT, DB (derived from bilirubin) and Age come from the panel.
+_FEATURE_DEFAULTS = {
+    'Age': 45, 'Gender': 1, 'ID': 1,
+    'AlkPhos': 100, 'TP': 7.0, 'ALB': 4.0, 'AGR': 1.2,
+    'N_Days': 1000, 'Status': 1, 'Drug': 1, 'Ascites': 0, 'Hepatomegaly': 0,
+    'Spiders': 0, 'Edema': 0, 'Cholesterol': 180, 'Copper': 100,
+    'Tryglicerides': 120, 'Platelets': 250000, 'Prothrombin': 10.5,
+    'CHE': 8.0, 'Creatinine': 0.8,
+}
+
+# Order of the per-panel values produced by _live_features
+_LIVE_FEATURES = ('ALT', 'AST', 'TB', 'GGT', 'DB', 'Age')
+
+class _FeatureLayout:
+    """
+    Fixed column layout of one model's input matrix
+
+    The default-value row is built once at import; a prediction only writes
+    the live lab values into a preallocated per-thread buffer (single panel)
+    or into a tiled copy of the defaults (batch).
+    """
+
+    def __init__(self, columns: List[str], dtype, overrides: Dict = None):
+        values = dict(_FEATURE_DEFAULTS, **(overrides or {}))
+        self.columns = columns
+        self.index = {col: i for i, col in enumerate(columns)}
+        self.defaults = np.array([[values.get(col, 0) for col in columns]], dtype=dtype)
+        # (matrix column, position in the _live_features tuple) for every live feature
+        self.live_slots = [(self.index[col], i) for i, col in enumerate(_LIVE_FEATURES) if col in self.index]
+        self._local = threading.local()
+
+    def row(self, live: Tuple) -> "np.ndarray":
+        """Return this thread's 1-row buffer holding the given live values"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = self.defaults.copy()
+        for col, i in self.live_slots:
+            buffer[0, col] = live[i]
+        return buffer
+
+    def matrix(self, live_columns: Tuple) -> "np.ndarray":
+        """Return a new matrix with one row per panel from column arrays of live values"""
+        matrix = np.repeat(self.defaults, len(live_columns[0]), axis=0)
+        for col, i in self.live_slots:
+            matrix[:, col] = live_columns[i]
+        return matrix
+
+def _live_features(alt, ast, bilirubin, ggt, age=_FEATURE_DEFAULTS['Age']) -> Tuple:
+    """Values of _LIVE_FEATURES for one panel (or arrays of them for a batch)"""
+    return alt, ast, bilirubin, ggt, bilirubin * 0.3, age  # DB: Direct Bilirubin
+
+if ML_AVAILABLE:
+    # The global model receives Gender as its label, exactly like the mapped
+    # DataFrame column it was originally given, so its layout is an object array.
+    GLOBAL_LAYOUT = _FeatureLayout(GLOBAL_COLS, object, {'Gender': {0: 'female', 1: 'male'}[_FEATURE_DEFAULTS['Gender']]})
+    HEP_LAYOUT = _FeatureLayout(HEP_COLS, np.float64)
+    CIRR_LAYOUT = _FeatureLayout(CIRR_COLS, np.float64)
 else:
-    print("Using enhanced rule-based prediction")
-    model_global = None
-    model_hep = None
-    model_cirr = None
+    GLOBAL_LAYOUT = None
+    HEP_LAYOUT = None
+    CIRR_LAYOUT = None
+
+def _predict(estimator, X):
+    # The layouts fix the column order, so plain arrays are passed to models fitted on named columns
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        return estimator.predict(X)
 
 def predict_liver_disease(alt: float, ast: float, bilirubin: float, ggt: float, age: float = 45, gender: str = 'male', alkphos: float = 100, tp: float = 7.0, alb: float = 4.0) -> Tuple[str, int, str]:
     """
@@ -55,61 +220,19 @@ def predict_liver_disease(alt: float, ast: float, bilirubin: float, ggt: float,
     Returns:
         Tuple of (diagnosis, confidence, advice)
     """
+    ensure_models()
     if model_global is None or model_hep is None or model_cirr is None:
         # Enhanced rule-based prediction when ML models unavailable
         print("Using enhanced rule-based prediction (models not loaded)")
         return _enhanced_rule_based_prediction(alt, ast, bilirubin, ggt, age, gender, alkphos, tp, alb)
 
     try:
-        # Create comprehensive input data with defaults for missing features
-        input_data = {
-            # Basic patient info
-            'Age': 45,  # Default age
-            'Gender': 1,  # Male
-            'ID': 1,    # Patient ID
-
-            # Liver function tests (from our inputs)
-            'ALT': alt,
-            'AST': ast,
-            'TB': bilirubin,  # Total Bilirubin
-            'GGT': ggt,
-
-            # Additional features with medical defaults
-            'DB': bilirubin * 0.3,  # Direct Bilirubin
-            'AlkPhos': 100,         # Alkaline Phosphatase
-            'TP': 7.0,             # Total Protein
-            'ALB': 4.0,            # Albumin
-            'AGR': 1.2,            # Albumin/Globulin Ratio
-
-            # Additional features for cirrhosis model
-            'N_Days': 1000,        # Days since diagnosis
-            'Status': 1,           # Status
-            'Drug': 1,             # On drug treatment
-            'Ascites': 0,          # No ascites
-            'Hepatomegaly': 0,     # No hepatomegaly
-            'Spiders': 0,          # No spider angiomas
-            'Edema': 0,            # No edema
-            'Cholesterol': 180,    # Cholesterol
-            'Copper': 100,         # Copper levels
-            'Tryglicerides': 120,  # Triglycerides
-            'Platelets': 250000,   # Platelet count
-            'Prothrombin': 10.5,   # Prothrombin time
-
-            # Hepatitis-specific features
-            'CHE': 8.0,           # Cholinesterase
-            'Creatinine': 0.8,    # Creatinine
-        }
+        live = _live_features(alt, ast, bilirubin, ggt, age)
 
         # ----------------------------------------------------------
         # 1. Global Prediction (Binary: Disease/No Disease)
         # ----------------------------------------------------------
-        df_global = pd.DataFrame([input_data])
-        df_global_pred = df_global[GLOBAL_COLS].copy()
-
-        # Convert gender to string for model
-        df_global_pred['Gender'] = df_global_pred['Gender'].map({0: 'female', 1: 'male'})
-
-        pred_global = model_global.predict(df_global_pred)[0]
+        pred_global = _predict(model_global, GLOBAL_LAYOUT.row(live))[0]
         print(f"Global Model Prediction: {pred_global}")
 
         if pred_global == 0:
@@ -119,52 +242,16 @@ def predict_liver_disease(alt: float, ast: float, bilirubin: float, ggt: float,
         # ----------------------------------------------------------
         # 2. Specialized Predictions (Hepatitis C and Cirrhosis)
         # ----------------------------------------------------------
-
-        # Hepatitis C prediction
-        df_hep = pd.DataFrame([input_data])
-        df_hep_pred = pd.DataFrame(0, index=[0], columns=HEP_COLS)
-        common_hep_cols = set(HEP_COLS).intersection(df_hep.columns)
-        for col in common_hep_cols:
-            df_hep_pred[col] = df_hep[col]
-
-        pred_hep = model_hep.predict(df_hep_pred)[0]
+        pred_hep = _predict(model_hep, HEP_LAYOUT.row(live))[0]
         print(f"Hepatitis Model Prediction: {pred_hep}")
 
-        # Cirrhosis prediction
-        df_cirr = pd.DataFrame([input_data])
-        df_cirr_pred = pd.DataFrame(0, index=[0], columns=CIRR_COLS)
-        common_cirr_cols = set(CIRR_COLS).intersection(df_cirr.columns)
-        for col in common_cirr_cols:
-            df_cirr_pred[col] = df_cirr[col]
-
-        pred_cirr = model_cirr.predict(df_cirr_pred)[0]
+        pred_cirr = _predict(model_cirr, CIRR_LAYOUT.row(live))[0]
         print(f"Cirrhosis Model Prediction: {pred_cirr}")
 
         # ----------------------------------------------------------
         # 3. Determine final diagnosis based on specialized predictions
         # ----------------------------------------------------------
-
-        # If Hepatitis C detected
-        if pred_hep > 0:  # Hepatitis detected
-            stage = int(pred_hep)
-            diagnosis = f"Hepatitis C (Stage {stage})"
-            confidence = 90
-            advice = f"Hepatitis C detected at stage {stage}. Immediate specialist consultation required."
-
-        # If Cirrhosis detected
-        elif pred_cirr > 0:  # Cirrhosis detected
-            stage = int(pred_cirr)
-            diagnosis = f"Liver Cirrhosis (Stage {stage})"
-            confidence = 85
-            advice = f"Liver cirrhosis detected at stage {stage}. Urgent hepatologist consultation needed."
-
-        # If global model detected disease but specialized models didn't
-        else:
-            diagnosis = "Liver Disease Detected"
-            confidence = 75
-            advice = "Liver disease indicated but specific type unclear. Further diagnostic tests recommended."
-
-        return diagnosis, confidence, advice
+        return _specialist_diagnosis(pred_hep, pred_cirr)
 
     except Exception as e:
         error_msg = f"ML prediction error: {str(e)}"
@@ -175,6 +262,98 @@ def predict_liver_disease(alt: float, ast: float, bilirubin: float, ggt: float,
         advice += f" [DEBUG: {error_msg}]"
         return diagnosis, confidence, advice
 
+def predict_liver_disease_batch(panels: List[Dict]) -> List[Tuple[str, int, str]]:
+    """
+    Predict liver disease risk for many lab panels with one pass of each model
+
+    The global model scores the whole batch at once; only the rows it flags
+    as diseased are sent to the Hepatitis C and Cirrhosis models. Results are
+    identical to calling predict_liver_disease on every panel.
+
+    Args:
+        panels: List of dicts holding the keyword arguments of predict_liver_disease
+                (alt, ast, bilirubin, ggt and optionally age, gender, alkphos, tp, alb)
+
+    Returns:
+        List of (diagnosis, confidence, advice) tuples in input order
+    """
+    if not panels:
+        return []
+
+    ensure_models()
+    if model_global is None or model_hep is None or model_cirr is None:
+        print(f"Using enhanced rule-based prediction for {len(panels)} panels (models not loaded)")
+        return _rule_based_prediction_panels(panels)
+
+    try:
+        live = _live_features(*_panel_columns(panels), _panel_ages(panels))
+
+        # 1. Global prediction over the whole batch
+        pred_global = _predict(model_global, GLOBAL_LAYOUT.matrix(live))
+
+        results: List[Tuple[str, int, str]] = [
+            ("Low risk", 85, "No significant liver disease detected. Continue routine monitoring.")
+        ] * len(panels)
+
+        # 2. Specialized predictions, only for the rows flagged as diseased
+        diseased = np.flatnonzero(pred_global != 0)
+        print(f"Global Model flagged {len(diseased)}/{len(panels)} panels")
+        if len(diseased):
+            live_diseased = tuple(column[diseased] for column in live)
+            pred_hep = _predict(model_hep, HEP_LAYOUT.matrix(live_diseased))
+            pred_cirr = _predict(model_cirr, CIRR_LAYOUT.matrix(live_diseased))
+            for row, hep, cirr in zip(diseased, pred_hep, pred_cirr):
+                results[row] = _specialist_diagnosis(hep, cirr)
+
+        return results
+
+    except Exception as e:
+        error_msg = f"ML prediction error: {str(e)}"
+        print(f"Error: {error_msg}")
+        print(f"Falling back to enhanced rule-based prediction for {len(panels)} panels")
+        return [
+            (diagnosis, confidence, advice + f" [DEBUG: {error_msg}]")
+            for diagnosis, confidence, advice in _rule_based_prediction_panels(panels)
+        ]
+
+def _panel_columns(panels: List[Dict]) -> Tuple:
+    """ALT, AST, bilirubin and GGT of every panel as float64 arrays"""
+    return tuple(np.array([panel[key] for panel in panels], dtype=np.float64) for key in ('alt', 'ast', 'bilirubin', 'ggt'))
+
+def _panel_ages(panels: List[Dict]) -> "np.ndarray":
+    """Age of every panel as a float64 array, the default where a panel has none"""
+    return np.array([panel.get('age', _FEATURE_DEFAULTS['Age']) for panel in panels], dtype=np.float64)
+
+def _rule_based_prediction_panels(panels: List[Dict]) -> List[Tuple[str, int, str]]:
+    """Rule-based prediction for a list of panels, vectorized when numpy is available"""
+    if not ML_AVAILABLE:
+        return [_enhanced_rule_based_prediction(**panel) for panel in panels]
+    return rule_based_prediction_batch(*_panel_columns(panels))
+
+def _specialist_diagnosis(pred_hep, pred_cirr) -> Tuple[str, int, str]:
+    """Combine the Hepatitis C and Cirrhosis predictions of a diseased panel"""
+    # If Hepatitis C detected
+    if pred_hep > 0:  # Hepatitis detected
+        stage = int(pred_hep)
+        diagnosis = f"Hepatitis C (Stage {stage})"
+        confidence = 90
+        advice = f"Hepatitis C detected at stage {stage}. Immediate specialist consultation required."
+
+    # If Cirrhosis detected
+    elif pred_cirr > 0:  # Cirrhosis detected
+        stage = int(pred_cirr)
+        diagnosis = f"Liver Cirrhosis (Stage {stage})"
+        confidence = 85
+        advice = f"Liver cirrhosis detected at stage {stage}. Urgent hepatologist consultation needed."
+
+    # If global model detected disease but specialized models didn't
+    else:
+        diagnosis = "Liver Disease Detected"
+        confidence = 75
+        advice = "Liver disease indicated but specific type unclear. Further diagnostic tests recommended."
+
+    return diagnosis, confidence, advice
+
 def _enhanced_rule_based_prediction(alt: float, ast: float, bilirubin: float, ggt: float, age: float = 45, gender: str = 'male', alkphos: float = 100, tp: float = 7.0, alb: float = 4.0) -> Tuple[str, int, str]:
     """Enhanced rule-based prediction with specific medical diagnoses"""
 
@@ -230,4 +409,61 @@ def _enhanced_rule_based_prediction(alt: float, ast: float, bilirubin: float, gg
 
     # Normal results
     else:
-        return "Normal Liver Function", 95, "All liver function tests within normal ranges. Continue routine health monitoring and healthy lifestyle."
\ No newline at end of file
+        return "Normal Liver Function", 95, "All liver function tests within normal ranges. Continue routine health monitoring and healthy lifestyle."
+
+# Outcomes of the _enhanced_rule_based_prediction ladder in priority order;
+# {stage} is filled in for the two staged diagnoses
+_RULE_OUTCOMES = (
+    ("Hepatitis C (Stage {stage})", 88, "Hepatitis C detected at stage {stage}. Immediate specialist consultation required. Consider viral load testing and liver biopsy if indicated."),
+    ("Liver Cirrhosis (Stage {stage})", 85, "Liver cirrhosis detected at stage {stage}. Urgent hepatologist consultation needed. Evaluate for varices, ascites, and hepatocellular carcinoma screening."),
+    ("Cholestasis", 82, "Evidence of bile duct obstruction or cholestasis. Further investigation required including abdominal ultrasound and liver biopsy if indicated."),
+    ("Acute Hepatitis", 90, "Signs of acute hepatitis. Immediate medical attention required. Rule out viral hepatitis, drug-induced liver injury, and autoimmune hepatitis."),
+    ("Drug-Induced Liver Injury", 80, "Possible drug-induced liver injury. Review medications and consult hepatologist immediately."),
+    ("NAFLD", 75, "Suspected non-alcoholic fatty liver disease. Lifestyle modification recommended including weight loss, exercise, and dietary changes."),
+    ("Liver Disease Detected", 78, "Liver function abnormalities detected. Further evaluation required including detailed history, additional tests, and specialist consultation."),
+    ("Mild Liver Enzyme Elevation", 65, "Mild liver enzyme elevations detected. Monitor with repeat testing in 2-4 weeks. Review medications and alcohol intake."),
+    ("Normal Liver Function", 95, "All liver function tests within normal ranges. Continue routine health monitoring and healthy lifestyle."),
+)
+
+def rule_based_prediction_batch(alt, ast, bilirubin, ggt) -> List[Tuple[str, int, str]]:
+    """
+    Vectorized _enhanced_rule_based_prediction over arrays of panels
+
+    Every rule of the ladder is evaluated as a boolean mask over the whole
+    batch; np.select picks the first matching rule per row, so the priority
+    order is the scalar function's. Results are identical to calling the
+    scalar function on each panel, without its per-row logging.
+
+    Args:
+        alt, ast, bilirubin, ggt: Equal-length arrays (or sequences) of lab values
+
+    Returns:
+        List of (diagnosis, confidence, advice) tuples in input order
+    """
+    alt, ast, bilirubin, ggt = (np.asarray(column, dtype=np.float64) for column in (alt, ast, bilirubin, ggt))
+    ratio = np.divide(alt, ast, out=np.zeros_like(alt), where=ast > 0)
+
+    rules = [
+        (alt > 80) & (ast < 120) & (ggt > 60) & (ratio >= 1.5),               # Hepatitis C
+        (ast > alt) & (bilirubin > 2.0) & (ratio < 0.8),                      # Cirrhosis
+        (ggt > 100) & (bilirubin > 1.5),                                      # Cholestasis
+        ((alt > 200) | (ast > 200)) & (bilirubin > 2.0),                      # Acute hepatitis
+        (alt > 150) & (ast > 150) & (ratio < 5),                              # Drug-induced liver injury
+        (ratio > 2.0) & (alt < 150) & (ast < 100) & (ggt < 80),               # NAFLD
+        (alt > 100) | (ast > 100) | (bilirubin > 2.0) | (ggt > 80),           # General liver disease
+        (alt > 40) | (ast > 40) | (bilirubin > 1.2) | (ggt > 50),             # Mild elevation
+    ]
+    outcome = np.select(rules, range(len(rules)), default=len(rules))
+
+    with np.errstate(invalid='ignore'):
+        hep_stage = np.clip(np.trunc((alt - 80) / 40) + 1, 1, 4)
+        cirr_stage = np.clip(np.trunc(bilirubin / 0.8), 1, 4)
+    stage = np.where(outcome == 0, hep_stage, np.where(outcome == 1, cirr_stage, 0)).astype(np.int64)
+
+    results = []
+    for index, row_stage in zip(outcome.tolist(), stage.tolist()):
+        diagnosis, confidence, advice = _RULE_OUTCOMES[index]
+        if index < 2:
+            diagnosis, advice = diagnosis.format(stage=row_stage), advice.format(stage=row_stage)
+        results.append((diagnosis, confidence, advice))
+    return results
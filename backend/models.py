@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -9,7 +9,8 @@ class Patient(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     patient_id = Column(String(50), unique=True, nullable=False)
-    birth_date = Column(String(10), nullable=True)  # Store as string YYYY-MM-DD
+    birth_date = Column(Date, nullable=True)
+    birth_date_raw = Column(String(10), nullable=True)  # A text birth date the DATE migration could not parse; kept to be corrected
     email = Column(String(255), nullable=True)
     phone = Column(String(20), nullable=True)
     profile_picture = Column(String(500), nullable=True)  # URL or path to profile picture
@@ -22,6 +23,58 @@ class Patient(Base):
     lab_tests = relationship("LabTest", back_populates="patient", cascade="all, delete-orphan")
     medical_reports = relationship("MedicalReport", back_populates="patient", cascade="all, delete-orphan")
 
+    # Keyset pagination and list filters (GET /patients)
+    __table_args__ = (
+        Index("ix_patients_created_at_id", "created_at", "id"),
+        Index("ix_patients_department_created_at_id", "department", "created_at", "id"),
+        Index("ix_patients_doctor_name_created_at_id", "doctor_name", "created_at", "id"),
+        # Age bands (GET /patients?age_min=&age_max=, see patient_age.py)
+        Index("ix_patients_birth_date", "birth_date"),
+    )
+
+# Patient search (GET /patients/search, see patient_search.py): an FTS5 table on SQLite, kept in sync by
+# triggers, and a trigram index over the same columns on Postgres. Created with the table here and by migration
+# f6a8b0d2c315 on existing databases.
+PATIENT_SEARCH_COLUMNS = ("name", "patient_id", "email", "phone", "department", "doctor_name")
+PATIENT_SEARCH_DOCUMENT = " || ' ' || ".join(f"coalesce({column}, '')" for column in PATIENT_SEARCH_COLUMNS)
+# Longest prefix the FTS5 table keeps an index for
+PATIENT_SEARCH_PREFIX_MAX = 6
+
+def _patient_search_sqlite_ddl():
+    columns = ", ".join(PATIENT_SEARCH_COLUMNS)
+    new = ", ".join(f"new.{column}" for column in PATIENT_SEARCH_COLUMNS)
+    old = ", ".join(f"old.{column}" for column in PATIENT_SEARCH_COLUMNS)
+    prefixes = " ".join(str(length) for length in range(1, PATIENT_SEARCH_PREFIX_MAX + 1))
+    return [
+        # External content: the index stores no copy of the rows. Prefix indexes answer short prefixes from one
+        # list instead of merging the lists of every word that starts with them
+        f"CREATE VIRTUAL TABLE patients_fts USING fts5({columns}, content='patients', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='{prefixes}')",
+        f"CREATE TRIGGER patients_fts_insert AFTER INSERT ON patients BEGIN "
+        f"INSERT INTO patients_fts(rowid, {columns}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER patients_fts_delete AFTER DELETE ON patients BEGIN "
+        f"INSERT INTO patients_fts(patients_fts, rowid, {columns}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER patients_fts_update AFTER UPDATE OF {columns} ON patients BEGIN "
+        f"INSERT INTO patients_fts(patients_fts, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO patients_fts(rowid, {columns}) VALUES (new.id, {new}); END",
+    ]
+
+PATIENT_SEARCH_DDL = {
+    "sqlite": _patient_search_sqlite_ddl(),
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX ix_patients_search_trgm ON patients USING gin (({PATIENT_SEARCH_DOCUMENT}) gin_trgm_ops)",
+    ],
+}
+
+for _dialect, _statements in PATIENT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Patient.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Patient.__table__, "before_drop", DDL("DROP TABLE IF EXISTS patients_fts").execute_if(dialect="sqlite"))
+
+# Values of lab_tests.status
+LAB_TEST_STATUSES = ("normal", "high", "low", "critical")
+
 class LabTest(Base):
     __tablename__ = "lab_tests"
 
@@ -31,13 +84,18 @@ class LabTest(Base):
     value = Column(Float, nullable=False)
     unit = Column(String(50), nullable=False)
     normal_range = Column(String(100), nullable=False)
-    status = Column(String(20), nullable=False)  # normal, high, low, critical
+    status = Column(String(20), nullable=False)  # One of LAB_TEST_STATUSES
     date = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     patient = relationship("Patient", back_populates="lab_tests")
 
+    # Keyset pagination of a patient's tests (GET /lab-tests)
+    __table_args__ = (
+        Index("ix_lab_tests_patient_id_date_id", "patient_id", "date", "id"),
+    )
+
 class MedicalReport(Base):
     __tablename__ = "medical_reports"
 
@@ -46,11 +104,20 @@ class MedicalReport(Base):
     diagnosis = Column(String(500), nullable=False)
     confidence = Column(Float, nullable=False)  # 0-100
     advice = Column(Text, nullable=False)
+    model_version = Column(String(64), nullable=True)  # Model fingerprint, set by re-scoring jobs
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     patient = relationship("Patient", back_populates="medical_reports")
 
+    # Keyset pagination and list filters (GET /patient-analyses), re-scoring progress (rescore.resume_point)
+    __table_args__ = (
+        Index("ix_medical_reports_created_at_id", "created_at", "id"),
+        Index("ix_medical_reports_diagnosis_created_at_id", "diagnosis", "created_at", "id"),
+        Index("ix_medical_reports_patient_id_created_at_id", "patient_id", "created_at", "id"),
+        Index("ix_medical_reports_model_version_patient_id", "model_version", "patient_id"),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
@@ -59,4 +126,28 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     role = Column(String(20), nullable=False, default="user")  # admin, doctor, user
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Tables whose writes are counted in table_versions (see table_versions.py)
+VERSIONED_TABLES = ("patients", "lab_tests", "medical_reports")
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped in the transaction of every write to the table
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+event.listen(TableVersion.__table__, "after_create", DDL(
+    "INSERT INTO table_versions (table_name, version) VALUES "
+    + ", ".join(f"('{name}', 0)" for name in VERSIONED_TABLES)
+))
+
+class StatCount(Base):
+    __tablename__ = "stat_counts"
+
+    # Dashboard counts (GET /stats, see dashboard_stats.py): rows of one table per group of one dimension,
+    # e.g. ("patients.department", "Hepatology"). Missing values are grouped under ''
+    dimension = Column(String(64), primary_key=True)
+    group_key = Column(String(500), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)  # Changed in the transaction of every write to the table
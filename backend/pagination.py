@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are ordered newest first on (timestamp, id). A page ends with an
+opaque cursor holding the last row's key; the next page starts strictly
+after it with an indexable range condition, so fetching page 1,000 costs
+the same as fetching page 1.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Select, String, and_, cast, desc, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(timestamp: datetime, row_id: int, stored: Optional[str] = None) -> str:
+    key = [timestamp.isoformat(), row_id] + ([stored] if stored is not None else [])
+    payload = json.dumps(key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, Optional[str]]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(key, list) or len(key) not in (2, 3):
+            raise ValueError("unexpected cursor payload")
+        stored = str(key[2]) if len(key) == 3 else None
+        return datetime.fromisoformat(key[0]), int(key[1]), stored
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _stored_forms(value: datetime, dialect: str) -> List:
+    """
+    Bind values the database may hold for the instant `value`, lowest first
+
+    SQLite keeps DateTime columns as text: server defaults (CURRENT_TIMESTAMP)
+    are written as 'YYYY-MM-DD HH:MM:SS' while SQLAlchemy writes and binds
+    'YYYY-MM-DD HH:MM:SS.ffffff', so a whole-second instant has two spellings.
+    """
+    if dialect != "sqlite" or value.microsecond:
+        return [value]
+    short = value.strftime("%Y-%m-%d %H:%M:%S")
+    return [literal(short, String), literal(short + ".000000", String)]
+
+
+def at_or_after(column, value: datetime, dialect: str):
+    return column >= _stored_forms(value, dialect)[0]
+
+
+def at_or_before(column, value: datetime, dialect: str):
+    return column <= _stored_forms(value, dialect)[-1]
+
+
+async def _stored_text(db: AsyncSession, column, id_column, timestamp: datetime, row_id: int, dialect: str) -> Optional[str]:
+    """
+    The text SQLite holds for a row's whole-second timestamp, None where binding the value is exact
+
+    SQLite orders the column as text, so all '... HH:MM:SS.000000' rows come
+    before all '... HH:MM:SS' rows of the same second; a cursor on such a row
+    has to remember which of the two it was.
+    """
+    if dialect != "sqlite" or timestamp.microsecond:
+        return None
+    return await db.scalar(select(cast(column, String)).where(id_column == row_id))
+
+
+def _after_cursor(column, id_column, timestamp: datetime, row_id: int, stored: Optional[str]):
+    """Rows that come after (timestamp, row_id) in newest-first order"""
+    value = literal(stored, String) if stored is not None else timestamp
+    # Same as col < value OR (col = value AND id < row_id), but written with a range on the
+    # leading column so the planner walks the (col, id) index instead of OR-ing and re-sorting
+    return and_(column <= value, or_(column < value, id_column < row_id))
+
+
+async def keyset_page(db: AsyncSession, statement: Select, column, id_column, key: Callable, limit: int, cursor: Optional[str],
+                      dialect: str) -> Tuple[list, Optional[str]]:
+    """
+    One newest-first page of statement's result rows
+
+    Args:
+        db: Session to run the statement in
+        statement: Filtered select(), without ordering or limit
+        column, id_column: Timestamp (never NULL) and id columns the pages are keyed on
+        key: Returns (timestamp, id) of a result row
+        limit: Page size
+        cursor: Cursor returned with the previous page, or None for the first page
+
+    Returns:
+        (rows, cursor of the next page or None on the last page)
+    """
+    statement = statement.order_by(desc(column), desc(id_column))
+    if cursor:
+        statement = statement.where(_after_cursor(column, id_column, *decode_cursor(cursor)))
+    rows = (await db.execute(statement.limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    timestamp, row_id = key(rows[-1])
+    return rows, encode_cursor(timestamp, row_id, await _stored_text(db, column, id_column, timestamp, row_id, dialect))
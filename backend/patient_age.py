@@ -0,0 +1,54 @@
+"""
+Patient ages from patients.birth_date (a DATE column, indexed).
+
+An age band is turned into a range of birth dates, so GET
+/patients?age_min=&age_max= filters with an index range scan instead of
+computing every patient's age. Ages are whole years on a given day; a
+patient born on 29 February turns a year older on 1 March in common
+years.
+"""
+
+from datetime import date
+from typing import Optional, Tuple
+
+BIRTH_DATE_FORMAT = "YYYY-MM-DD"
+
+
+def parse_birth_date(value, today: Optional[date] = None) -> Optional[date]:
+    """date of a submitted YYYY-MM-DD birth date; None for an empty value, ValueError for anything else or a day after today"""
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str) or len(value) != 10:
+        raise ValueError(f"birth_date must be a date as {BIRTH_DATE_FORMAT}")
+    try:
+        birth_date = date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"birth_date must be a date as {BIRTH_DATE_FORMAT}") from None
+    if birth_date > (today or date.today()):
+        raise ValueError("birth_date is in the future")
+    return birth_date
+
+
+def age_on(birth_date: date, day: date) -> int:
+    """Completed years between birth_date and day"""
+    return day.year - birth_date.year - ((day.month, day.day) < (birth_date.month, birth_date.day))
+
+
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        # 29 February in a common year: nobody is born on the day that does not exist, so the 28th bounds the same set
+        return day.replace(year=day.year - years, day=28)
+
+
+def birth_date_range(age_min: Optional[int], age_max: Optional[int], day: date) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Birth dates of the patients aged age_min to age_max (inclusive) on day
+
+    Returns:
+        (after, at_or_before): birth_date > after and birth_date <= at_or_before; None where unbounded
+    """
+    after = _years_before(day, age_max + 1) if age_max is not None else None
+    at_or_before = _years_before(day, age_min) if age_min is not None else None
+    return after, at_or_before
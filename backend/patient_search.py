@@ -0,0 +1,159 @@
+"""
+Ranked full-text search over patients.
+
+Every word of the query must match a word of the patient's name,
+patient_id, email, phone, department or doctor_name, as a prefix: "jo smi"
+finds "John Smith". The index (see models.py) finds the matching patients:
+the patients_fts FTS5 table on SQLite, the pg_trgm index over the same
+columns on Postgres, a LIKE scan elsewhere.
+
+The newest SEARCH_CANDIDATES matches are then ranked here, the same way on
+every database: a query word scores the weight of the best column it
+matches, double for a whole word rather than a prefix, and the patients
+with the highest total come first. Fetching a bounded set of candidates in
+id order lets the index stop early, so a broad query such as "a" costs
+about as much as a narrow one; the price is that such a query ranks only
+its newest matches.
+
+FTS5 answers a prefix of up to PATIENT_SEARCH_PREFIX_MAX characters from
+its prefix index; a longer one merges the lists of every indexed word that
+starts with it ("ibrahim" is the start of a million "ibrahim123" emails).
+A longer word is therefore looked up by its indexed prefix and checked
+here. When the check rejects most candidates, the indexed prefix was not
+selective ("yousef" for "yousef254531"), which is when the whole word is,
+and the search is repeated with whole words.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, column, desc, literal_column, or_, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import PATIENT_SEARCH_COLUMNS, PATIENT_SEARCH_DOCUMENT, PATIENT_SEARCH_PREFIX_MAX, Patient
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Matches fetched for ranking, newest first
+SEARCH_CANDIDATES = 200
+
+# Score of a prefix match in each of PATIENT_SEARCH_COLUMNS; a whole-word match scores double
+SEARCH_WEIGHTS = {"name": 10, "patient_id": 10, "email": 4, "phone": 4, "department": 1, "doctor_name": 2}
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Default select list of the search: every patients column
+PATIENT_COLUMNS = list(Patient.__table__.columns)
+
+# The FTS5 table; its rowid is patients.id
+_FTS = table("patients_fts", column("rowid"))
+
+
+def _fold(text: str) -> str:
+    text = text.lower()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return text
+
+
+def search_terms(text: str) -> List[str]:
+    """Words of text as the FTS5 unicode61 tokenizer sees them: lower case, without diacritics"""
+    return _WORD.findall(_fold(text))
+
+
+def fts_match(terms: List[str], prefix_max: Optional[int] = PATIENT_SEARCH_PREFIX_MAX) -> str:
+    """FTS5 MATCH expression requiring every term, cut to prefix_max, as a prefix; quoting keeps FTS5 operators out"""
+    return " ".join(f'"{term[:prefix_max]}"*' for term in terms)
+
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _sqlite_candidates(terms: List[str], prefix_max: Optional[int] = PATIENT_SEARCH_PREFIX_MAX,
+                       columns: Sequence = PATIENT_COLUMNS):
+    return (
+        select(*columns)
+        .select_from(_FTS)
+        .join(Patient, Patient.id == _FTS.c.rowid)
+        .where(text("patients_fts MATCH :match").bindparams(match=fts_match(terms, prefix_max)))
+        .order_by(desc(_FTS.c.rowid))
+    )
+
+
+def _postgres_candidates(terms: List[str], columns: Sequence = PATIENT_COLUMNS):
+    # The expression the trigram index is built on, so the planner can use it
+    document = literal_column(f"({PATIENT_SEARCH_DOCUMENT})")
+    return (
+        select(*columns)
+        # A case-insensitive match at a word start (\m); terms are letters and digits only
+        .where(and_(*(document.regexp_match(r"\m" + term, flags="i") for term in terms)))
+        .order_by(desc(Patient.id))
+    )
+
+
+def _like_candidates(terms: List[str], columns: Sequence = PATIENT_COLUMNS):
+    searched = [getattr(Patient, name) for name in PATIENT_SEARCH_COLUMNS]
+    return (
+        select(*columns)
+        .where(and_(*(or_(*(c.ilike(_like_pattern(term), escape="\\") for c in searched)) for term in terms)))
+        .order_by(desc(Patient.id))
+    )
+
+
+def score(row, terms: List[str]) -> int:
+    """Sum over terms of the weight of the best column the term matches; 0 unless every term matches"""
+    columns = [(weight, _fold(getattr(row, name) or "")) for name, weight in SEARCH_WEIGHTS.items()]
+    total = 0
+    for term in terms:
+        best = 0
+        for weight, text in columns:
+            # Split into words only the columns that can match, and can beat the best so far
+            if 2 * weight <= best or term not in text:
+                continue
+            for word in _WORD.findall(text):
+                if word == term:
+                    best = max(best, 2 * weight)
+                elif word.startswith(term):
+                    best = max(best, weight)
+        if not best:
+            return 0
+        total += best
+    return total
+
+
+def _matches(rows, terms: List[str]) -> List[Tuple[int, object]]:
+    """(score, row) of the rows matching every term"""
+    scored = ((score(row, terms), row) for row in rows)
+    return [(points, row) for points, row in scored if points]
+
+
+async def _search(db: AsyncSession, terms: List[str], columns: Sequence) -> List[Tuple[int, object]]:
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        candidates = _postgres_candidates(terms, columns)
+    elif dialect != "sqlite":
+        candidates = _like_candidates(terms, columns)
+    else:
+        rows = (await db.execute(_sqlite_candidates(terms, columns=columns).limit(SEARCH_CANDIDATES))).all()
+        matches = _matches(rows, terms)
+        if len(matches) * 2 >= len(rows) or all(len(term) <= PATIENT_SEARCH_PREFIX_MAX for term in terms):
+            return matches
+        candidates = _sqlite_candidates(terms, prefix_max=None, columns=columns)
+    return _matches((await db.execute(candidates.limit(SEARCH_CANDIDATES))).all(), terms)
+
+
+async def search_patients(db: AsyncSession, query: str, limit: int = DEFAULT_SEARCH_LIMIT,
+                          columns: Sequence = PATIENT_COLUMNS) -> List:
+    """
+    Rows of the patients matching every word of query, best match first
+
+    columns is the select list; it must include id and the SEARCH_WEIGHTS columns under their own names.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    matches = await _search(db, terms, columns)
+    matches.sort(key=lambda match: (-match[0], -match[1].id))
+    return [row for _, row in matches[:limit]]
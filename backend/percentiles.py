@@ -0,0 +1,11 @@
+"""
+Latency percentiles for the /metrics counters and the bench_*.py scripts.
+"""
+
+from typing import Sequence
+
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    """Nearest-rank p-th percentile of samples (the sample at rank floor(p% of n))"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
@@ -1,5 +1,6 @@
 from database import get_db, engine, Base
 from models import Patient
+from table_versions import bump_statement
 from sqlalchemy.orm import Session
 
 Base.metadata.create_all(bind=engine)
@@ -41,6 +42,7 @@ def populate_departments():
 
             print(f'Updated {patient.name}: Department={department}, Doctor={doctor}')
 
+        db.execute(bump_statement("patients"))
         db.commit()
         print(f'Successfully updated {len(patients)} patients')
 
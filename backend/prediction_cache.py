@@ -0,0 +1,145 @@
+"""
+LRU + TTL cache in front of predict_liver_disease.
+
+Repeated /analyze calls (dashboard re-submissions, retries, the same panel
+copied between departments) are answered from memory. Entries are keyed on
+the lab panel rounded to lab-report precision plus the fingerprint of the
+loaded model files, so loading different models invalidates the cache.
+Callers score the same rounded panel (canonical_panel) they look up, so
+two panels that share an entry also share a prediction.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Decimal places each lab value is reported with; finer differences are noise
+_LAB_PRECISION = (
+    ('alt', 1),
+    ('ast', 1),
+    ('bilirubin', 2),
+    ('ggt', 1),
+    ('age', 0),
+    ('alkphos', 1),
+    ('tp', 1),
+    ('alb', 1),
+)
+
+
+def canonical_panel(panel: Dict) -> Dict:
+    """The panel as it is cached and scored: lab values rounded to report precision, gender in lower case"""
+    canonical = dict(panel)
+    for name, digits in _LAB_PRECISION:
+        canonical[name] = round(float(panel[name]), digits)
+    canonical['gender'] = str(panel.get('gender', 'male')).strip().lower()
+    return canonical
+
+
+def panel_key(panel: Dict) -> Tuple:
+    """Canonical form of a predict_liver_disease panel"""
+    values = tuple(round(float(panel[name]), digits) for name, digits in _LAB_PRECISION)
+    return values + (str(panel.get('gender', 'male')).strip().lower(),)
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of (diagnosis, confidence, advice) results with a TTL
+
+    Args:
+        fingerprint: Returns the fingerprint of the currently loaded models;
+                     when it changes, every cached entry is dropped
+        max_entries: Maximum number of cached panels; 0 disables the cache
+        ttl_seconds: Lifetime of an entry
+    """
+
+    def __init__(self, fingerprint: Callable[[], str], max_entries: int = 4096, ttl_seconds: float = 3600.0):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _key(self, panel: Dict) -> Tuple:
+        fingerprint = self.fingerprint()
+        if fingerprint != self._fingerprint:
+            # Different models were loaded: nothing cached so far is valid
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._fingerprint = fingerprint
+        return (fingerprint,) + panel_key(panel)
+
+    def get(self, panel: Dict) -> Optional[Tuple[str, int, str]]:
+        """Cached result for the panel, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            key = self._key(panel)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, result = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, panel: Dict, result: Tuple[str, int, str]):
+        """Store the result computed for a panel"""
+        if not self.enabled:
+            return
+        with self._lock:
+            key = self._key(panel)
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "entries": len(self._entries),
+            "model_fingerprint": self._fingerprint,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def cache_from_env(fingerprint: Callable[[], str]) -> PredictionCache:
+    """PredictionCache configured by PREDICTION_CACHE_SIZE and PREDICTION_CACHE_TTL_S"""
+    return PredictionCache(
+        fingerprint,
+        max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "4096")),
+        ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL_S", "3600")),
+    )
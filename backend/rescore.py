@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Bulk re-scoring of historical lab panels with the currently deployed models.
+
+Lab tests are grouped into one panel per patient and day. They are read in
+chunks of whole patients, each chunk through a server-side cursor, and
+scored with the batched cascade across a process pool. The results are
+bulk-inserted as new MedicalReport rows tagged with the model fingerprint.
+
+Each chunk's reports are committed in one transaction, and patients are
+processed in id order, so the newest tagged report marks how far the job
+got: an interrupted run resumes after that patient on the next start.
+
+Usage:
+    python rescore.py [--chunk-size PATIENTS] [--workers N] [--restart]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dotenv import load_dotenv
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+import model
+from models import LabTest, MedicalReport
+from dashboard_stats import apply_parameters, apply_statement, tally
+from table_versions import bump_statement
+
+# Load environment variables
+load_dotenv()
+
+# Lab test names that feed a panel, and the predict_liver_disease argument each one sets
+PANEL_TESTS = {
+    'ALT': 'alt',
+    'AST': 'ast',
+    'Bilirubin': 'bilirubin',
+    'GGT': 'ggt',
+    'Albumin': 'alb',
+    'ALB': 'alb',
+    'AlkPhos': 'alkphos',
+    'TP': 'tp',
+}
+# A panel needs at least one of these to be worth scoring
+_CORE_ARGS = ('alt', 'ast', 'bilirubin', 'ggt')
+# Same defaults /analyze applies to values missing from a submitted panel
+PANEL_DEFAULTS = {
+    'alt': 0.0, 'ast': 0.0, 'bilirubin': 0.0, 'ggt': 0.0,
+    'age': 45.0, 'gender': 'male', 'alkphos': 100.0, 'tp': 7.0, 'alb': 4.0,
+}
+
+
+def resume_point(engine: Engine, model_version: str) -> int:
+    """Highest patient id already re-scored with this model version (0 if none)"""
+    with engine.connect() as connection:
+        last = connection.execute(
+            select(func.max(MedicalReport.patient_id)).where(MedicalReport.model_version == model_version)
+        ).scalar()
+    return last or 0
+
+
+def read_chunk(engine: Engine, after_patient_id: int, chunk_size: int, yield_per: int = 10000) -> Tuple[Optional[int], List[int], List[Dict]]:
+    """
+    Panels of the next chunk_size patients with lab tests, after after_patient_id
+
+    Returns:
+        (last patient id of the chunk or None when there are no more patients,
+         patient id of each panel, panel keyword arguments) in patient id order
+    """
+    with engine.connect() as connection:
+        patient_ids = connection.execute(
+            select(LabTest.patient_id)
+            .where(LabTest.patient_id > after_patient_id, LabTest.test_name.in_(PANEL_TESTS))
+            .group_by(LabTest.patient_id)
+            .order_by(LabTest.patient_id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not patient_ids:
+            return None, [], []
+
+        rows = connection.execution_options(stream_results=True, yield_per=yield_per).execute(
+            select(LabTest.patient_id, LabTest.test_name, LabTest.value, LabTest.date)
+            .where(LabTest.patient_id.between(patient_ids[0], patient_ids[-1]), LabTest.test_name.in_(PANEL_TESTS))
+            .order_by(LabTest.patient_id, LabTest.date, LabTest.id)
+        )
+        owners, panels = [], []
+        for (patient_id, _), tests in groupby(rows, key=lambda row: (row.patient_id, row.date.date())):
+            panel = dict(PANEL_DEFAULTS)
+            present = set()
+            for test in tests:
+                # Tests are in date order, so a repeated test keeps its latest value of the day
+                panel[PANEL_TESTS[test.test_name]] = float(test.value)
+                present.add(PANEL_TESTS[test.test_name])
+            if present.intersection(_CORE_ARGS):
+                owners.append(patient_id)
+                panels.append(panel)
+        return patient_ids[-1], owners, panels
+
+
+def iter_chunks(engine: Engine, after_patient_id: int, chunk_size: int) -> Iterator[Tuple[int, List[int], List[Dict]]]:
+    """(last patient id, panel owners, panels) for every chunk after after_patient_id"""
+    while True:
+        last_patient, owners, panels = read_chunk(engine, after_patient_id, chunk_size)
+        if last_patient is None:
+            return
+        yield last_patient, owners, panels
+        after_patient_id = last_patient
+
+
+def write_reports(engine: Engine, owners: List[int], predictions: List[Tuple[str, int, str]], model_version: str):
+    """Insert one MedicalReport per scored panel, and count them in stat_counts, in a single transaction"""
+    reports = [
+        {
+            "patient_id": patient_id,
+            "diagnosis": diagnosis,
+            "confidence": float(confidence),
+            "advice": advice,
+            "model_version": model_version,
+        }
+        for patient_id, (diagnosis, confidence, advice) in zip(owners, predictions)
+    ]
+    with engine.begin() as connection:
+        inserted = connection.execute(insert(MedicalReport).returning(MedicalReport.diagnosis, MedicalReport.created_at), reports)
+        changes = {}
+        for report in inserted:
+            tally(changes, "analyses", report)
+        connection.execute(apply_statement(connection.dialect.name), apply_parameters(changes))
+        connection.execute(bump_statement("medical_reports"))
+
+
+def _init_worker():
+    model.warm_up()
+
+
+def rescore(engine: Engine, chunk_size: int = 2000, workers: int = 0, restart: bool = False, max_chunks: Optional[int] = None) -> Dict:
+    """
+    Re-score every lab panel not yet scored by the current model version
+
+    Args:
+        engine: Database to read lab tests from and write reports to
+        chunk_size: Patients per chunk (one read, one predict job, one insert)
+        workers: Scoring processes; 0 scores in this process
+        restart: Ignore earlier progress of this model version and start over
+        max_chunks: Stop after this many chunks (the next run resumes)
+
+    Returns:
+        Counters of the run: model_version, resumed_after, chunks, panels, seconds
+    """
+    model_version = model.model_fingerprint()
+    after = 0 if restart else resume_point(engine, model_version)
+    print(f"Re-scoring with model version {model_version}, starting after patient id {after}")
+
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+
+    stats = {"model_version": model_version, "resumed_after": after, "chunks": 0, "panels": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    # Chunks are scored concurrently but written in order, so progress stays a prefix of patient ids
+    in_flight = deque()
+
+    def write_oldest():
+        last_patient, owners, scoring = in_flight.popleft()
+        predictions = scoring.result() if executor is not None else scoring
+        write_reports(engine, owners, predictions, model_version)
+        stats["chunks"] += 1
+        stats["panels"] += len(owners)
+        elapsed = time.perf_counter() - start
+        print(f"Chunk {stats['chunks']}: {len(owners)} panels up to patient id {last_patient}, "
+              f"{stats['panels'] / elapsed * 60:,.0f} panels/min")
+
+    try:
+        for index, (last_patient, owners, panels) in enumerate(iter_chunks(engine, after, chunk_size)):
+            if max_chunks is not None and index >= max_chunks:
+                break
+            if not panels:
+                continue
+            if executor is not None:
+                scoring = executor.submit(model.predict_liver_disease_batch, panels)
+            else:
+                scoring = model.predict_liver_disease_batch(panels)
+            in_flight.append((last_patient, owners, scoring))
+            if len(in_flight) > max(1, 2 * workers):
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    rate = stats["panels"] / stats["seconds"] * 60 if stats["seconds"] else 0
+    print(f"Re-scored {stats['panels']} panels in {stats['chunks']} chunks, {stats['seconds']}s ({rate:,.0f} panels/min)")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score historical lab panels with the current models")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="patients per chunk")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="scoring processes (0: in-process)")
+    parser.add_argument("--restart", action="store_true", help="ignore earlier progress of this model version")
+    args = parser.parse_args()
+
+    from database import engine
+    rescore(engine, chunk_size=args.chunk_size, workers=args.workers, restart=args.restart)
@@ -0,0 +1,59 @@
+"""
+Row-to-JSON serialization for the hot read endpoints.
+
+A RowSerializer is built once per response row shape from (JSON key,
+column) pairs. Its columns are the select list, in key order, so a result
+row converts to its JSON object with one dict(zip(keys, row)), and no
+per-field Python code runs. Datetimes are left as they are and encoded
+by orjson, which writes the same ISO 8601 text as isoformat().
+
+Endpoints return dumps() of their payload in a Response themselves, so
+FastAPI's jsonable_encoder does not walk every row again. Without orjson
+installed, the standard json module does the encoding, more slowly.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Sequence, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("Warning: orjson not available, encoding responses with json")
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON bytes of payload; datetimes as isoformat() text"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class RowSerializer:
+    """
+    The select list of a response row shape and the conversion of its rows to dicts
+
+    Args:
+        fields: (JSON key, column) pairs, in response order
+        extra: Columns selected after the fields and left out of the JSON (e.g. a pagination key)
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, Any]], extra: Sequence = ()):
+        self.fields = list(fields)
+        self.keys = tuple(key for key, _ in fields)
+        self.columns = [column.label(key) for key, column in fields] + list(extra)
+
+    def dicts(self, rows: Iterable) -> List[dict]:
+        keys = self.keys
+        # zip stops at the last key, before any extra columns
+        return [dict(zip(keys, row)) for row in rows]
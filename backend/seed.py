@@ -14,6 +14,8 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from database import SessionLocal, engine, Base
 from models import Patient, LabTest, MedicalReport, User
+from table_versions import bump_statement
+from dashboard_stats import rebuild as rebuild_stats
 
 # Load environment variables
 load_dotenv()
@@ -40,27 +42,27 @@ def seed_database():
         patients_data = [
             {
                 "name": "John Smith",
-                "birth_date": (datetime.now() - timedelta(days=45*365)).strftime('%Y-%m-%d'),
+                "birth_date": (datetime.now() - timedelta(days=45*365)).date(),
                 "patient_id": "P-2024-001"
             },
             {
                 "name": "Sarah Johnson",
-                "birth_date": (datetime.now() - timedelta(days=32*365)).strftime('%Y-%m-%d'),
+                "birth_date": (datetime.now() - timedelta(days=32*365)).date(),
                 "patient_id": "P-2024-002"
             },
             {
                 "name": "Michael Brown",
-                "birth_date": (datetime.now() - timedelta(days=58*365)).strftime('%Y-%m-%d'),
+                "birth_date": (datetime.now() - timedelta(days=58*365)).date(),
                 "patient_id": "P-2024-003"
             },
             {
                 "name": "Emily Davis",
-                "birth_date": (datetime.now() - timedelta(days=29*365)).strftime('%Y-%m-%d'),
+                "birth_date": (datetime.now() - timedelta(days=29*365)).date(),
                 "patient_id": "P-2024-004"
             },
             {
                 "name": "Robert Wilson",
-                "birth_date": (datetime.now() - timedelta(days=67*365)).strftime('%Y-%m-%d'),
+                "birth_date": (datetime.now() - timedelta(days=67*365)).date(),
                 "patient_id": "P-2024-005"
             }
         ]
@@ -177,9 +179,14 @@ def seed_database():
             user = User(**user_data)
             db.add(user)
 
+        # Tell pollers holding ETags (see table_versions.py) that the data changed
+        db.execute(bump_statement("patients", "lab_tests", "medical_reports"))
         db.commit()
         print(f"Created {len(users_data)} users")
 
+        # Count the seeded patients and reports for GET /stats (see dashboard_stats.py)
+        rebuild_stats(engine)
+
         print("Database seeding completed successfully!")
 
     except Exception as e:
@@ -0,0 +1,126 @@
+"""
+Conditional GETs for the polled list endpoints.
+
+Every write to patients, lab_tests or medical_reports bumps that table's
+row in table_versions (version + 1, updated_at = now) in the same
+transaction, through bump() here. A GET reads the rows of the tables its
+response is built from, one primary-key lookup, and derives from them and
+the query string an ETag and a Last-Modified date. When the request's
+If-None-Match holds that ETag, the endpoint answers 304 without running
+its query.
+
+The versions are read before the rows they describe: a write landing in
+between makes the response newer than its ETag, which costs the client
+one extra full response on its next poll, never a stale 304.
+
+Writes that bypass bump() (manual SQL, a script that does not call it)
+are not seen until the next write that does.
+"""
+
+import hashlib
+import os
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import TableVersion
+
+# Resource -> (tables its responses are read from, default Cache-Control). Responses carry patient data,
+# so only the browser may keep them (private); no-cache has it revalidate each poll, which the ETag makes cheap.
+RESOURCES = {
+    "patients": (("patients",), "private, no-cache"),
+    "patient-search": (("patients",), "private, no-cache"),
+    "patient-analyses": (("medical_reports", "patients"), "private, no-cache"),
+    "lab-tests": (("lab_tests", "patients"), "private, no-cache"),
+    "lab-trends": (("lab_tests", "patients"), "private, no-cache"),
+    "stats": (("medical_reports", "patients"), "private, no-cache"),
+}
+
+
+def bump_statement(*tables: str):
+    """UPDATE counting one write to each of tables; execute it in the write's transaction"""
+    return (
+        update(TableVersion)
+        .where(TableVersion.table_name.in_(tables))
+        .values(version=TableVersion.version + 1, updated_at=func.now())
+    )
+
+
+async def bump(db: AsyncSession, *tables: str):
+    await db.execute(bump_statement(*tables))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as for every GET: W/"x" and "x" are the same tag
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class ConditionalGet:
+    """
+    ETag, Last-Modified and Cache-Control of the RESOURCES, and the 304 decision
+
+    Args:
+        cache_control: Cache-Control of each resource
+    """
+
+    def __init__(self, cache_control: Dict[str, str]):
+        self.cache_control = cache_control
+
+        # Metrics, per resource
+        self.not_modified = {resource: 0 for resource in RESOURCES}
+        self.modified = {resource: 0 for resource in RESOURCES}
+
+    async def check(self, db: AsyncSession, resource: str, query: str, if_none_match: Optional[str]) -> Tuple[Dict[str, str], bool]:
+        """Response headers for resource at query string query, and whether if_none_match makes it a 304"""
+        tables, _ = RESOURCES[resource]
+        rows = (await db.execute(
+            select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+            .where(TableVersion.table_name.in_(tables))
+            .order_by(TableVersion.table_name)
+        )).all()
+
+        # updated_at is part of the tag so that a recreated database does not repeat old tags
+        state = repr([(row.table_name, row.version, row.updated_at) for row in rows]) + "?" + query
+        etag = f'W/"{hashlib.blake2b(state.encode(), digest_size=12).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": self.cache_control[resource]}
+        last_modified = max((row.updated_at for row in rows if row.updated_at), default=None)
+        if last_modified is not None:
+            if last_modified.tzinfo is None:
+                # SQLite stores CURRENT_TIMESTAMP as naive UTC
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+        fresh = if_none_match is not None and _etag_matches(if_none_match, etag)
+        if fresh:
+            self.not_modified[resource] += 1
+        else:
+            self.modified[resource] += 1
+        return headers, fresh
+
+    def stats(self) -> Dict:
+        return {
+            resource: {
+                "not_modified": self.not_modified[resource],
+                "modified": self.modified[resource],
+                "cache_control": self.cache_control[resource],
+            }
+            for resource in RESOURCES
+        }
+
+
+def conditional_get_from_env() -> ConditionalGet:
+    """ConditionalGet with RESOURCES' Cache-Control, overridden by CACHE_CONTROL_<RESOURCE> (e.g. CACHE_CONTROL_LAB_TESTS)"""
+    return ConditionalGet({
+        resource: os.getenv("CACHE_CONTROL_" + resource.upper().replace("-", "_"), default)
+        for resource, (_, default) in RESOURCES.items()
+    })
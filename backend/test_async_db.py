@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+from database import async_database_url
+from models import LabTest, MedicalReport, Patient
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///medical_ai.db") == "sqlite+aiosqlite:///medical_ai.db"
+    assert async_database_url("postgresql://user:secret@db:5432/medical") == "postgresql+asyncpg://user:secret@db:5432/medical"
+    assert async_database_url("postgresql+psycopg2://db/medical") == "postgresql+asyncpg://db/medical"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://db/medical")
+
+
+def test_sync_scripts_do_not_need_the_async_driver(tmp_path):
+    code = ("import sys; sys.modules['aiosqlite'] = None\n"
+            "import database\n"
+            "assert database._async_engine is None\n"
+            "database.engine.connect().close()")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'sync.db'}"}
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(__file__), env=env, check=True, capture_output=True)
+
+
+def test_patient_crud_round_trip(client, db_session):
+    created = client.post("/patients", json={"patient_id": "P-ASYNC-1", "name": "Async Patient", "department": "Hepatology"}).json()
+    assert created["success"] and created["patient"]["id"]
+    assert client.post("/patients", json={"patient_id": "P-ASYNC-1", "name": "Again"}).status_code == 400
+
+    updated = client.put("/patients/P-ASYNC-1", json={"doctor_name": "Dr Async"}).json()
+    assert updated["patient"]["doctor_name"] == "Dr Async"
+    assert [patient["doctor_name"] for patient in client.get("/patients").json()["patients"]] == ["Dr Async"]
+
+    # Deleting the patient removes their lab tests and reports too
+    pk = created["patient"]["id"]
+    client.post("/analyze", data={"lab_values": json.dumps({"ALT": 40, "AST": 30, "Bilirubin": 1.0, "GGT": 30, "patient_id": pk})})
+    db_session.add(LabTest(patient_id=pk, test_name="ALT", value=40.0, unit="U/L", normal_range="7-56", status="normal",
+                           date=datetime(2025, 1, 1, 9, 0)))
+    db_session.commit()
+    assert db_session.query(MedicalReport).count() == 1
+
+    assert client.delete("/patients/P-ASYNC-1").json()["success"]
+    assert client.delete("/patients/P-ASYNC-1").status_code == 404
+    db_session.expire_all()
+    assert db_session.query(Patient).count() == db_session.query(LabTest).count() == db_session.query(MedicalReport).count() == 0
+
+
+def test_analysis_update_and_delete(client, db_session):
+    patient = Patient(name="Reported", patient_id="P-ASYNC-2")
+    db_session.add(patient)
+    db_session.flush()
+    report = MedicalReport(patient_id=patient.id, diagnosis="Healthy", confidence=90.0, advice="Advice")
+    db_session.add(report)
+    db_session.commit()
+
+    updated = client.put(f"/patient-analyses/{report.id}", json={"diagnosis": "Hepatitis", "confidence": 75.5}).json()
+    assert updated["analysis"]["diagnosis"] == "Hepatitis" and updated["analysis"]["confidence"] == 75.5
+    assert client.delete(f"/patient-analyses/{report.id}").json()["success"]
+    assert client.get("/patient-analyses").json()["analyses"] == []
@@ -0,0 +1,121 @@
+import json
+import random
+
+import numpy as np
+
+import model
+from model import predict_liver_disease, predict_liver_disease_batch
+from models import MedicalReport, Patient
+
+
+def _random_panels(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "alt": round(rng.uniform(5, 400), 1),
+            "ast": round(rng.uniform(5, 400), 1),
+            "bilirubin": round(rng.uniform(0.1, 8.0), 2),
+            "ggt": round(rng.uniform(5, 300), 1),
+        }
+        for _ in range(count)
+    ]
+
+
+def test_batch_matches_single_row_path():
+    panels = _random_panels(200)
+    assert predict_liver_disease_batch(panels) == [predict_liver_disease(**panel) for panel in panels]
+
+
+def test_batch_of_nothing():
+    assert predict_liver_disease_batch([]) == []
+
+
+class _RecordingModel:
+    """Stand-in estimator that records how many rows it was asked to score"""
+
+    def __init__(self, columns, predict_fn):
+        self.columns = columns
+        self.predict_fn = predict_fn
+        self.rows_seen = []
+        self.rows = []
+
+    def predict(self, X):
+        self.rows_seen.append(len(X))
+        rows = [dict(zip(self.columns, row)) for row in X]
+        self.rows.extend(rows)
+        return np.array([self.predict_fn(row) for row in rows])
+
+
+def test_batch_sends_only_diseased_rows_to_specialists(monkeypatch):
+    # Load the real models first so the lazy load cannot replace the fakes
+    model.warm_up()
+    fake_global = _RecordingModel(model.GLOBAL_COLS, lambda row: int(row["ALT"] > 100))
+    fake_hep = _RecordingModel(model.HEP_COLS, lambda row: 2 if row["GGT"] > 100 else 0)
+    fake_cirr = _RecordingModel(model.CIRR_COLS, lambda row: 3)
+    monkeypatch.setattr(model, "model_global", fake_global)
+    monkeypatch.setattr(model, "model_hep", fake_hep)
+    monkeypatch.setattr(model, "model_cirr", fake_cirr)
+
+    panels = _random_panels(300, seed=11)
+    results = predict_liver_disease_batch(panels)
+
+    diseased = sum(panel["alt"] > 100 for panel in panels)
+    assert fake_global.rows_seen == [300]
+    assert fake_hep.rows_seen == [diseased]
+    assert fake_cirr.rows_seen == [diseased]
+    assert results == [predict_liver_disease(**panel) for panel in panels]
+
+
+def test_panel_age_reaches_every_model(monkeypatch):
+    model.warm_up()
+    fakes = [_RecordingModel(columns, lambda row: 1) for columns in (model.GLOBAL_COLS, model.HEP_COLS, model.CIRR_COLS)]
+    for name, fake in zip(("model_global", "model_hep", "model_cirr"), fakes):
+        monkeypatch.setattr(model, name, fake)
+
+    predict_liver_disease(120.0, 60.0, 1.0, 90.0, age=63)
+    panels = [{"alt": 120.0, "ast": 60.0, "bilirubin": 1.0, "ggt": 90.0, "age": age} for age in (20, 80)]
+    predict_liver_disease_batch(panels + [{"alt": 120.0, "ast": 60.0, "bilirubin": 1.0, "ggt": 90.0}])
+    for fake in fakes:
+        assert [float(row["Age"]) for row in fake.rows] == [63.0, 20.0, 80.0, 45.0]
+
+    # The single-panel buffers do not keep an age for the next panel
+    predict_liver_disease(120.0, 60.0, 1.0, 90.0)
+    assert all(float(fake.rows[-1]["Age"]) == 45.0 for fake in fakes)
+
+
+def test_batch_endpoint_accepts_json_array(client):
+    panels = [{"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90}, {"ALT": 20, "AST": 20, "Bilirubin": 0.5, "GGT": 20}]
+    response = client.post("/analyze/batch", content=json.dumps(panels), headers={"content-type": "application/json"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    for panel, result in zip(panels, data["results"]):
+        diagnosis, confidence, advice = predict_liver_disease(panel["ALT"], panel["AST"], panel["Bilirubin"], panel["GGT"])
+        assert (result["diagnosis"], result["confidence"], result["advice"]) == (diagnosis, confidence, advice)
+
+
+def test_batch_endpoint_accepts_ndjson_and_persists(client, db_session):
+    patient = Patient(name="Batch Patient", patient_id="P-BATCH-1")
+    db_session.add(patient)
+    db_session.commit()
+
+    lines = [
+        json.dumps({"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90, "patient_id": patient.id}),
+        json.dumps({"ALT": 20, "AST": 20, "Bilirubin": 0.5, "GGT": 20}),
+    ]
+    response = client.post(
+        "/analyze/batch?persist=true",
+        content="\n".join(lines),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert data["persisted"] == 1
+    reports = db_session.query(MedicalReport).all()
+    assert [r.diagnosis for r in reports] == [data["results"][0]["diagnosis"]]
+
+
+def test_batch_endpoint_rejects_bad_payload(client):
+    response = client.post("/analyze/batch", content="{not json", headers={"content-type": "application/json"})
+    assert response.status_code == 400
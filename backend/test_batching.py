@@ -0,0 +1,109 @@
+import asyncio
+
+from batching import MicroBatcher
+from model import predict_liver_disease
+
+
+def _echo_batches(sizes):
+    def predict_batch(panels):
+        sizes.append(len(panels))
+        return [(panel["alt"], len(panels), "ok") for panel in panels]
+    return predict_batch
+
+
+def test_concurrent_submissions_share_batches():
+    sizes = []
+    batcher = MicroBatcher(_echo_batches(sizes), max_batch_size=64, max_wait_ms=20)
+
+    async def run():
+        results = await asyncio.gather(*(batcher.submit({"alt": i}) for i in range(100)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert [result[0] for result in results] == list(range(100))
+    assert sum(sizes) == 100
+    assert max(sizes) == 64
+    assert len(sizes) < 100
+
+    stats = batcher.stats()
+    assert stats["items"] == 100
+    assert stats["batches"] == len(sizes)
+    assert stats["batch_size_histogram"]["<=64"] >= 1
+    assert stats["queue_delay_ms"]["p99"] is not None
+
+
+def test_lone_request_is_not_held_for_the_window():
+    sizes = []
+    batcher = MicroBatcher(_echo_batches(sizes), max_batch_size=64, max_wait_ms=5000)
+
+    async def run():
+        result = await asyncio.wait_for(batcher.submit({"alt": 1}), timeout=1)
+        await batcher.stop()
+        return result
+
+    assert asyncio.run(run()) == (1, 1, "ok")
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def failing(panels):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(failing, max_wait_ms=10)
+
+    async def run():
+        results = await asyncio.gather(*(batcher.submit({"alt": i}) for i in range(5)), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.errors >= 1
+
+
+def test_callers_left_without_a_result_get_an_error():
+    batcher = MicroBatcher(lambda panels: [(0, 0, "ok")] * (len(panels) - 1), max_wait_ms=10)
+
+    async def run():
+        results = await asyncio.gather(*(batcher.submit({"alt": i}) for i in range(5)), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    # An Exception (a 500 from /analyze), not a cancellation
+    failed = [result for result in results if isinstance(result, RuntimeError)]
+    assert failed and all("results for" in str(result) for result in failed)
+    assert len(failed) + results.count((0, 0, "ok")) == 5
+
+
+def test_batches_are_scored_concurrently_up_to_max_in_flight():
+    running = []
+    peak = []
+
+    async def slow_batch(panels):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.pop()
+        return [(panel["alt"], len(panels), "ok") for panel in panels]
+
+    batcher = MicroBatcher(slow_batch, max_batch_size=4, max_wait_ms=5, max_in_flight=3)
+
+    async def run():
+        results = await asyncio.gather(*(batcher.submit({"alt": i}) for i in range(24)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert [result[0] for result in results] == list(range(24))
+    assert max(peak) == 3
+    assert batcher.stats()["peak_in_flight"] == 3 and batcher.stats()["in_flight"] == 0
+
+
+def test_analyze_goes_through_the_batcher(client):
+    response = client.post("/analyze", data={"lab_values": '{"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90}'})
+    assert response.status_code == 200
+    assert response.json()["analysis"]["diagnosis"] == predict_liver_disease(120.0, 60.0, 1.0, 90.0)[0]
+
+    metrics = client.get("/metrics").json()
+    assert metrics["batching"]["items"] >= 1
@@ -0,0 +1,20 @@
+import json
+
+from bench_inference import compare, run_suite
+
+
+def test_suite_covers_every_part_and_batch_size():
+    suite = run_suite(iterations=5, batch_sizes=[1, 4])
+    names = set(suite["results"])
+    for part in ("feature_assembly", "cascade", "rule_based", "stage.model_global", "stage.model_hep", "stage.model_cirr"):
+        assert {f"{part}[b=1]", f"{part}[b=4]"} <= names
+    for result in suite["results"].values():
+        assert result["p50_us"] <= result["p95_us"] <= result["p99_us"]
+        assert result["alloc_peak_kib"] >= 0
+    json.dumps(suite)
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"results": {"a": {"p50_us": 100.0}, "b": {"p50_us": 100.0}, "c": {"p50_us": 100.0}}}
+    current = {"results": {"a": {"p50_us": 150.0}, "b": {"p50_us": 110.0}, "c": {"p50_us": 50.0}, "new": {"p50_us": 1.0}}}
+    assert compare(baseline, current, threshold=0.2) == ["a"]
@@ -0,0 +1,56 @@
+import json
+
+from models import MedicalReport, Patient
+
+
+def _seed(db_session, patients=15, reports=12):
+    db_session.add_all([Patient(name=f"Patient {i}", patient_id=f"P-CHAT-{i}", department="Hepatology") for i in range(patients)])
+    db_session.flush()
+    db_session.add_all([MedicalReport(patient_id=1 + i % patients, diagnosis="Healthy", confidence=90.0, advice="Advice")
+                        for i in range(reports)])
+    db_session.commit()
+
+
+def _ask(client, message):
+    return client.post("/chatbot", json={"message": message}).json()["response"]
+
+
+def test_counts_are_table_totals(client, db_session):
+    _seed(db_session)
+    assert "15 patient(s)" in _ask(client, "How many patients do we have?")
+    assert "12 medical analysis(es)" in _ask(client, "how many analyses")
+
+
+def test_replies_come_from_the_snapshot(client, db_session, query_log):
+    _seed(db_session)
+    _ask(client, "hello")
+    query_log.clear()
+    assert "15 patients and 12 medical analyses" in _ask(client, "hello")
+    assert query_log == []
+
+    # Writes through the API are applied to the snapshot; replies still skip the database
+    client.post("/patients", json={"patient_id": "P-CHAT-NEW", "name": "Newest Patient"})
+    client.post("/analyze", data={"lab_values": json.dumps({"ALT": 40, "AST": 30, "Bilirubin": 1.0, "GGT": 30, "patient_id": 16})})
+    query_log.clear()
+    assert "16 patient(s)" in _ask(client, "how many patients") and "Newest Patient" in _ask(client, "list patients")
+    assert "for Newest Patient" in _ask(client, "latest analysis")
+    assert "13 medical analysis(es)" in _ask(client, "count analyses")
+    assert query_log == []
+
+    client.put("/patients/P-CHAT-NEW", json={"name": "Renamed Patient"})
+    assert "for Renamed Patient" in _ask(client, "latest analysis")
+
+
+def test_deletes_reload_the_snapshot(client, db_session, query_log):
+    _seed(db_session)
+    _ask(client, "hello")
+    client.delete("/patients/P-CHAT-14")
+    query_log.clear()
+    assert "14 patients and 12 medical analyses" in _ask(client, "hello")
+    assert query_log
+
+    reloads = client.get("/metrics").json()["chat_context"]["reloads"]
+    report = db_session.query(MedicalReport).order_by(MedicalReport.id.desc()).first()
+    client.delete(f"/patient-analyses/{report.id}")
+    assert "11 medical analysis(es)" in _ask(client, "how many analyses")
+    assert client.get("/metrics").json()["chat_context"]["reloads"] == reloads + 1
@@ -0,0 +1,65 @@
+import pytest
+
+from bench_chatbot import CORPUS, build_router, run_suite
+from chat_intents import router as chat_router
+from intent_router import IntentRouter, Message
+
+
+def _router():
+    router = IntentRouter()
+    router.intent("first", ["report", "how many"])(lambda message: "first")
+    router.intent("second", ["patient", "report", "what can you do"])(lambda message: "second")
+    router.fallback(lambda message: "fallback")
+    return router
+
+
+def test_first_registered_intent_wins():
+    router = _router()
+    assert router.dispatch("Show the patient report") == "first"
+    assert router.dispatch("patient list") == "second"
+    assert router.dispatch("How many?") == "first"
+    assert router.dispatch("What can you do") == "second"
+    assert router.dispatch("what can you") == "fallback"
+    assert router.keywords() == {"first": ["report", "how many"], "second": ["patient", "report", "what can you do"]}
+
+
+def test_keywords_match_whole_words_and_their_inflections():
+    router = _router()
+    assert router.dispatch("reporting") == "first"
+    assert router.dispatch("reporters patients") == "first"
+    assert router.dispatch("transporter") == "fallback"
+    assert router.classify(Message("this is how it works")) is None
+    assert Message("How many patients?").mentions("how many")
+    assert not Message("somehow many").mentions("how many")
+    assert Message("Show the counts").mentions("count")
+    assert not Message("accounts").mentions("count")
+
+
+def test_intents_registered_after_use_are_compiled_in():
+    router = _router()
+    assert router.dispatch("greetings") == "fallback"
+    router.intent("greeting", ["greetings"])(lambda message: "greeting")
+    assert router.dispatch("greetings") == "greeting"
+    with pytest.raises(ValueError):
+        router.intent("empty", ["!!"])(lambda message: None)
+
+
+def test_chatbot_intents():
+    classify = lambda text: chat_router.classify(Message(text))
+    assert classify("How many analyses have been done?") == "analyses"
+    assert classify("how many patients do we have") == "patients"
+    assert classify("What can you do?") == "capabilities"
+    assert classify("hi there") == "greeting"
+    assert classify("this is about liver disease") == "medical"
+    assert classify("is my liver healthy") == "medical"
+    assert classify("his history") is None
+    assert classify("thanks") is None
+
+
+def test_synthetic_intents_do_not_change_routing():
+    baseline = build_router(0)
+    grown = build_router(200)
+    assert [baseline.classify(Message(text)) for text in CORPUS] == [grown.classify(Message(text)) for text in CORPUS]
+    results = run_suite([0, 50], iterations=2)
+    assert [r["intents"] for r in results] == [5, 55]
+    assert all(r["router_us"] > 0 and r["chain_us"] > 0 for r in results)
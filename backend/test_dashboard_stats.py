@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timezone
+
+from dashboard_stats import month_key, rebuild
+from models import MedicalReport, Patient
+from rescore import write_reports
+
+
+def _seed(db_session):
+    db_session.add_all([
+        Patient(name="Stat A", patient_id="P-STAT-A", department="Hepatology", doctor_name="Dr. One"),
+        Patient(name="Stat B", patient_id="P-STAT-B", department="Hepatology", doctor_name="Dr. Two"),
+        Patient(name="Stat C", patient_id="P-STAT-C"),
+    ])
+    db_session.flush()
+    db_session.add_all([MedicalReport(patient_id=1 + i % 3, diagnosis="Healthy" if i % 2 else "NAFLD", confidence=90.0,
+                                      advice="Advice") for i in range(5)])
+    db_session.commit()
+
+
+def _stats(client):
+    response = client.get("/stats")
+    assert response.status_code == 200
+    return response.json()
+
+
+def _assert_matches_recount(client, db_engine):
+    maintained = _stats(client)
+    rebuild(db_engine)
+    assert _stats(client) == maintained
+    return maintained
+
+
+def test_stats_are_grouped_counts(client, db_session, db_engine):
+    _seed(db_session)
+    rebuild(db_engine)
+    stats = _stats(client)
+    month = month_key(datetime.now(timezone.utc))
+    assert stats["patients"] == {
+        "total": 3,
+        "by_department": [{"key": "Hepatology", "count": 2}, {"key": None, "count": 1}],
+        "by_doctor_name": [{"key": None, "count": 1}, {"key": "Dr. One", "count": 1}, {"key": "Dr. Two", "count": 1}],
+        "by_month": [{"key": month, "count": 3}],
+    }
+    assert stats["analyses"] == {
+        "total": 5,
+        "by_diagnosis": [{"key": "NAFLD", "count": 3}, {"key": "Healthy", "count": 2}],
+        "by_month": [{"key": month, "count": 5}],
+    }
+
+
+def test_writes_through_the_api_keep_the_counts(client, db_session, db_engine):
+    _seed(db_session)
+    rebuild(db_engine)
+
+    client.post("/patients", json={"patient_id": "P-STAT-D", "name": "Stat D", "department": "Cardiology"})
+    client.put("/patients/P-STAT-A", json={"department": "Cardiology", "doctor_name": "Dr. Two"})
+    client.post("/analyze", data={"lab_values": json.dumps({"ALT": 40, "AST": 30, "Bilirubin": 1.0, "GGT": 30, "patient_id": 4})})
+    client.post("/analyze/batch?persist=true", content=json.dumps([
+        {"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90, "patient_id": 2},
+        {"ALT": 20, "AST": 20, "Bilirubin": 0.5, "GGT": 20, "patient_id": 3},
+    ]), headers={"content-type": "application/json"})
+    client.put("/patient-analyses/1", json={"diagnosis": "Fibrosis"})
+    stats = _assert_matches_recount(client, db_engine)
+    assert stats["patients"]["total"] == 4 and stats["analyses"]["total"] == 8
+    assert {"key": "Cardiology", "count": 2} in stats["patients"]["by_department"]
+    assert {"key": "Fibrosis", "count": 1} in stats["analyses"]["by_diagnosis"]
+
+    client.delete("/patient-analyses/2")
+    client.delete("/patients/P-STAT-B")
+    stats = _assert_matches_recount(client, db_engine)
+    assert stats["patients"]["total"] == 3
+    assert stats["analyses"]["total"] == db_session.query(MedicalReport).count()
+
+
+def test_rescore_writes_are_counted(db_session, db_engine, client):
+    _seed(db_session)
+    rebuild(db_engine)
+    write_reports(db_engine, [1, 2], [("Cirrhosis", 80, "Advice"), ("Healthy", 95, "Advice")], "v-test")
+    stats = _assert_matches_recount(client, db_engine)
+    assert {"key": "Cirrhosis", "count": 1} in stats["analyses"]["by_diagnosis"]
+
+
+def test_stats_read_only_the_summary_table(client, db_session, db_engine, query_log):
+    _seed(db_session)
+    rebuild(db_engine)
+    etag = client.get("/stats").headers["ETag"]
+    query_log.clear()
+    _stats(client)
+    assert [statement for statement, _ in query_log if "FROM patients" in statement or "FROM medical_reports" in statement] == []
+    assert client.get("/stats", headers={"If-None-Match": etag}).status_code == 304
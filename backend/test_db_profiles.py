@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db_profiles import configure_engine, engine_options, profile_name, self_check
+
+
+def test_profile_name_resolution(monkeypatch):
+    monkeypatch.delenv("DB_PROFILE", raising=False)
+    assert profile_name("sqlite:///medical_ai.db") == "sqlite"
+    assert profile_name("postgresql://db/medical") == "postgres"
+    assert profile_name("mysql://db/medical") == "none"
+    monkeypatch.setenv("DB_PROFILE", "none")
+    assert profile_name("sqlite:///medical_ai.db") == "none"
+    with pytest.raises(ValueError):
+        profile_name("sqlite:///medical_ai.db", "postgres")
+    with pytest.raises(ValueError):
+        profile_name("sqlite:///medical_ai.db", "turbo")
+
+
+def test_sqlite_profile_settings_and_self_check(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1500")
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    engine = create_engine(url, **engine_options("sqlite", url))
+    configure_engine(engine, "sqlite")
+    with engine.connect() as connection:
+        settings = self_check(connection, "sqlite")
+    engine.dispose()
+
+    assert settings["journal_mode"] == "wal"
+    assert settings["synchronous"] == 1  # NORMAL
+    assert settings["busy_timeout"] == 1500
+    assert settings["mmap_size"] > 0 and settings["cache_size"] < 0
+    assert settings["pool_size"] == 5
+    assert "journal_mode=wal" in capsys.readouterr().out
+
+
+def test_wal_writer_does_not_block_readers(tmp_path):
+    url = f"sqlite:///{tmp_path / 'wal.db'}"
+    engine = create_engine(url, **engine_options("sqlite", url))
+    configure_engine(engine, "sqlite")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE readings (value INTEGER)"))
+        connection.execute(text("INSERT INTO readings VALUES (1)"))
+
+    with engine.connect() as writer, engine.connect() as reader:
+        writer.execute(text("BEGIN IMMEDIATE"))
+        writer.execute(text("INSERT INTO readings VALUES (2)"))
+        # The uncommitted write holds the write lock; the reader still sees the last commit
+        assert reader.execute(text("SELECT count(*) FROM readings")).scalar() == 1
+        writer.execute(text("COMMIT"))
+    engine.dispose()
+
+    # Without the profile, a rollback journal writer blocks the same read
+    plain = sqlite3.connect(tmp_path / "plain.db", timeout=0, isolation_level=None)
+    plain.execute("CREATE TABLE readings (value INTEGER)")
+    plain.execute("BEGIN EXCLUSIVE")
+    plain.execute("INSERT INTO readings VALUES (1)")
+    with pytest.raises(sqlite3.OperationalError):
+        sqlite3.connect(tmp_path / "plain.db", timeout=0).execute("SELECT count(*) FROM readings").fetchall()
+    plain.execute("COMMIT")
+
+
+def test_postgres_profile_options(monkeypatch):
+    monkeypatch.setenv("PG_STATEMENT_TIMEOUT_MS", "12000")
+    monkeypatch.setenv("DB_POOL_SIZE", "15")
+    async_options = engine_options("postgres", "postgresql+asyncpg://user:pw@db/medical")
+    assert async_options["pool_size"] == 15 and async_options["max_overflow"] == 20
+    assert async_options["connect_args"]["server_settings"] == {"statement_timeout": "12000"}
+    assert async_options["connect_args"]["prepared_statement_cache_size"] == 256
+    # The options are accepted by the driver without connecting
+    create_async_engine("postgresql+asyncpg://user:pw@db/medical", **async_options)
+
+    sync_options = engine_options("postgres", "postgresql+psycopg2://user:pw@db/medical")
+    assert sync_options["connect_args"] == {"options": "-c statement_timeout=12000"}
+    assert engine_options("none", "postgresql://db/medical") == {"pool_pre_ping": True}
+
+
+def test_metrics_report_the_database_self_check(client):
+    database = client.get("/metrics").json()["database"]
+    assert database["profile"] == "sqlite"
+    assert database["journal_mode"] == "wal"
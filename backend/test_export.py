@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import LabTest, MedicalReport, Patient
+
+
+def _seed(db_session, patients=5):
+    for i in range(patients):
+        patient = Patient(name=f"Patient {i}", patient_id=f"P-EXPORT-{i}", department="Hepatology")
+        db_session.add(patient)
+        db_session.flush()
+        db_session.add(MedicalReport(patient_id=patient.id, diagnosis="Healthy", confidence=90.0, advice="Advice"))
+        db_session.execute(insert(LabTest), [
+            {"patient_id": patient.id, "test_name": name, "value": 20.0 + i, "unit": "U/L", "normal_range": "7-56",
+             "status": "normal", "date": datetime(2025, 6, 1, 9, i)}
+            for name in ("ALT", "AST")
+        ])
+    db_session.commit()
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_rows_match_the_list_endpoints(client, db_session):
+    _seed(db_session)
+    response = client.get("/export/patients")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    listed = {patient["id"]: patient for patient in client.get("/patients").json()["patients"]}
+    exported = _ndjson(response)
+    assert [row["id"] for row in exported] == sorted(listed)
+    assert all(row == listed[row["id"]] for row in exported)
+
+    analyses = {analysis["id"]: analysis for analysis in client.get("/patient-analyses").json()["analyses"]}
+    assert all(row == analyses[row["id"]] for row in _ndjson(client.get("/export/medical_reports")))
+
+    lab_tests = _ndjson(client.get("/export/lab_tests"))
+    assert len(lab_tests) == 10
+    assert {"id", "patient_id", "testName", "value", "date"} <= set(lab_tests[0])
+
+
+def test_export_resumes_after_id_across_chunks(client, db_session):
+    _seed(db_session, patients=7)
+    full = _ndjson(client.get("/export/lab_tests", params={"chunk_size": 3}))
+    assert len(full) == 14
+
+    resumed = _ndjson(client.get("/export/lab_tests", params={"after_id": full[5]["id"], "chunk_size": 4}))
+    assert full[:6] + resumed == full
+
+
+def test_csv_export_has_one_header(client, db_session):
+    _seed(db_session, patients=4)
+    response = client.get("/export/patients", params={"format": "csv", "chunk_size": 1})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="patients.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["patient_id"] for row in rows] == [f"P-EXPORT-{i}" for i in range(4)]
+
+
+def test_export_rejects_unknown_table_and_format(client):
+    assert client.get("/export/users").status_code == 404
+    assert client.get("/export/patients", params={"format": "xml"}).status_code == 400
+    empty = client.get("/export/patients")
+    assert empty.status_code == 200 and empty.text == ""
+
+
+def test_empty_csv_export_still_has_its_header(client, db_session):
+    tables = ("patients", "lab_tests", "medical_reports")
+    empty = {table: client.get(f"/export/{table}", params={"format": "csv"}).text for table in tables}
+    _seed(db_session, patients=1)
+    for table in tables:
+        header = client.get(f"/export/{table}", params={"format": "csv"}).text.splitlines()[0]
+        assert empty[table] == header + "\n"
@@ -0,0 +1,42 @@
+import numpy as np
+
+import model
+from bench_model import _random_panels, layout_feature_rows, legacy_feature_frames
+
+
+def test_layout_rows_match_legacy_frames():
+    for panel in _random_panels(100):
+        legacy = legacy_feature_frames(*panel)
+        layout = layout_feature_rows(*panel)
+        for df, row, feature_layout in zip(legacy, layout, (model.GLOBAL_LAYOUT, model.HEP_LAYOUT, model.CIRR_LAYOUT)):
+            assert list(df.columns) == feature_layout.columns
+            assert df.iloc[0].tolist() == row[0].tolist()
+        # The specialist models see both through the same float32 conversion
+        for df, row in zip(legacy[1:], layout[1:]):
+            assert np.array_equal(df.to_numpy(dtype=np.float32), row.astype(np.float32))
+
+
+def test_layout_rows_keep_defaults_between_calls():
+    first = layout_feature_rows(300.0, 200.0, 5.0, 150.0)[1].copy()
+    layout_feature_rows(10.0, 12.0, 0.4, 15.0)
+    assert layout_feature_rows(300.0, 200.0, 5.0, 150.0)[1].tolist() == first.tolist()
+
+
+def test_batch_matrix_matches_single_rows():
+    panels = _random_panels(50, seed=3)
+    live = model._live_features(*(np.array(column) for column in zip(*panels)))
+    for layout in (model.GLOBAL_LAYOUT, model.HEP_LAYOUT, model.CIRR_LAYOUT):
+        matrix = layout.matrix(live)
+        for i, panel in enumerate(panels):
+            assert matrix[i].tolist() == layout.row(model._live_features(*panel))[0].tolist()
+
+
+def test_specialist_predictions_identical():
+    model.warm_up()
+    if model.model_hep is None or model.model_cirr is None:
+        return
+    for panel in _random_panels(50, seed=5):
+        _, df_hep, df_cirr = legacy_feature_frames(*panel)
+        _, hep_row, cirr_row = layout_feature_rows(*panel)
+        assert model.model_hep.predict(df_hep)[0] == model.model_hep.predict(hep_row)[0]
+        assert model.model_cirr.predict(df_cirr)[0] == model.model_cirr.predict(cirr_row)[0]
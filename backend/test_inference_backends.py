@@ -0,0 +1,81 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+import model
+from inference_backends import CompiledForest, make_backends
+
+
+def _estimators():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return {name: joblib.load(os.path.join(model.MODEL_DIR, path)) for name, path in model.MODEL_FILES.items()}
+
+
+ESTIMATORS = _estimators()
+LAYOUTS = {"model_global": model.GLOBAL_LAYOUT, "model_hep": model.HEP_LAYOUT, "model_cirr": model.CIRR_LAYOUT}
+
+
+def _corpus(layout, rows, seed):
+    """Default rows with random live lab values, plus fully random rows around the defaults"""
+    rng = np.random.default_rng(seed)
+    live = model._live_features(
+        rng.uniform(5, 400, rows).round(1),
+        rng.uniform(5, 400, rows).round(1),
+        rng.uniform(0.1, 8.0, rows).round(2),
+        rng.uniform(5, 300, rows).round(1),
+    )
+    panels = layout.matrix(live)
+    if panels.dtype == object:
+        panels[:, layout.index["Gender"]] = 1
+    panels = panels.astype(np.float64)
+    scattered = panels * rng.uniform(0.25, 4.0, panels.shape)
+    return np.vstack([panels, scattered])
+
+
+@pytest.mark.parametrize("name", sorted(ESTIMATORS))
+def test_compiled_predictions_identical(name):
+    estimator = ESTIMATORS[name]
+    compiled = CompiledForest(estimator)
+    X = _corpus(LAYOUTS[name], 5000, seed=len(name))
+    assert np.array_equal(compiled.predict_proba(X), estimator.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), estimator.predict(X))
+    for row in X[:200]:
+        assert compiled.predict(row[np.newaxis])[0] == estimator.predict(row[np.newaxis])[0]
+
+
+def test_compiled_rejects_what_sklearn_rejects():
+    estimator = ESTIMATORS["model_global"]
+    compiled = CompiledForest(estimator)
+    # The global layout carries Gender as a label; both backends fail to convert it
+    row = model.GLOBAL_LAYOUT.row(model._live_features(120.0, 60.0, 1.0, 90.0))
+    with pytest.raises(ValueError) as sklearn_error:
+        estimator.predict(row)
+    with pytest.raises(ValueError) as compiled_error:
+        compiled.predict(row)
+    assert str(compiled_error.value) == str(sklearn_error.value)
+    with pytest.raises(ValueError):
+        compiled.predict(np.zeros((1, 3)))
+
+
+def test_unknown_backend_falls_back_to_sklearn():
+    estimators = list(ESTIMATORS.values())
+    assert make_backends(estimators, "onnx") == estimators
+    assert all(isinstance(m, CompiledForest) for m in make_backends(estimators, "compiled"))
+
+
+def test_cascade_matches_across_backends(monkeypatch):
+    from test_batch_analyze import _random_panels
+
+    panels = _random_panels(300, seed=13)
+    results = {}
+    for backend in ("sklearn", "compiled"):
+        monkeypatch.setattr(model, "MODEL_BACKEND", backend)
+        model.load_models()
+        results[backend] = model.predict_liver_disease_batch(panels)
+    monkeypatch.undo()
+    model.load_models()
+    assert results["sklearn"] == results["compiled"]
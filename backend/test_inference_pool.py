@@ -0,0 +1,101 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from inference_pool import InferencePool, InferenceUnavailable
+from model import model_fingerprint, predict_liver_disease, predict_liver_disease_batch
+
+PANELS = [
+    {"alt": 120.0, "ast": 60.0, "bilirubin": 1.0, "ggt": 90.0},
+    {"alt": 20.0, "ast": 20.0, "bilirubin": 0.5, "ggt": 20.0},
+]
+
+
+def test_pool_matches_in_process_prediction():
+    pool = InferencePool(workers=1, queue_depth=4)
+    try:
+        results = asyncio.run(pool.run(predict_liver_disease_batch, PANELS))
+    finally:
+        pool.stop()
+    assert results == [predict_liver_disease(**panel) for panel in PANELS]
+
+
+def test_pool_replaces_a_dead_worker():
+    pool = InferencePool(workers=1, queue_depth=4)
+
+    async def run():
+        worker_pid = await pool.run(os.getpid)
+        os.kill(worker_pid, signal.SIGKILL)
+        await asyncio.sleep(0.2)
+        results = await pool.run(predict_liver_disease_batch, PANELS)
+        return worker_pid, results, await pool.run(os.getpid)
+
+    try:
+        old_pid, results, new_pid = asyncio.run(run())
+    finally:
+        pool.stop()
+    assert new_pid != old_pid
+    assert pool.restarts == 1
+    assert pool.fingerprint == model_fingerprint()
+    assert len(results) == len(PANELS)
+
+
+def test_pool_rejects_jobs_beyond_queue_depth():
+    pool = InferencePool(workers=0, queue_depth=1)
+
+    async def run():
+        slow = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceUnavailable):
+            await pool.run(time.sleep, 0)
+        await slow
+
+    asyncio.run(run())
+    assert pool.rejected == 1
+    assert pool.completed == 1
+
+
+def test_saturated_pool_rejects_the_excess_and_keeps_the_loop_free():
+    pool = InferencePool(workers=1, queue_depth=4)
+
+    async def run():
+        await pool.run(os.getpid)  # start the worker
+        jobs = [asyncio.ensure_future(pool.run(time.sleep, 0.2)) for _ in range(6)]
+        # While the worker is busy, the event loop keeps serving everything else
+        probes = []
+        for _ in range(5):
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            probes.append(time.perf_counter() - start)
+        return await asyncio.gather(*jobs, return_exceptions=True), probes
+
+    try:
+        results, probes = asyncio.run(run())
+    finally:
+        pool.stop()
+    rejected = [result for result in results if isinstance(result, InferenceUnavailable)]
+    assert len(rejected) == 2 and results.count(None) == 4
+    assert (pool.rejected, pool.pending) == (2, 0)
+    assert max(probes) < 0.1
+
+
+def test_job_running_when_its_worker_dies_is_retried():
+    pool = InferencePool(workers=1, queue_depth=4)
+
+    async def run():
+        worker_pid = await pool.run(os.getpid)
+        job = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0.2)  # the job is now running in the worker
+        os.kill(worker_pid, signal.SIGKILL)
+        await job
+        return await pool.run(predict_liver_disease_batch, PANELS)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        pool.stop()
+    assert pool.restarts == 1 and pool.completed == 3
+    assert results == [predict_liver_disease(**panel) for panel in PANELS]
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import lab_ingest
+from models import LabTest, Patient
+
+HEADER = "patient_id,test_name,value,unit,normal_range,status,date"
+
+
+def _patients(db_session, count=3):
+    db_session.add_all([Patient(name=f"Patient {i}", patient_id=f"P-INGEST-{i}") for i in range(count)])
+    db_session.commit()
+
+
+def test_csv_upload_inserts_rows(client, db_session):
+    _patients(db_session)
+    body = "\n".join([HEADER] + [f"P-INGEST-{i % 3},ALT,{20 + i},U/L,7-56,normal,2025-06-01T09:{i:02d}:00" for i in range(12)])
+    result = client.post("/lab-tests/bulk", content=body, headers={"content-type": "text/csv"}).json()
+    assert result == {"success": True, "rows": 12, "inserted": 12, "failed": 0, "errors": []}
+
+    tests = client.get("/lab-tests", params={"patientId": "P-INGEST-1"}).json()["labTests"]
+    assert [test["value"] for test in tests] == [30.0, 27.0, 24.0, 21.0]
+    assert tests[0]["testName"] == "ALT" and tests[0]["normalRange"] == "7-56"
+
+
+def test_ndjson_upload_accepts_list_field_names(client, db_session):
+    _patients(db_session)
+    lines = [
+        {"patient_id": "P-INGEST-0", "test_name": "AST", "value": 31, "unit": "U/L", "normal_range": "10-40",
+         "status": "normal", "date": "2025-06-02 08:30:00"},
+        {"patientId": "P-INGEST-2", "testName": "GGT", "value": "70.5", "unit": "U/L", "normalRange": "9-48",
+         "status": "high", "date": "2025-06-02"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n"
+    result = client.post("/lab-tests/bulk", content=body, headers={"content-type": "application/x-ndjson"}).json()
+    assert (result["inserted"], result["failed"]) == (2, 0)
+    assert sorted((test.test_name, test.value) for test in db_session.query(LabTest)) == [("AST", 31.0), ("GGT", 70.5)]
+
+
+def test_bad_rows_are_reported_and_skipped(client, db_session):
+    _patients(db_session)
+    body = "\n".join([
+        HEADER,
+        "P-INGEST-0,ALT,40,U/L,7-56,normal,2025-06-01T09:00:00",
+        "P-INGEST-0,ALT,,U/L,7-56,normal,2025-06-01T09:00:00",
+        "P-INGEST-0,ALT,high,U/L,7-56,normal,2025-06-01T09:00:00",
+        "P-INGEST-0,ALT,40,U/L,7-56,normal,yesterday",
+        "P-MISSING,ALT,40,U/L,7-56,normal,2025-06-01T09:00:00",
+        "P-INGEST-1,ALT,40",
+        "P-INGEST-1,AST,35,U/L,10-40,normal,2025-06-01T09:00:00",
+    ])
+    result = client.post("/lab-tests/bulk?format=csv", content=body).json()
+    assert (result["rows"], result["inserted"], result["failed"]) == (7, 2, 5)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4, 5, 6]
+    assert "missing value" in result["errors"][0]["error"]
+    assert "P-MISSING" in result["errors"][3]["error"]
+    assert db_session.query(LabTest).count() == 2
+
+    result = client.post("/lab-tests/bulk", content='{"patient_id": "P-INGEST-0"\n[1, 2]\n').json()
+    assert (result["inserted"], result["failed"]) == (0, 2)
+
+
+def test_quoted_fields_may_span_lines_and_blocks():
+    body = (HEADER + '\nP-INGEST-0,ALT,40,U/L,"7-56\n(adult, ""fasting"")",normal,2025-06-01T09:00:00\n'
+            + "P-INGEST-1,AST,35,U/L,10-40,High,2025-06-01T09:00:00\n").encode()
+
+    async def blocks():
+        # Split inside the quoted field, after its newline
+        for start in range(0, len(body), 85):
+            yield body[start:start + 85]
+
+    async def parse():
+        return [row async for parsed in lab_ingest.iter_parsed(blocks(), "csv") for row in parsed]
+
+    rows = asyncio.run(parse())
+    assert [number for number, _ in rows] == [1, 2]
+    assert rows[0][1][4] == '7-56\n(adult, "fasting")'
+    assert rows[1][1][5] == "high"
+
+
+def test_status_must_be_a_known_value(client, db_session):
+    _patients(db_session)
+    body = "\n".join([
+        HEADER,
+        "P-INGEST-0,ALT,40,U/L,7-56,normal,2025-06-01T09:00:00",
+        "P-INGEST-0,ALT,90,U/L,7-56,elevated,2025-06-01T09:00:00",
+        "P-INGEST-0,ALT,300,U/L,7-56,CRITICAL,2025-06-01T09:00:00",
+    ])
+    result = client.post("/lab-tests/bulk?format=csv", content=body).json()
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["row"] == 2 and "elevated" in result["errors"][0]["error"]
+    assert sorted(test.status for test in db_session.query(LabTest)) == ["critical", "normal"]
+
+
+def test_upload_is_written_in_chunks(client, db_session, monkeypatch):
+    _patients(db_session)
+    monkeypatch.setattr(lab_ingest, "INGEST_CHUNK_ROWS", 4)
+    body = "\n".join([HEADER] + [f"P-INGEST-{i % 3},ALT,{i},U/L,7-56,normal,2025-06-01T10:{i:02d}:00" for i in range(10)])
+    result = client.post("/lab-tests/bulk", content=body, headers={"content-type": "text/csv"}).json()
+    assert (result["inserted"], result["failed"]) == (10, 0)
+    assert sorted(test.value for test in db_session.query(LabTest)) == [float(i) for i in range(10)]
+
+
+def test_rejected_uploads(client):
+    assert client.post("/lab-tests/bulk?format=xml", content="<tests/>").status_code == 400
+    response = client.post("/lab-tests/bulk?format=csv", content="patient_id,test_name,value\nP-1,ALT,40\n")
+    assert response.status_code == 400 and "date" in response.json()["detail"]
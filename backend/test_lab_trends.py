@@ -0,0 +1,98 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+import lab_trends
+from lab_trends import MAX_TREND_TESTS, lttb, parse_tests, summarize
+from models import LabTest, Patient
+
+START = datetime(2020, 1, 1, 8, 0, 0)
+
+
+def _seed(db_session, days=30):
+    patient = Patient(name="Trend Patient", patient_id="P-TREND-1", department="Hepatology")
+    db_session.add(patient)
+    db_session.flush()
+    db_session.add_all(
+        [LabTest(patient_id=patient.id, test_name="ALT", value=30.0 + i, unit="U/L", normal_range="7-56",
+                 status="normal", date=START + timedelta(days=i)) for i in range(days)]
+        + [LabTest(patient_id=patient.id, test_name="AST", value=25.0, unit="U/L", normal_range="10-40",
+                   status="normal", date=START + timedelta(days=i)) for i in range(0, days, 10)]
+    )
+    db_session.commit()
+
+
+def test_lttb_keeps_the_ends_and_the_spikes(monkeypatch):
+    x = list(range(1000))
+    y = [math.sin(i / 40) for i in x]
+    y[517] = 50.0
+    kept = lttb(x, y, 50)
+    assert len(kept) == 50 and kept[0] == 0 and kept[-1] == 999
+    assert kept == sorted(set(kept)) and 517 in kept
+
+    monkeypatch.setattr(lab_trends, "NUMPY_AVAILABLE", False)
+    assert lttb(x, y, 50) == kept
+    assert lttb(x[:10], y[:10], 50) == list(range(10))
+
+
+def test_summarize_aggregates_every_result(monkeypatch):
+    dates = [START + timedelta(days=i) for i in range(366)]
+    values = [10.0 + i / 365.25 * 2 for i in range(366)]
+    summary = summarize(dates, values, "U/L", 20)
+    assert summary["count"] == 366 and len(summary["points"]) == 20
+    assert summary["last"] == {"date": dates[-1], "value": values[-1]}
+    assert (summary["min"], summary["max"]) == (values[0], values[-1])
+    assert summary["slope_per_year"] == pytest.approx(2.0)
+
+    monkeypatch.setattr(lab_trends, "NUMPY_AVAILABLE", False)
+    fallback = summarize(dates, values, "U/L", 20)
+    # On a straight line every triangle has the same area, so only the aggregates are compared
+    assert (fallback["min"], fallback["max"], len(fallback["points"])) == (summary["min"], summary["max"], 20)
+    assert fallback["mean"] == pytest.approx(summary["mean"])
+    assert fallback["slope_per_year"] == pytest.approx(summary["slope_per_year"])
+    assert summarize(dates[:1], values[:1], "U/L", 20)["slope_per_year"] is None
+
+
+def test_parse_tests():
+    assert parse_tests(None) == ["ALT", "AST", "Bilirubin", "GGT"]
+    assert parse_tests(" ALT, AST,ALT,") == ["ALT", "AST"]
+    with pytest.raises(ValueError):
+        parse_tests(" , ")
+    with pytest.raises(ValueError):
+        parse_tests(",".join(f"T{i}" for i in range(MAX_TREND_TESTS + 1)))
+
+
+def test_endpoint_downsamples_within_the_date_range(client, db_session):
+    _seed(db_session)
+    response = client.get("/patients/P-TREND-1/lab-trends", params={
+        "tests": "ALT,AST,GGT", "from": (START + timedelta(days=5)).isoformat(),
+        "to": (START + timedelta(days=24)).isoformat(), "points": 5,
+    })
+    assert response.status_code == 200 and response.headers["ETag"]
+    trends = response.json()["trends"]
+    alt = trends["ALT"]
+    assert alt["count"] == 20 and (alt["min"], alt["max"], alt["mean"]) == (35.0, 54.0, 44.5)
+    assert alt["last"] == {"date": (START + timedelta(days=24)).isoformat(), "value": 54.0}
+    assert len(alt["points"]) == 5 and alt["points"][0]["value"] == 35.0
+    assert alt["slope_per_year"] == pytest.approx(365.25)
+    assert trends["AST"]["count"] == 2 and trends["AST"]["slope_per_year"] == 0
+    assert trends["GGT"] is None
+
+
+def test_payload_is_bounded_by_points(client, db_session):
+    _seed(db_session, days=3000)
+    small = client.get("/patients/P-TREND-1/lab-trends", params={"tests": "ALT", "points": 50})
+    # One page of raw results is a third of the history
+    raw = client.get("/lab-tests", params={"patientId": "P-TREND-1", "limit": 1000})
+    assert small.json()["trends"]["ALT"]["count"] == 3000
+    assert len(small.json()["trends"]["ALT"]["points"]) == 50
+    assert len(small.content) * 10 < len(raw.content)
+
+
+def test_endpoint_errors(client, db_session):
+    _seed(db_session)
+    assert client.get("/patients/P-NOPE/lab-trends").status_code == 404
+    assert client.get("/patients/P-TREND-1/lab-trends", params={"tests": ","}).status_code == 400
+    assert client.get("/patients/P-TREND-1/lab-trends", params={"points": 2}).status_code == 422
+    assert client.get("/patients/P-TREND-1/lab-trends", params={"from": "yesterday"}).status_code == 422
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import threading
+
+import model
+
+
+def test_import_does_not_load_models():
+    code = "import model; assert not model._models_loaded and model.model_global is None"
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(__file__), check=True, capture_output=True)
+
+
+def test_concurrent_first_use_loads_once(monkeypatch):
+    loads = []
+    real_load = model.joblib.load
+
+    def counting_load(path, mmap_mode=None):
+        loads.append((os.path.basename(path), mmap_mode))
+        return real_load(path, mmap_mode=mmap_mode)
+
+    monkeypatch.setattr(model.joblib, "load", counting_load)
+    monkeypatch.setattr(model, "_models_loaded", False)
+    monkeypatch.setattr(model, "MODEL_MMAP", True)
+
+    threads = [threading.Thread(target=model.ensure_models) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(name for name, _ in loads) == sorted(model.MODEL_FILES.values())
+    assert all(mmap_mode == "r" for _, mmap_mode in loads)
+    assert set(model.warm_up()) == set(model.MODEL_FILES)
+    assert model.model_stats()["mode"] == "ML models"
+
+
+def test_fingerprint_does_not_force_a_load(monkeypatch):
+    monkeypatch.setattr(model, "_models_loaded", False)
+    monkeypatch.setattr(model, "MODEL_FINGERPRINT", None)
+    monkeypatch.setattr(model.joblib, "load", lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("loaded")))
+    assert len(model.model_fingerprint()) == 16
+
+
+def test_startup_reports_load_times(client):
+    stats = client.get("/metrics").json()["models"]
+    assert stats["loaded"]
+    assert set(stats["load_ms"]) == set(model.MODEL_FILES)
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from models import LabTest, MedicalReport, Patient
+from pagination import decode_cursor, encode_cursor
+
+
+def _seed_patients(db_session, count, same_second=False):
+    """Patients with explicit timestamps, half of them sharing one whole second"""
+    base = datetime(2025, 3, 1, 8, 0, 0)
+    for i in range(count):
+        created = base if same_second and i % 2 else base + timedelta(minutes=i, microseconds=0 if i % 3 else 250)
+        db_session.add(Patient(name=f"Patient {i}", patient_id=f"P-PAGE-{i}", department="Hepatology" if i % 2 else "Cardiology",
+                               doctor_name=f"Dr {i % 3}", created_at=created))
+    db_session.commit()
+
+
+def _walk(client, url, key, limit, **filters):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **filters}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get(url, params=params).json()
+        seen.extend(body[key])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen, pages
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2025, 3, 1, 8, 0, 0, 125)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42, None)
+    assert decode_cursor(encode_cursor(timestamp, 42, "2025-03-01 08:00:00"))[2] == "2025-03-01 08:00:00"
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_list_without_limit_returns_everything(client, db_session):
+    _seed_patients(db_session, 12)
+    body = client.get("/patients").json()
+    assert len(body["patients"]) == 12
+    assert body["next_cursor"] is None
+    created = [patient["created_at"] for patient in body["patients"]]
+    assert created == sorted(created, reverse=True)
+
+
+@pytest.mark.parametrize("same_second", [False, True])
+def test_page_walk_matches_full_list(client, db_session, same_second):
+    _seed_patients(db_session, 23, same_second=same_second)
+    # CURRENT_TIMESTAMP defaults are stored in SQLite's short text form, without microseconds
+    db_session.add(Patient(name="Defaulted", patient_id="P-PAGE-DEFAULT"))
+    for i in range(3):
+        db_session.execute(text("INSERT INTO patients (name, patient_id, created_at) VALUES (:name, :patient_id, '2025-03-01 08:00:00')"),
+                           {"name": f"Short {i}", "patient_id": f"P-PAGE-SHORT-{i}"})
+    db_session.commit()
+
+    full = client.get("/patients").json()["patients"]
+    paged, pages = _walk(client, "/patients", "patients", limit=5)
+    assert [patient["id"] for patient in paged] == [patient["id"] for patient in full]
+    assert len(paged) == 27 and pages == 6
+
+
+def test_patient_filters(client, db_session):
+    _seed_patients(db_session, 10)
+    hepatology = client.get("/patients", params={"department": "Hepatology"}).json()["patients"]
+    assert {patient["department"] for patient in hepatology} == {"Hepatology"}
+    assert len(hepatology) == 5
+
+    doctor = client.get("/patients", params={"doctor_name": "Dr 0", "limit": 2}).json()
+    assert len(doctor["patients"]) == 2 and doctor["next_cursor"]
+    following = client.get("/patients", params={"doctor_name": "Dr 0", "cursor": doctor["next_cursor"]}).json()
+    assert [patient["doctor_name"] for patient in following["patients"]] == ["Dr 0", "Dr 0"]
+
+    window = client.get("/patients", params={"created_from": "2025-03-01T08:02:00", "created_to": "2025-03-01T08:05:00"}).json()
+    assert [patient["name"] for patient in window["patients"]] == ["Patient 5", "Patient 4", "Patient 3", "Patient 2"]
+
+
+def test_analyses_pages_and_filters(client, db_session):
+    patient = Patient(name="Reported", patient_id="P-PAGE-REPORTS", department="Hepatology")
+    db_session.add(patient)
+    db_session.flush()
+    base = datetime(2025, 4, 1, 12, 0, 0)
+    for i in range(9):
+        db_session.add(MedicalReport(patient_id=patient.id, diagnosis="Hepatitis" if i % 3 == 0 else "Healthy",
+                                     confidence=90.0, advice="Advice", created_at=base))
+    db_session.commit()
+
+    paged, _ = _walk(client, "/patient-analyses", "analyses", limit=4)
+    assert [analysis["id"] for analysis in paged] == sorted((analysis["id"] for analysis in paged), reverse=True)
+    assert len(paged) == 9
+
+    hepatitis = client.get("/patient-analyses", params={"diagnosis": "Hepatitis", "department": "Hepatology"}).json()
+    assert len(hepatitis["analyses"]) == 3
+    assert client.get("/patient-analyses", params={"department": "Cardiology"}).json()["analyses"] == []
+
+
+def test_lab_test_pages_and_filters(client, db_session):
+    patient = Patient(name="Labbed", patient_id="P-PAGE-LABS")
+    db_session.add(patient)
+    db_session.flush()
+    base = datetime(2025, 5, 1, 7, 30, 0)
+    for i in range(7):
+        db_session.add(LabTest(patient_id=patient.id, test_name="ALT" if i % 2 else "AST", value=30.0 + i, unit="U/L",
+                               normal_range="7-56", status="high" if i > 4 else "normal", date=base + timedelta(days=i)))
+    db_session.commit()
+
+    paged, pages = _walk(client, "/lab-tests", "labTests", limit=3, patientId="P-PAGE-LABS")
+    assert [test["value"] for test in paged] == [36.0, 35.0, 34.0, 33.0, 32.0, 31.0, 30.0]
+    assert pages == 3
+
+    high = client.get("/lab-tests", params={"patientId": "P-PAGE-LABS", "status": "high"}).json()["labTests"]
+    assert [test["value"] for test in high] == [36.0, 35.0]
+    window = client.get("/lab-tests", params={"patientId": "P-PAGE-LABS", "test_name": "ALT",
+                                              "date_from": "2025-05-02T07:30:00", "date_to": "2025-05-04T07:30:00"}).json()["labTests"]
+    assert [test["value"] for test in window] == [33.0, 31.0]
+
+
+def test_bad_cursor_and_limit_are_rejected(client):
+    assert client.get("/patients", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/patients", params={"limit": 0}).status_code == 422
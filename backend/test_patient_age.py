@@ -0,0 +1,115 @@
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from models import Patient
+from patient_age import age_on, birth_date_range, parse_birth_date
+
+
+def _years_ago(years, days=0):
+    today = date.today()
+    try:
+        day = today.replace(year=today.year - years)
+    except ValueError:
+        day = today.replace(year=today.year - years, day=28)
+    return day + timedelta(days=days)
+
+
+def test_birth_date_range_matches_age_on():
+    births = [date(1999, 12, 31) + timedelta(days=i) for i in range(3 * 366 + 5)]
+    for day in (date(2024, 2, 29), date(2025, 2, 28), date(2025, 3, 1), date(2026, 12, 31)):
+        for age_min, age_max in ((None, 24), (24, None), (23, 24), (25, 25)):
+            after, at_or_before = birth_date_range(age_min, age_max, day)
+            in_range = [b for b in births if (after is None or b > after) and (at_or_before is None or b <= at_or_before)]
+            in_band = [b for b in births
+                       if (age_min is None or age_on(b, day) >= age_min) and (age_max is None or age_on(b, day) <= age_max)]
+            assert in_range == in_band, (day, age_min, age_max)
+
+    assert age_on(date(2000, 2, 29), date(2025, 2, 28)) == 24
+    assert age_on(date(2000, 2, 29), date(2025, 3, 1)) == 25
+
+
+def test_parse_birth_date():
+    assert parse_birth_date("1980-02-03") == date(1980, 2, 3)
+    assert parse_birth_date("") is None and parse_birth_date(None) is None
+    for value in ("1980-2-3", "19800203", "1980-02-30", "03/02/1980", 1980):
+        with pytest.raises(ValueError):
+            parse_birth_date(value)
+    assert parse_birth_date("2025-03-01", today=date(2025, 3, 1)) == date(2025, 3, 1)
+    with pytest.raises(ValueError, match="future"):
+        parse_birth_date("2025-03-02", today=date(2025, 3, 1))
+
+
+def test_patients_filtered_by_age_band(client, db_session):
+    db_session.add_all([
+        Patient(name="Just Forty", patient_id="P-AGE-40", birth_date=_years_ago(40)),
+        Patient(name="Forty Tomorrow", patient_id="P-AGE-39", birth_date=_years_ago(40, days=1)),
+        Patient(name="Almost Fifty", patient_id="P-AGE-49", birth_date=_years_ago(50, days=1)),
+        Patient(name="Fifty Today", patient_id="P-AGE-50", birth_date=_years_ago(50)),
+        Patient(name="No Birth Date", patient_id="P-AGE-NONE"),
+    ])
+    db_session.commit()
+
+    def ids(**params):
+        return sorted(p["patient_id"] for p in client.get("/patients", params=params).json()["patients"])
+
+    assert ids(age_min=40, age_max=49) == ["P-AGE-40", "P-AGE-49"]
+    assert ids(age_min=50) == ["P-AGE-50"]
+    assert ids(age_max=39) == ["P-AGE-39"]
+    assert len(ids()) == 5
+    assert client.get("/patients", params={"age_min": 50, "age_max": 40}).status_code == 400
+    assert client.get("/patients", params={"age_min": -1}).status_code == 422
+
+    # The day is part of an age band's ETag, the query string alone of any other
+    assert client.get("/patients", params={"age_min": 40}).headers["ETag"] != client.get("/patients").headers["ETag"]
+
+
+def test_birth_date_is_validated_and_returned_as_text(client):
+    created = client.post("/patients", json={"patient_id": "P-AGE-NEW", "name": "New", "birth_date": "1985-07-09"})
+    assert created.json()["patient"]["birth_date"] == "1985-07-09"
+    assert client.get("/patients").json()["patients"][0]["birth_date"] == "1985-07-09"
+
+    assert client.post("/patients", json={"patient_id": "P-AGE-BAD", "name": "Bad", "birth_date": "09/07/1985"}).status_code == 400
+    assert client.put("/patients/P-AGE-NEW", json={"birth_date": "1985-13-01"}).status_code == 400
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    assert client.post("/patients", json={"patient_id": "P-AGE-NEXT", "name": "Next", "birth_date": tomorrow}).status_code == 400
+    assert client.put("/patients/P-AGE-NEW", json={"birth_date": tomorrow}).status_code == 400
+    assert client.get("/patients").json()["patients"][0]["birth_date"] == "1985-07-09"
+    assert client.put("/patients/P-AGE-NEW", json={"birth_date": ""}).json()["patient"]["birth_date"] is None
+
+
+def test_correcting_a_birth_date_clears_the_unparsed_text(client, db_session):
+    db_session.add(Patient(name="Old Text", patient_id="P-AGE-RAW", birth_date_raw="3/2/1980"))
+    db_session.commit()
+    assert client.get("/patients").json()["patients"][0]["birth_date_raw"] == "3/2/1980"
+    client.put("/patients/P-AGE-RAW", json={"birth_date": "1980-02-03"})
+    assert client.get("/patients").json()["patients"][0]["birth_date_raw"] is None
+
+
+def test_analyze_feeds_the_patients_age_to_the_model(client, db_session, monkeypatch):
+    import model
+
+    db_session.add(Patient(name="Aged Patient", patient_id="P-AGE-ML", birth_date=_years_ago(63)))
+    db_session.commit()
+    # Load the real models first so the lazy load cannot replace the fake
+    model.warm_up()
+    ages = []
+
+    class _AgeRecordingModel:
+        def predict(self, X):
+            ages.extend(float(row[model.GLOBAL_LAYOUT.index["Age"]]) for row in X)
+            return np.zeros(len(X), dtype=int)
+
+    monkeypatch.setattr(model, "model_global", _AgeRecordingModel())
+
+    panel = {"ALT": 40, "AST": 30, "Bilirubin": 1.0, "GGT": 30}
+    client.post("/analyze", data={"lab_values": json.dumps({**panel, "patient_id": 1})})
+    client.post("/analyze", data={"lab_values": json.dumps({**panel, "patient_id": 1, "Age": 30})})
+    client.post("/analyze", data={"lab_values": json.dumps(panel)})
+    # Other values, so the batch misses the prediction cache
+    panel["ALT"] = 41
+    client.post("/analyze/batch", content=json.dumps([{**panel, "patient_id": 1}, {**panel, "patient_id": 999}]),
+                headers={"content-type": "application/json"})
+    assert ages == [63.0, 30.0, 45.0, 63.0, 45.0]
@@ -0,0 +1,48 @@
+from models import MedicalReport, Patient
+
+
+def _seed(db_session, patients, reports_per_patient, start=0):
+    for i in range(start, start + patients):
+        patient = Patient(name=f"Patient {i}", patient_id=f"P-AN-{i}", department="Hepatology", doctor_name=f"Dr {i}")
+        db_session.add(patient)
+        db_session.flush()
+        for j in range(reports_per_patient):
+            db_session.add(MedicalReport(patient_id=patient.id, diagnosis=f"Diagnosis {j}", confidence=80.0, advice="Advice"))
+    db_session.commit()
+
+
+def _selects(query_log):
+    # Reads of the data; the table_versions lookup for the ETag is one more per request
+    return [
+        statement for statement, _ in query_log
+        if statement.lstrip().upper().startswith("SELECT") and "table_versions" not in statement
+    ]
+
+
+def test_analyses_include_patient_fields(client, db_session):
+    _seed(db_session, patients=2, reports_per_patient=2)
+    # A report whose patient no longer exists
+    db_session.add(MedicalReport(patient_id=9999, diagnosis="Orphan", confidence=50.0, advice="None"))
+    db_session.commit()
+
+    analyses = client.get("/patient-analyses").json()["analyses"]
+    assert len(analyses) == 5
+    by_diagnosis = {analysis["diagnosis"]: analysis for analysis in analyses}
+    assert by_diagnosis["Orphan"]["patient_name"] == "Unknown"
+    assert by_diagnosis["Orphan"]["patient_id_display"] == "Unknown"
+    assert by_diagnosis["Orphan"]["department"] is None
+    patient_rows = [analysis for analysis in analyses if analysis["diagnosis"] != "Orphan"]
+    assert {analysis["patient_name"] for analysis in patient_rows} == {"Patient 0", "Patient 1"}
+    assert all(analysis["department"] == "Hepatology" and analysis["updated_at"] for analysis in patient_rows)
+
+
+def test_analyses_query_count_does_not_grow_with_results(client, db_session, query_log):
+    _seed(db_session, patients=3, reports_per_patient=1)
+    query_log.clear()
+    client.get("/patient-analyses")
+    small = len(_selects(query_log))
+
+    _seed(db_session, patients=40, reports_per_patient=5, start=3)
+    query_log.clear()
+    assert len(client.get("/patient-analyses").json()["analyses"]) == 203
+    assert len(_selects(query_log)) == small == 1
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from bench_search import query_corpus, run_suite, seed_database
+from models import Patient
+from patient_search import fts_match, search_terms
+
+
+def _names(response):
+    return [patient["name"] for patient in response.json()["patients"]]
+
+
+@pytest.fixture
+def patients(db_session):
+    db_session.add_all([
+        Patient(name="John Smith", patient_id="P-1001", email="john.smith@example.com", phone="+1 555 0100",
+                department="Hepatology", doctor_name="Ahmed Karim"),
+        Patient(name="Johanna Lee", patient_id="P-1002", email="jlee@example.com", department="Cardiology",
+                doctor_name="Sara Ali"),
+        Patient(name="Karim Hassan", patient_id="P-2001", department="Hepatology", doctor_name="John Doe"),
+        Patient(name="Zoë Müller", patient_id="P-3001", department="Gastroenterology"),
+    ])
+    db_session.commit()
+
+
+def test_search_terms_cannot_inject_fts_syntax():
+    assert search_terms('jo* "smith" OR -x_y') == ["jo", "smith", "or", "x", "y"]
+    assert fts_match(["jo", "smith", "hepatology"]) == '"jo"* "smith"* "hepato"*'
+
+
+def test_prefix_search_ranks_name_and_id_hits_first(client, patients):
+    assert _names(client.get("/patients/search", params={"q": "john"})) == ["John Smith", "Karim Hassan"]
+    # Name prefixes outrank the doctor's name; equal scores list the newest patient first
+    assert _names(client.get("/patients/search", params={"q": "joh"})) == ["Johanna Lee", "John Smith", "Karim Hassan"]
+    assert _names(client.get("/patients/search", params={"q": "karim"})) == ["Karim Hassan", "John Smith"]
+    assert _names(client.get("/patients/search", params={"q": "jo smi"})) == ["John Smith"]
+    assert _names(client.get("/patients/search", params={"q": "P-2001"})) == ["Karim Hassan"]
+    assert _names(client.get("/patients/search", params={"q": "0100"})) == ["John Smith"]
+    assert _names(client.get("/patients/search", params={"q": "muller"})) == ["Zoë Müller"]
+    assert sorted(_names(client.get("/patients/search", params={"q": "hepatology"}))) == ["John Smith", "Karim Hassan"]
+    assert len(_names(client.get("/patients/search", params={"q": "hepatology", "limit": 1}))) == 1
+    # Looked up by its indexed prefix "hepato", then checked in full
+    assert _names(client.get("/patients/search", params={"q": "hepatologist"})) == []
+    assert _names(client.get("/patients/search", params={"q": "  "})) == []
+    assert client.get("/patients/search", params={"q": "x", "limit": 1000}).status_code == 422
+
+
+def test_index_follows_inserts_updates_and_deletes(client, patients):
+    client.post("/patients", json={"patient_id": "P-4001", "name": "Omar Farouk", "department": "Nephrology"})
+    assert _names(client.get("/patients/search", params={"q": "omar"})) == ["Omar Farouk"]
+
+    client.put("/patients/P-4001", json={"name": "Omar Nasser"})
+    assert _names(client.get("/patients/search", params={"q": "farouk"})) == []
+    assert _names(client.get("/patients/search", params={"q": "nasser nephro"})) == ["Omar Nasser"]
+
+    client.delete("/patients/P-4001")
+    assert _names(client.get("/patients/search", params={"q": "omar"})) == []
+
+
+def test_bench_suite_reports_every_query_kind(tmp_path):
+    url = f"sqlite:///{tmp_path / 'bench.db'}"
+    seed_database(url, 200)
+    corpus = query_corpus(200)
+    results = asyncio.run(run_suite(url, corpus, iterations=1))
+    assert [r["kind"] for r in results] == list(corpus)
+    for r in results:
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
@@ -0,0 +1,150 @@
+import os
+import time
+
+import model
+import numpy as np
+
+from prediction_cache import PredictionCache, canonical_panel, panel_key
+
+PANEL = {"alt": 120.0, "ast": 60.0, "bilirubin": 1.0, "ggt": 90.0, "age": 45.0, "gender": "male", "alkphos": 100.0, "tp": 7.0, "alb": 4.0}
+RESULT = ("Hepatitis C (Stage 2)", 90, "Hepatitis C detected at stage 2.")
+
+
+def test_equivalent_panels_share_an_entry():
+    cache = PredictionCache(lambda: "v1")
+    cache.put(PANEL, RESULT)
+    assert cache.get(dict(PANEL, alt=120.04, gender=" Male")) == RESULT
+    assert cache.get(dict(PANEL, alt=121.0)) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(lambda: "v1", max_entries=2)
+    for alt in (10.0, 20.0):
+        cache.put(dict(PANEL, alt=alt), RESULT)
+    cache.get(dict(PANEL, alt=10.0))
+    cache.put(dict(PANEL, alt=30.0), RESULT)
+    assert cache.get(dict(PANEL, alt=20.0)) is None
+    assert cache.get(dict(PANEL, alt=10.0)) == RESULT
+    assert cache.evictions == 1
+
+
+def test_entries_expire():
+    cache = PredictionCache(lambda: "v1", ttl_seconds=0.05)
+    cache.put(PANEL, RESULT)
+    time.sleep(0.1)
+    assert cache.get(PANEL) is None
+    assert cache.expirations == 1
+
+
+def test_new_model_fingerprint_invalidates():
+    fingerprint = ["v1"]
+    cache = PredictionCache(lambda: fingerprint[0])
+    cache.put(PANEL, RESULT)
+    fingerprint[0] = "v2"
+    assert cache.get(PANEL) is None
+    assert cache.invalidations == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_fingerprint_follows_model_files():
+    model.warm_up()
+    if model.model_global is None:
+        assert model.model_fingerprint() == "rule-based"
+    else:
+        assert len(model.model_fingerprint()) == 16
+
+
+def test_file_fingerprint_follows_rewritten_files(tmp_path, monkeypatch):
+    for name in model.MODEL_FILES.values():
+        (tmp_path / name).write_bytes(b"v1")
+    monkeypatch.setattr(model, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(model, "_models_loaded", False)
+    monkeypatch.setattr(model, "_files_fingerprint", (None, None))
+    before = model.model_fingerprint()
+    assert model.model_fingerprint() == before
+
+    replaced = tmp_path / model.MODEL_FILES["model_hep"]
+    replaced.write_bytes(b"v2")
+    os.utime(replaced, ns=(1, 1))
+    assert model.model_fingerprint() != before
+
+
+def test_worker_model_reload_invalidates_the_cache(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.inference_pool, "fingerprint", main.inference_pool.fingerprint)
+    form = {"lab_values": '{"ALT": 77, "AST": 60, "Bilirubin": 1.0, "GGT": 90}'}
+    client.post("/analyze", data=form)
+    before = client.get("/metrics").json()["prediction_cache"]
+
+    # INFERENCE_WORKERS=0 runs inference in this process: reloading here is a worker reloading
+    monkeypatch.setattr(model, "MODEL_FINGERPRINT", "reloaded")
+    client.post("/analyze", data={"lab_values": '{"ALT": 78, "AST": 60, "Bilirubin": 1.0, "GGT": 90}'})
+    client.post("/analyze", data=form)
+
+    stats = client.get("/metrics").json()["prediction_cache"]
+    assert stats["model_fingerprint"] == "reloaded"
+    assert stats["invalidations"] == before["invalidations"] + 1
+    assert (stats["hits"], stats["misses"] - before["misses"]) == (before["hits"], 2)
+
+
+def test_panels_sharing_an_entry_are_scored_alike(client, monkeypatch):
+    straddling = dict(PANEL, alt=80.04), dict(PANEL, alt=80.0)
+    assert panel_key(straddling[0]) == panel_key(straddling[1])
+    assert canonical_panel(straddling[0]) == canonical_panel(straddling[1])
+
+    model.warm_up()
+    seen = []
+
+    class _ThresholdModel:
+        # Splits between the two panels, as alt > 80 in the rules or a forest split can
+        def predict(self, X):
+            alts = [float(row[model.GLOBAL_LAYOUT.index["ALT"]]) for row in X]
+            seen.extend(alts)
+            return np.array([int(alt > 80) for alt in alts])
+
+    monkeypatch.setattr(model, "model_global", _ThresholdModel())
+
+    def analyze(alt):
+        form = {"lab_values": f'{{"ALT": {alt}, "AST": 60, "Bilirubin": 1.0, "GGT": 90}}'}
+        return client.post("/analyze?cache=false", data=form).json()["analysis"]["diagnosis"]
+
+    assert analyze(80.04) == analyze(80.0)
+    batch = client.post("/analyze/batch?cache=false", content='[{"ALT": 80.04, "AST": 60, "Bilirubin": 1.0, "GGT": 90}]',
+                        headers={"content-type": "application/json"}).json()
+    assert batch["results"][0]["diagnosis"] == analyze(80.0)
+    assert set(seen) == {80.0}
+
+
+def test_analyze_serves_repeats_from_cache(client):
+    form = {"lab_values": '{"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90}'}
+    before = client.get("/metrics").json()["prediction_cache"]
+    first = client.post("/analyze", data=form).json()["analysis"]
+    second = client.post("/analyze", data=form).json()["analysis"]
+    assert first["diagnosis"] == second["diagnosis"]
+
+    stats = client.get("/metrics").json()["prediction_cache"]
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (1, 1)
+
+    client.post("/analyze?cache=false", data=form)
+    assert client.get("/metrics").json()["prediction_cache"]["hits"] == stats["hits"]
+
+
+def test_batch_only_scores_cache_misses(client, monkeypatch):
+    import main
+
+    scored = []
+
+    def counting_batch(panels):
+        scored.append(len(panels))
+        return model.predict_liver_disease_batch(panels)
+
+    monkeypatch.setattr(main, "predict_liver_disease_batch", counting_batch)
+    client.post("/analyze", data={"lab_values": '{"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90}'})
+    scored.clear()
+
+    panels = '[{"ALT": 120, "AST": 60, "Bilirubin": 1.0, "GGT": 90}, {"ALT": 20, "AST": 20, "Bilirubin": 0.5, "GGT": 20}]'
+    response = client.post("/analyze/batch", content=panels, headers={"content-type": "application/json"})
+    assert response.json()["count"] == 2
+    assert scored == [1]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+import model
+from models import LabTest, MedicalReport, Patient
+from rescore import rescore
+
+
+def _seed(db_session, patients=7):
+    """Each patient gets two days of liver panels, plus a day with only non-liver tests"""
+    base = datetime(2025, 1, 1, 9, 0)
+    rows, expected = [], []
+    for i in range(patients):
+        patient = Patient(name=f"Patient {i}", patient_id=f"P-RESCORE-{i}")
+        db_session.add(patient)
+        db_session.flush()
+        for day in range(2):
+            values = {"ALT": 30.0 + 40 * i + day, "AST": 25.0 + 20 * day, "Bilirubin": 0.5 + 0.4 * i, "GGT": 20.0 + 15 * i}
+            for minute, (name, value) in enumerate(values.items()):
+                rows.append({"patient_id": patient.id, "test_name": name, "value": value, "unit": "U/L",
+                             "normal_range": "-", "status": "normal", "date": base + timedelta(days=day, minutes=minute)})
+            expected.append((patient.id, {"alt": values["ALT"], "ast": values["AST"], "bilirubin": values["Bilirubin"], "ggt": values["GGT"]}))
+        rows.append({"patient_id": patient.id, "test_name": "Blood Glucose", "value": 95.0, "unit": "mg/dL",
+                     "normal_range": "70-100", "status": "normal", "date": base + timedelta(days=5)})
+    db_session.execute(insert(LabTest), rows)
+    db_session.commit()
+    return expected
+
+
+def _reports(db_session):
+    return db_session.execute(
+        select(MedicalReport.patient_id, MedicalReport.diagnosis, MedicalReport.model_version).order_by(MedicalReport.id)
+    ).all()
+
+
+def test_rescore_writes_one_tagged_report_per_panel(db_engine, db_session):
+    expected = _seed(db_session)
+    stats = rescore(db_engine, chunk_size=3)
+
+    predictions = model.predict_liver_disease_batch([dict(alt=p["alt"], ast=p["ast"], bilirubin=p["bilirubin"], ggt=p["ggt"]) for _, p in expected])
+    assert stats["panels"] == len(expected)
+    assert _reports(db_session) == [
+        (patient_id, diagnosis, model.model_fingerprint())
+        for (patient_id, _), (diagnosis, _, _) in zip(expected, predictions)
+    ]
+
+
+def test_interrupted_rescore_resumes_without_duplicates(db_engine, db_session):
+    expected = _seed(db_session)
+    first = rescore(db_engine, chunk_size=2, max_chunks=2)
+    assert first["panels"] == 8
+
+    second = rescore(db_engine, chunk_size=2)
+    assert second["resumed_after"] == expected[7][0]
+    assert first["panels"] + second["panels"] == len(expected)
+    assert [row[0] for row in _reports(db_session)] == [patient_id for patient_id, _ in expected]
+
+    # Nothing left for this model version
+    assert rescore(db_engine, chunk_size=2)["panels"] == 0
+
+
+def test_rescore_in_a_process_pool(db_engine, db_session):
+    _seed(db_session, patients=5)
+    in_process = rescore(db_engine, chunk_size=2)
+    pooled = rescore(db_engine, chunk_size=2, workers=2, restart=True)
+    reports = _reports(db_session)
+    assert pooled["panels"] == in_process["panels"]
+    assert reports[:len(reports) // 2] == reports[len(reports) // 2:]
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import row_json
+from bench_reads import ENDPOINTS, build_legacy_app, run_suite, seed_database
+from models import LabTest, Patient
+from row_json import dumps
+
+
+def _seed(db_session):
+    patient = Patient(name="Row Patient", patient_id="P-ROW-1", birth_date=date(1980, 2, 3), email="row@example.com",
+                      department="Hepatology", doctor_name="Dr. Row")
+    db_session.add(patient)
+    db_session.flush()
+    start = datetime(2026, 1, 5, 8, 0, 0)
+    db_session.add_all([
+        LabTest(patient_id=patient.id, test_name="ALT", value=40.5 + i, unit="U/L", normal_range="7-56", status="normal",
+                date=start + timedelta(days=i, microseconds=1500 * i))
+        for i in range(5)
+    ])
+    db_session.commit()
+
+
+def test_dumps_writes_datetimes_as_isoformat(monkeypatch):
+    payload = {"naive": datetime(2026, 1, 5, 8, 0, 0), "micro": datetime(2026, 1, 5, 8, 0, 0, 1500),
+               "aware": datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc), "none": None, "text": "Zoë"}
+    expected = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in payload.items()}
+    assert json.loads(dumps(payload)) == expected
+    monkeypatch.setattr(row_json, "ORJSON_AVAILABLE", False)
+    assert json.loads(dumps(payload)) == expected
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def test_rows_are_the_columns_as_json(client, db_session):
+    _seed(db_session)
+    response = client.get("/patients")
+    assert response.headers["content-type"] == "application/json" and response.headers["ETag"]
+    patient = db_session.query(Patient).one()
+    row = {
+        "id": patient.id, "name": "Row Patient", "patient_id": "P-ROW-1", "birth_date": "1980-02-03",
+        "birth_date_raw": None, "email": "row@example.com", "phone": None, "profile_picture": None, "department": "Hepatology",
+        "doctor_name": "Dr. Row", "created_at": _iso(patient.created_at), "updated_at": _iso(patient.updated_at),
+    }
+    assert response.json()["patients"] == [row]
+    assert client.get("/patients/search", params={"q": "row"}).json()["patients"] == [row]
+    assert [json.loads(line) for line in client.get("/export/patients").text.splitlines()] == [row]
+
+    tests = db_session.query(LabTest).order_by(LabTest.date.desc()).all()
+    rows = [{"testName": "ALT", "value": test.value, "unit": "U/L", "normalRange": "7-56", "status": "normal",
+             "date": test.date.isoformat()} for test in tests]
+    response = client.get("/lab-tests", params={"patientId": "P-ROW-1", "limit": 2})
+    body = response.json()
+    assert body["labTests"] == rows[:2]
+    follow = client.get("/lab-tests", params={"patientId": "P-ROW-1", "cursor": body["next_cursor"]}).json()
+    assert follow["labTests"] == rows[2:]
+    exported = [json.loads(line) for line in client.get("/export/lab_tests").text.splitlines()]
+    assert exported == [{"id": test.id, "patient_id": patient.id, **row} for test, row in reversed(list(zip(tests, rows)))]
+
+    data = client.get("/patient-data").json()
+    assert data["patient"] == {"id": "P-ROW-1", "name": "Row Patient", "birth_date": "1980-02-03"}
+    assert data["labTests"] == rows
+
+
+def test_bench_suite_compares_both_implementations(client, db_engine):
+    from main import app
+
+    seed_database(db_engine.url.render_as_string(hide_password=False), 30)
+    legacy = build_legacy_app()
+    legacy.dependency_overrides = app.dependency_overrides
+    results = asyncio.run(run_suite(app, legacy, iterations=1))
+    assert [r["endpoint"] for r in results] == [name for name, _, _ in ENDPOINTS]
+    assert all(r["before_rows_per_s"] > 0 and r["after_rows_per_s"] > 0 for r in results)
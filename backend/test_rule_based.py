@@ -0,0 +1,70 @@
+import random
+
+import numpy as np
+from hypothesis import given, settings, strategies as st
+
+import model
+from model import _enhanced_rule_based_prediction, rule_based_prediction_batch
+
+# Every threshold the rule ladder compares against, per lab value
+_EDGES = {
+    "alt": (0, 40, 80, 100, 120, 150, 200),
+    "ast": (0, 40, 100, 120, 150, 200),
+    "bilirubin": (0, 0.8, 1.2, 1.5, 2.0, 2.4, 3.2),
+    "ggt": (0, 50, 60, 80, 100),
+}
+
+
+def _value(rng, key):
+    """Random lab value, often on or right next to a rule threshold"""
+    if rng.random() < 0.5:
+        edge = rng.choice(_EDGES[key])
+        return max(0.0, edge + rng.choice((-0.01, 0.0, 0.01, -1.0, 1.0)))
+    return round(rng.uniform(0, 500 if key != "bilirubin" else 10), rng.choice((0, 1, 2)))
+
+
+def _panels(count, seed):
+    rng = random.Random(seed)
+    panels = [{key: _value(rng, key) for key in _EDGES} for _ in range(count)]
+    # ALT/AST ratios sitting on the 0.8, 1.5, 2.0 and 5 boundaries
+    for panel in panels[::7]:
+        panel["alt"] = panel["ast"] * rng.choice((0.8, 1.5, 2.0, 5.0))
+    return panels
+
+
+def _lab_value(key):
+    """A lab value, often on or right next to one of its rule thresholds"""
+    limit = 10.0 if key == "bilirubin" else 500.0
+    near_edge = st.tuples(st.sampled_from(_EDGES[key]), st.sampled_from((-1.0, -0.01, 0.0, 0.01, 1.0)))
+    return st.one_of(near_edge.map(lambda pair: max(0.0, pair[0] + pair[1])), st.floats(0.0, limit, allow_nan=False))
+
+
+@st.composite
+def _panel(draw):
+    panel = {key: draw(_lab_value(key)) for key in _EDGES}
+    # ALT/AST ratios sitting on the 0.8, 1.5, 2.0 and 5 boundaries
+    ratio = draw(st.sampled_from((None, 0.8, 1.5, 2.0, 5.0)))
+    if ratio is not None:
+        panel["alt"] = panel["ast"] * ratio
+    return panel
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(_panel(), min_size=1, max_size=40))
+def test_vectorized_matches_scalar(panels):
+    columns = [[panel[key] for panel in panels] for key in ("alt", "ast", "bilirubin", "ggt")]
+    expected = [_enhanced_rule_based_prediction(panel["alt"], panel["ast"], panel["bilirubin"], panel["ggt"]) for panel in panels]
+    assert rule_based_prediction_batch(*columns) == expected
+
+
+def test_every_rule_is_reached():
+    panels = _panels(5000, seed=42)
+    diagnoses = {result[0].split(" (Stage")[0] for result in rule_based_prediction_batch(*(np.array([p[k] for p in panels]) for k in _EDGES))}
+    assert diagnoses == {outcome[0].split(" (Stage")[0] for outcome in model._RULE_OUTCOMES}
+
+
+def test_batch_fallback_uses_rule_engine(monkeypatch):
+    model.warm_up()
+    monkeypatch.setattr(model, "model_global", None)
+    panels = _panels(50, seed=9)
+    assert model.predict_liver_disease_batch(panels) == [_enhanced_rule_based_prediction(**panel) for panel in panels]
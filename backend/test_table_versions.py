@@ -0,0 +1,71 @@
+from models import Patient
+from table_versions import _etag_matches
+
+
+def _seed(db_session):
+    db_session.add_all([Patient(name=f"Patient {i}", patient_id=f"P-TAG-{i}", department="Hepatology") for i in range(3)])
+    db_session.commit()
+
+
+def _revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_unchanged_resource_is_answered_304_without_reading_rows(client, db_session, query_log):
+    _seed(db_session)
+    first = client.get("/patients")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert first.headers["Last-Modified"].endswith(" GMT")
+
+    query_log.clear()
+    again = _revalidate(client, "/patients", etag)
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["ETag"] == etag and again.headers["Cache-Control"] == "private, no-cache"
+    assert len(query_log) == 1 and "table_versions" in query_log[0][0]
+
+    # Another page or filter is another representation
+    assert client.get("/patients", params={"limit": 2}).headers["ETag"] != etag
+    assert _revalidate(client, "/patients?department=Cardiology", etag).status_code == 200
+
+
+def test_writes_change_the_etag_of_the_resources_that_read_the_table(client, db_session):
+    _seed(db_session)
+    urls = ["/patients", "/patients/search?q=patient", "/patient-analyses", "/lab-tests?patientId=P-TAG-0"]
+    etags = {url: client.get(url).headers["ETag"] for url in urls}
+
+    client.post("/patients", json={"patient_id": "P-TAG-NEW", "name": "New Patient"})
+    # Every resource joins or looks up patients
+    assert all(_revalidate(client, url, etags[url]).status_code == 200 for url in urls)
+    etags = {url: client.get(url).headers["ETag"] for url in urls}
+
+    response = client.post("/lab-tests/bulk?format=ndjson", content=(
+        b'{"patient_id": "P-TAG-0", "test_name": "ALT", "value": 40, "unit": "U/L", '
+        b'"normal_range": "7-56", "status": "normal", "date": "2026-01-05T08:00:00"}\n'
+    ))
+    assert response.json()["inserted"] == 1
+    assert _revalidate(client, "/lab-tests?patientId=P-TAG-0", etags["/lab-tests?patientId=P-TAG-0"]).status_code == 200
+    assert _revalidate(client, "/patients", etags["/patients"]).status_code == 304
+    assert _revalidate(client, "/patient-analyses", etags["/patient-analyses"]).status_code == 304
+
+    client.delete("/patients/P-TAG-NEW")
+    assert all(_revalidate(client, url, etags[url]).status_code == 200 for url in urls)
+
+
+def test_metrics_count_revalidations(client, db_session):
+    _seed(db_session)
+    before = client.get("/metrics").json()["conditional_get"]["patients"]
+    etag = client.get("/patients").headers["ETag"]
+    _revalidate(client, "/patients", etag)
+    after = client.get("/metrics").json()["conditional_get"]["patients"]
+    assert after["modified"] - before["modified"] == 1
+    assert after["not_modified"] - before["not_modified"] == 1
+
+
+def test_if_none_match_uses_weak_comparison():
+    assert _etag_matches('W/"abc"', 'W/"abc"')
+    assert _etag_matches('"abc"', 'W/"abc"')
+    assert _etag_matches('"x", W/"abc"', 'W/"abc"')
+    assert _etag_matches("*", 'W/"abc"')
+    assert not _etag_matches('W/"abd"', 'W/"abc"')
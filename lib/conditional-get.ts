@@ -0,0 +1,25 @@
+import type { NextRequest } from "next/server"
+
+// Headers of the backend's polled GETs that let the browser revalidate instead of re-downloading
+const RELAYED_HEADERS = ["ETag", "Last-Modified", "Cache-Control"]
+
+// Request headers for the backend: JSON, plus the browser's If-None-Match when it holds a copy
+export function backendRequestHeaders(request: NextRequest): HeadersInit {
+  const headers: Record<string, string> = { "Content-Type": "application/json" }
+  const ifNoneMatch = request.headers.get("if-none-match")
+  if (ifNoneMatch) {
+    headers["If-None-Match"] = ifNoneMatch
+  }
+  return headers
+}
+
+export function relayedHeaders(backendResponse: Response): Headers {
+  const headers = new Headers()
+  for (const name of RELAYED_HEADERS) {
+    const value = backendResponse.headers.get(name)
+    if (value) {
+      headers.set(name, value)
+    }
+  }
+  return headers
+}